@@ -0,0 +1,66 @@
+"""
+Per-(symbol, timeframe) analysis cache, valid until the next candle closes
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """LRU cache of analyses keyed by (symbol, timeframe).
+
+    Each entry remembers the open time of the last closed candle it was computed from.
+    A lookup hits only while that is still the latest closed candle, so nothing is
+    recomputed between candle closes and nothing stale is served after one.
+    """
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol, timeframe, candle_time):
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < candle_time:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, symbol, timeframe, candle_time, analysis):
+        key = (symbol, timeframe)
+        with self._lock:
+            self._entries[key] = (candle_time, analysis)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def latest(self, symbol, timeframe):
+        """Most recent analysis for the key even if a newer candle has closed since"""
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe))
+        return entry[1] if entry else None
+
+    def items(self):
+        with self._lock:
+            return [(key, entry) for key, entry in self._entries.items()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
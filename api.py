@@ -0,0 +1,231 @@
+"""
+Read-only HTTP API over the bot's latest cycle: analyses, signals and open trades,
+served from pre-serialised JSON so reads never touch the exchange or the analysis loop
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from instrumentation import API_REQUESTS
+from config import DEFAULT_LOGIN_PASSWORD
+
+MAX_WAIT = 60  # longest long-poll, seconds
+SSE_HEARTBEAT = 15
+
+
+def plain(value):
+    """JSON-safe copy: numpy scalars to Python numbers, NaN/inf to None, tuples to lists"""
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+class Resource:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, data):
+        self.body = json.dumps(plain(data), separators=(',', ':'), allow_nan=False).encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+
+
+class StateStore:
+    """The latest published state, serialised once per publish and shared by every reader.
+
+    publish() replaces parts of the state and wakes long-poll and SSE clients; readers
+    only take a reference to an immutable Resource, so they never wait on the bot.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._parts = {'cycle': None, 'symbols': {}, 'trades': []}
+        self._resources = {}
+        self.version = 0
+        self._render()
+
+    def _render(self):
+        parts = self._parts
+        resources = {
+            'state': Resource(dict(parts, version=self.version)),
+            'symbols': Resource({'version': self.version, 'symbols': parts['symbols']}),
+            'trades': Resource({'version': self.version, 'trades': parts['trades']}),
+        }
+        for symbol, entry in parts['symbols'].items():
+            resources['symbols/' + symbol] = Resource(dict(entry, symbol=symbol, version=self.version))
+        self._resources = resources
+
+    def publish(self, **parts):
+        """Replace the given parts (cycle, symbols, trades) and notify waiting clients"""
+        with self._cond:
+            self._parts = dict(self._parts, **parts)
+            self.version += 1
+            self._render()
+            self._cond.notify_all()
+
+    def get(self, name):
+        return self._resources.get(name)
+
+    def wait(self, version, timeout):
+        """Block until something newer than `version` is published; returns the current version"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, store, password):
+        super().__init__(address, _ApiHandler)
+        self.store = store
+        self.password = password
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in one segment (the base class flushes after each request)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = url.path.rstrip("/")
+        if route == "/api/health":
+            self._send(200, b'{"ok":true}', "health")
+            return
+        if not self._authorized():
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", 'Basic realm="bot"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            API_REQUESTS.inc(("unauthorized", "401"))
+            return
+
+        if route == "/api/events":
+            self._events()
+            return
+
+        name = route[len("/api/"):] if route.startswith("/api/") else None
+        if name and name.startswith("symbols/"):
+            name = "symbols/" + name[len("symbols/"):].upper()
+        store = self.server.store
+        resource = store.get(name) if name else None
+        if resource is None:
+            self._send(404, b'{"error":"not found"}', "not_found")
+            return
+
+        label = "symbols/<symbol>" if name.startswith("symbols/") else name
+        etag = self.headers.get("If-None-Match")
+        if etag == resource.etag:
+            try:
+                wait = min(float(parse_qs(url.query).get("wait", ["0"])[0]), MAX_WAIT)
+            except ValueError:
+                self._send(400, b'{"error":"wait must be a number of seconds"}', label)
+                return
+            if wait > 0:
+                # Long-poll: hold the request until this resource changes or the wait runs out
+                deadline = time.monotonic() + wait
+                version = store.version
+                while resource is not None and resource.etag == etag:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    version = store.wait(version, remaining)
+                    resource = store.get(name)
+                if resource is None:
+                    self._send(404, b'{"error":"not found"}', label)
+                    return
+            if resource.etag == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                API_REQUESTS.inc((label, "304"))
+                return
+        self._send(200, resource.body, label, resource.etag)
+
+    def _authorized(self):
+        password = self.server.password.encode()
+        header = self.headers.get("Authorization", "")
+        scheme, _, credentials = header.partition(" ")
+        if scheme.lower() == "bearer":
+            supplied = credentials.strip().encode()
+        elif scheme.lower() == "basic":
+            try:
+                supplied = base64.b64decode(credentials.strip()).partition(b":")[2]
+            except ValueError:
+                return False
+        else:
+            return False
+        return hmac.compare_digest(supplied, password)
+
+    def _send(self, status, body, label, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+        API_REQUESTS.inc((label, str(status)))
+
+    def _events(self):
+        """Server-sent events: the full state now and after every publish, with heartbeats in between"""
+        store = self.server.store
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        API_REQUESTS.inc(("events", "200"))
+        version = None
+        try:
+            self.wfile.write(b"retry: 5000\n\n")
+            while True:
+                if version != store.version:
+                    version = store.version
+                    resource = store.get('state')
+                    self.wfile.write(b"id: %d\nevent: state\ndata: %s\n\n" % (version, resource.body))
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+                store.wait(version, SSE_HEARTBEAT)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_api_server(store, password, host="127.0.0.1", port=8080):
+    if not password or password == DEFAULT_LOGIN_PASSWORD:
+        # The default is in the repository, so it protects nothing
+        print("Set LOGIN_PASSWORD to a password of your own to start the API")
+        return None
+    try:
+        server = ApiServer((host, port), store, password)
+    except OSError as e:
+        print(f"API not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    print(f"API on http://{host}:{port}/api/state")
+    return server
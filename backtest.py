@@ -1,128 +1,108 @@
 #!/usr/bin/env python3
 """
-Backtest the RSI strategy on historical Bybit data
+Backtest the RSI strategy on historical Binance or Bybit data (the same source the bot reads)
 """
 
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-from pybit.unified_trading import HTTP
-from config import SYMBOLS, TIMEFRAME, RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, TESTNET
+from config import SYMBOLS, TIMEFRAME, RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, DATA_SOURCE
+from data_sources import get_source, to_frame
+from indicators import rsi_matrix
+from scheduler import timeframe_seconds
+from trade_ledger import TradeLedger
+from performance import compute_metrics
 
 SYMBOL = SYMBOLS[0] if SYMBOLS else "BTCUSDT"
+BARS_PER_DAY = 86400 // timeframe_seconds(TIMEFRAME)
+
+
+def compute_rsi(closes, period=RSI_PERIOD):
+    """Wilder's RSI for every bar, NaN during warm-up"""
+    return rsi_matrix(closes, [period])[0]
+
+
+def simulate_trades(closes, rsi, oversold=RSI_OVERSOLD, overbought=RSI_OVERBOUGHT, start=RSI_PERIOD + 1):
+    """Run the RSI mean reversion rules over price/RSI arrays.
+
+    Returns a TradeLedger of closed trades and a per-bar signal array
+    (1 long entry, -1 short entry).
+    """
+    closes = np.asarray(closes, dtype=float)
+    signals = np.zeros(len(closes), dtype=np.int8)
+    trades = TradeLedger()
+
+    # Plain Python floats are much faster to index in the loop than numpy scalars
+    prices = closes.tolist()
+    rsis = np.asarray(rsi, dtype=float).tolist()
+
+    side = None
+    entry_price = 0.0
+    entry_time = 0
+
+    for i in range(start, len(prices)):
+        price = prices[i]
+        value = rsis[i]
+
+        # Skip if RSI is NaN
+        if value != value:
+            continue
+
+        if side is None:
+            if value < oversold:
+                side, entry_price, entry_time = 'long', price, i
+                signals[i] = 1
+            elif value > overbought:
+                side, entry_price, entry_time = 'short', price, i
+                signals[i] = -1
+            continue
+
+        if side == 'long':
+            pnl = (price - entry_price) / entry_price
+            exit = value > 50 or pnl > 0.04 or pnl < -0.02
+        else:
+            pnl = (entry_price - price) / entry_price
+            exit = value < 50 or pnl > 0.04 or pnl < -0.02
+
+        if exit:
+            trades.append(side, entry_price, price, pnl, entry_time, i)
+            side = None
+
+    return trades, signals
+
 
 class RSI_backtest:
-    def __init__(self):
-        self.session = HTTP(testnet=TESTNET)
+    def __init__(self, source=None):
+        # A DataSource or a source name; None means config.DATA_SOURCE
+        self.source = source
         self.initial_balance = 1000  # USDT
         self.balance = self.initial_balance
         self.position = None
-        self.trades = []
+        self.trades = TradeLedger()
+        self.bars = 0
 
     def get_historical_data(self, days=30):
-        """Fetch historical kline data"""
-        print(f"📊 Fetching {days} days of historical data...")
-        limit = min(days * 96, 1000)  # 96 candles per day (15m)
-
-        response = self.session.get_kline(
-            category="linear",
-            symbol=SYMBOL,
-            interval=TIMEFRAME,
-            limit=limit
-        )
-
-        if response['retCode'] == 0:
-            data = response['result']['list']
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-            ])
-            df['close'] = df['close'].astype(float)
-            df['high'] = df['high'].astype(float)
-            df['low'] = df['low'].astype(float)
-            df['open'] = df['open'].astype(float)
-            df = df.iloc[::-1].reset_index(drop=True)
-            return df
-        else:
-            raise Exception(f"Failed to fetch data: {response['retMsg']}")
+        """Fetch historical candles, paging back from now"""
+        if self.source is None or isinstance(self.source, str):
+            self.source = get_source(self.source)
+        print(f"📊 Fetching {days} days of historical data from {self.source.name}...")
+        candles = self.source.history(SYMBOL, TIMEFRAME, days * BARS_PER_DAY)
+        return to_frame(candles)
 
     def calculate_rsi(self, closes, period=RSI_PERIOD):
         """Calculate RSI"""
-        deltas = np.diff(closes)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-
-        avg_gains = np.convolve(gains, np.ones(period)/period, mode='valid')
-        avg_losses = np.convolve(losses, np.ones(period)/period, mode='valid')
-
-        rs = avg_gains / (avg_losses + 1e-10)
-        rsi = 100 - (100 / (1 + rs))
-
-        # Pad with NaN for the first `period` values
-        rsi_full = np.empty(len(closes))
-        rsi_full[:] = np.nan
-        rsi_full[period:] = rsi
-        return rsi_full
+        return compute_rsi(closes, period)
 
     def run_backtest(self, df):
         """Run RSI strategy backtest"""
         print("\n🧪 Running backtest...")
 
         df['rsi'] = self.calculate_rsi(df['close'].values)
-        df['signal'] = 0
-
-        for i in range(RSI_PERIOD + 1, len(df)):
-            price = df['close'].iloc[i]
-            rsi = df['rsi'].iloc[i]
-
-            # Skip if RSI is NaN
-            if np.isnan(rsi):
-                continue
-
-            if self.position is None:
-                # No position - check for entry
-                if rsi < RSI_OVERSOLD:
-                    # Buy signal
-                    self.position = {
-                        'side': 'long',
-                        'entry_price': price,
-                        'entry_time': i
-                    }
-                    df.at[i, 'signal'] = 1
-
-                elif rsi > RSI_OVERBOUGHT:
-                    # Sell signal (short)
-                    self.position = {
-                        'side': 'short',
-                        'entry_price': price,
-                        'entry_time': i
-                    }
-                    df.at[i, 'signal'] = -1
-
-            else:
-                # Have position - check for exit
-                exit = False
-                pnl = 0
-
-                if self.position['side'] == 'long':
-                    pnl = (price - self.position['entry_price']) / self.position['entry_price']
-                    # Exit if RSI recovers or profitable
-                    if rsi > 50 or pnl > 0.04 or pnl < -0.02:
-                        exit = True
-                else:
-                    pnl = (self.position['entry_price'] - price) / self.position['entry_price']
-                    if rsi < 50 or pnl > 0.04 or pnl < -0.02:
-                        exit = True
-
-                if exit:
-                    self.trades.append({
-                        'side': self.position['side'],
-                        'entry': self.position['entry_price'],
-                        'exit': price,
-                        'pnl': pnl,
-                        'duration': i - self.position['entry_time']
-                    })
-                    self.balance *= (1 + pnl)
-                    self.position = None
+        trades, signals = simulate_trades(df['close'].values, df['rsi'].values)
+        df['signal'] = signals
+
+        self.balance *= float(np.prod(1 + trades.pnl))
+        self.trades.extend(trades)
+        self.bars += len(df)
 
         return df
 
@@ -133,39 +113,41 @@ class RSI_backtest:
         print("=" * 50)
 
         print(f"\nStrategy: RSI Mean Reversion")
-        print(f"Period: {RSI_PERIOD}")
+        print(f"Period: {RSI_PERIOD} (Wilder)")
         print(f"Overbought: {RSI_OVERBOUGHT}")
         print(f"Oversold: {RSI_OVERSOLD}")
         print(f"Symbol: {SYMBOL}")
-        print(f"Timeframe: {TIMEFRAME}m")
+        print(f"Timeframe: {TIMEFRAME}")
 
         print(f"\n📊 Performance:")
         print(f"Initial Balance: ${self.initial_balance:,.2f}")
         print(f"Final Balance: ${self.balance:,.2f}")
         print(f"Total Return: {((self.balance/self.initial_balance)-1)*100:.2f}%")
 
-        if len(self.trades) > 0:
-            wins = sum(1 for t in self.trades if t['pnl'] > 0)
-            losses = len(self.trades) - wins
-            win_rate = (wins / len(self.trades)) * 100
+        m = compute_metrics(self.trades, span=self.bars, periods_per_year=BARS_PER_DAY * 365,
+                            initial_balance=self.initial_balance)
+        if m['trades'] > 0:
+            print(f"Max Drawdown: {m['max_drawdown']*100:.2f}%")
+            if m['sharpe'] is not None:
+                print(f"Sharpe Ratio: {m['sharpe']:.2f}")
+            if m['sortino'] is not None:
+                print(f"Sortino Ratio: {m['sortino']:.2f}")
+            if m['exposure'] is not None:
+                print(f"Exposure: {m['exposure']:.1f}%")
 
             print(f"\n📈 Trades:")
-            print(f"Total Trades: {len(self.trades)}")
-            print(f"Wins: {wins}")
-            print(f"Losses: {losses}")
-            print(f"Win Rate: {win_rate:.1f}%")
-
-            avg_win = np.mean([t['pnl'] for t in self.trades if t['pnl'] > 0]) * 100 if wins > 0 else 0
-            avg_loss = np.mean([t['pnl'] for t in self.trades if t['pnl'] < 0]) * 100 if losses > 0 else 0
-            print(f"Avg Win: {avg_win:.2f}%")
-            print(f"Avg Loss: {avg_loss:.2f}%")
-
-            profit_factor = abs(sum(t['pnl'] for t in self.trades if t['pnl'] > 0) /
-                               sum(t['pnl'] for t in self.trades if t['pnl'] < 0)) if losses > 0 else float('inf')
-            print(f"Profit Factor: {profit_factor:.2f}")
+            print(f"Total Trades: {m['trades']} (Long: {m['long_trades']} | Short: {m['short_trades']})")
+            print(f"Wins: {m['wins']}")
+            print(f"Losses: {m['losses']}")
+            print(f"Win Rate: {m['win_rate']:.1f}%")
+            print(f"Avg Win: {m['avg_win']*100:.2f}%")
+            print(f"Avg Loss: {m['avg_loss']*100:.2f}%")
+            print(f"Expectancy: {m['expectancy']*100:+.3f}% per trade")
+            print(f"Profit Factor: {m['profit_factor']:.2f}")
+            print(f"Avg Duration: {m['avg_duration']:.1f} candles")
 
             print(f"\n🔍 Recent Trades:")
-            for t in self.trades[-5:]:
+            for t in self.trades.tail(5):
                 emoji = "✅" if t['pnl'] > 0 else "❌"
                 print(f"  {emoji} {t['side'].upper():5} | Entry: ${t['entry']:,.2f} | "
                       f"Exit: ${t['exit']:,.2f} | PnL: {t['pnl']*100:+.2f}%")
@@ -175,6 +157,8 @@ class RSI_backtest:
     def plot_results(self, df):
         """Plot price and RSI with signals"""
         try:
+            import matplotlib.pyplot as plt
+
             fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10),
                                             gridspec_kw={'height_ratios': [3, 1]})
 
@@ -216,12 +200,68 @@ class RSI_backtest:
             print(f"\n⚠️ Could not generate chart: {e}")
             print("Install matplotlib to see visual results: pip install matplotlib")
 
+
+def int_list(text):
+    return tuple(int(v) for v in text.split(","))
+
+
+def parse_args():
+    from robustness import PERIOD_GRID, OVERSOLD_GRID, OVERBOUGHT_GRID
+
+    parser = argparse.ArgumentParser(description="Backtest the RSI strategy on exchange data")
+    parser.add_argument("--source", choices=["binance", "bybit"], default=DATA_SOURCE,
+                        help="market data source (default: config.DATA_SOURCE)")
+    parser.add_argument("--mode", choices=["backtest", "walk-forward", "monte-carlo", "robustness", "sensitivity"],
+                        default="backtest", help="robustness = walk-forward + Monte Carlo")
+    parser.add_argument("--days", type=int, default=30, help="days of history to fetch")
+    parser.add_argument("--train-days", type=int, default=30, help="walk-forward training window")
+    parser.add_argument("--test-days", type=int, default=7, help="walk-forward test window")
+    parser.add_argument("--iterations", type=int, default=10000, help="Monte Carlo iterations")
+    parser.add_argument("--periods", type=int_list, default=PERIOD_GRID, help="sensitivity: RSI periods, e.g. 7,14,21")
+    parser.add_argument("--oversold", type=int_list, default=OVERSOLD_GRID, help="sensitivity: oversold thresholds")
+    parser.add_argument("--overbought", type=int_list, default=OVERBOUGHT_GRID, help="sensitivity: overbought thresholds")
+    parser.add_argument("--method", choices=["bootstrap", "shuffle"], default="bootstrap",
+                        help="Monte Carlo trade resampling method")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-plot", action="store_true")
+    parser.add_argument("--export", metavar="PATH", help="save the trade ledger as a binary .npy file")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    bt = RSI_backtest()
+    from robustness import (
+        walk_forward, monte_carlo, sensitivity_surface, print_walk_forward, print_monte_carlo, print_sensitivity
+    )
+
+    args = parse_args()
+    bt = RSI_backtest(args.source)
     try:
-        df = bt.get_historical_data(days=30)
+        df = bt.get_historical_data(days=args.days)
         df = bt.run_backtest(df)
-        bt.print_results()
-        bt.plot_results(df)
+
+        if args.mode == "backtest":
+            bt.print_results()
+            if not args.no_plot:
+                bt.plot_results(df)
+
+        if args.export:
+            bt.trades.save(args.export)
+            print(f"\n💾 Trade ledger saved to '{args.export}'")
+
+        if args.mode in ("walk-forward", "robustness"):
+            wf = walk_forward(df['close'].values, train_bars=args.train_days * BARS_PER_DAY,
+                              test_bars=args.test_days * BARS_PER_DAY, workers=args.workers)
+            print_walk_forward(wf)
+
+        if args.mode in ("monte-carlo", "robustness"):
+            mc = monte_carlo(bt.trades.pnl, iterations=args.iterations,
+                             method=args.method, seed=args.seed, workers=args.workers)
+            print_monte_carlo(mc)
+
+        if args.mode == "sensitivity":
+            surface = sensitivity_surface(df['close'].values, args.periods, args.oversold, args.overbought,
+                                          workers=args.workers)
+            print_sensitivity(surface)
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,246 @@
+"""
+Benchmarks for indicator, analysis, scoring and backtest code on synthetic candles
+
+    python benchmark.py run --output baseline.json
+    python benchmark.py run --output current.json
+    python benchmark.py compare baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market_reader import MarketReader
+from levels import LevelIndex
+from trading_strategy import TradingStrategy
+from backtest import RSI_backtest
+
+SIZES = (300, 10_000, 100_000, 1_000_000)
+STEP_MS = 15 * 60 * 1000
+
+
+def synthetic_ohlcv(bars, seed=42, start_price=30000.0):
+    """Seeded random-walk candles in the same frame layout as MarketReader.get_klines"""
+    rng = np.random.default_rng(seed)
+    closes = start_price * np.exp(np.cumsum(rng.normal(0, 0.003, bars)))
+    opens = np.concatenate(([start_price], closes[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, bars)) * closes
+    highs = np.maximum(opens, closes) + spread
+    lows = np.minimum(opens, closes) - spread
+    volumes = rng.lognormal(3, 0.8, bars)
+    timestamps = 1_600_000_000_000 + np.arange(bars, dtype=np.int64) * STEP_MS
+    return pd.DataFrame({
+        'timestamp': timestamps, 'open': opens, 'high': highs, 'low': lows, 'close': closes,
+        'volume': volumes, 'close_time': timestamps + STEP_MS - 1,
+    })
+
+
+class OfflineMarketReader(MarketReader):
+    """MarketReader fed from a prepared frame, so analyze() runs without the network"""
+
+    def __init__(self, df):
+        super().__init__("BENCHUSDT", "15m")
+        self.df = df
+
+    def refresh_candles(self, limit=300):
+        return self.df
+
+    def get_24h_stats(self):
+        return {'price_change': 0.0, 'price_change_percent': 1.5, 'high': 0.0, 'low': 0.0,
+                'volume': 0.0, 'quote_volume': 0.0}
+
+
+def build_cases(df):
+    """(name, callable) pairs for one synthetic frame"""
+    m = OfflineMarketReader(df)
+    closes = df['close'].values
+    highs = df['high'].values
+    lows = df['low'].values
+    volumes = df['volume'].values
+    price = closes[-1]
+    strategy = TradingStrategy()
+    level_columns = [df[c].values for c in ('timestamp', 'high', 'low', 'volume')]
+    # Scoring and SL/TP only look at the latest values, so take them (and the levels) from a live-sized window
+    m.levels.update(*(column[-300:] for column in level_columns))
+    analysis = m.compute_indicators(df.iloc[-300:])
+
+    def backtest():
+        bt = RSI_backtest()
+        with contextlib.redirect_stdout(io.StringIO()):
+            bt.run_backtest(df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].copy())
+
+    return [
+        ("calculate_sma", lambda: m.calculate_sma(closes, 50)),
+        ("calculate_ema", lambda: m.calculate_ema(closes, 50)),
+        ("calculate_rsi", lambda: m.calculate_rsi(closes)),
+        ("calculate_macd", lambda: m.calculate_macd(closes)),
+        ("calculate_bollinger_bands", lambda: m.calculate_bollinger_bands(closes)),
+        ("calculate_stochastic", lambda: m.calculate_stochastic(highs, lows, closes)),
+        ("calculate_adx", lambda: m.calculate_adx(highs, lows, closes)),
+        ("calculate_atr", lambda: m.calculate_atr(highs, lows, closes)),
+        ("find_support_resistance", lambda: m.find_support_resistance(closes, highs, lows)),
+        ("level_index_update", lambda: LevelIndex().update(*level_columns)),
+        ("nearest_levels", lambda: m.nearest_levels(price, closes, highs, lows)),
+        ("calculate_sl_tp", lambda: m.calculate_sl_tp(price, "BUY", analysis['atr'],
+                                                      analysis['support'], analysis['resistance'])),
+        ("calculate_kdj", lambda: m.calculate_kdj(highs, lows, closes)),
+        ("calculate_vwap", lambda: m.calculate_vwap(highs, lows, closes, volumes)),
+        ("calculate_cci", lambda: m.calculate_cci(highs, lows, closes)),
+        ("calculate_obv", lambda: m.calculate_obv(closes, volumes)),
+        ("calculate_obv_trend", lambda: m.calculate_obv_trend(closes, volumes)),
+        ("calculate_volume_profile", lambda: m.calculate_volume_profile(volumes)),
+        ("detect_divergence", lambda: m.detect_divergence(closes, [analysis['rsi']] * len(closes))),
+        ("get_volume_status", lambda: m.get_volume_status(volumes)),
+        ("analyze", m.analyze),
+        ("analyze_signal", lambda: strategy.analyze_signal(analysis, price, "BULLISH", True)),
+        ("run_backtest", backtest),
+    ]
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """timeit-style: scale the loop count until one repeat takes min_time, report per-call times"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - start) / loops)
+    return {'best': min(times), 'median': statistics.median(times), 'loops': loops, 'repeat': repeat}
+
+
+def run(sizes, seed, repeat, budget, only=None):
+    """Time every case at every size. A case whose timing takes longer than `budget`
+    seconds is not run at larger sizes (recorded as skipped)."""
+    results = {}
+    too_slow = set()
+    for size in sizes:
+        df = synthetic_ohlcv(size, seed)
+        for name, func in build_cases(df):
+            if only and not re.search(only, name):
+                continue
+            entry = results.setdefault(name, {})
+            if name in too_slow:
+                entry[str(size)] = {'skipped': True}
+                print(f"{name:28s} {size:>9,} bars   skipped (over budget at a smaller size)")
+                continue
+            try:
+                timing = measure(func, repeat=repeat)
+            except Exception as e:
+                entry[str(size)] = {'error': str(e)}
+                print(f"{name:28s} {size:>9,} bars   error: {e}")
+                continue
+            entry[str(size)] = timing
+            print(f"{name:28s} {size:>9,} bars   {format_seconds(timing['median'])}")
+            if timing['median'] * timing['loops'] * repeat > budget:
+                too_slow.add(name)
+    return results
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds*1e6:9.1f} µs"
+    if seconds < 1:
+        return f"{seconds*1e3:9.2f} ms"
+    return f"{seconds:9.2f} s "
+
+
+def metadata(seed, repeat):
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print per-case ratios; return the (case, size) pairs slower than baseline by more than threshold"""
+    regressions = []
+    print(f"{'case':28s} {'bars':>9s} {'baseline':>12s} {'current':>12s}   ratio")
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        for size, old in baseline['results'][name].items():
+            new = current['results'][name].get(size)
+            if not new or 'best' not in old or 'best' not in new:
+                continue
+            # Best-of-N is the least noisy estimate of the code's own cost
+            ratio = new['best'] / old['best']
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append((name, size))
+            elif ratio < 1 / (1 + threshold):
+                flag = "  faster"
+            print(f"{name:28s} {int(size):>9,} {format_seconds(old['best'])} "
+                  f"{format_seconds(new['best'])}   {ratio:5.2f}x{flag}")
+
+    if baseline['meta'].get('machine') != current['meta'].get('machine') or \
+            baseline['meta'].get('python') != current['meta'].get('python'):
+        print("\n⚠️ Baseline was recorded on a different machine or Python version")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark indicators, analysis and backtest code")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="run the benchmarks and write a JSON result file")
+    r.add_argument("--output", default="benchmark_results.json")
+    r.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=list(SIZES),
+                   help="comma-separated bar counts (default: %(default)s)")
+    r.add_argument("--seed", type=int, default=42)
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--budget", type=float, default=30.0,
+                   help="seconds per case and size; slower cases skip larger sizes")
+    r.add_argument("--only", metavar="REGEX", help="only run cases whose name matches")
+
+    c = sub.add_parser("compare", help="compare a result file against a baseline")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.15,
+                   help="relative slowdown counted as a regression (default: %(default)s)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.command == "run":
+        results = run(args.sizes, args.seed, args.repeat, args.budget, args.only)
+        with open(args.output, 'w') as f:
+            json.dump({'meta': metadata(args.seed, args.repeat), 'results': results}, f, indent=2)
+        print(f"\n💾 Results saved to '{args.output}'")
+
+    elif args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
@@ -5,50 +5,50 @@ With news sentiment, multi-timeframe analysis, and improved SL/TP
 """
 
 import time
-import requests
-import json
-import os
 from datetime import datetime
-from market_reader import MarketReader
+from market_reader import MarketReader, calculate_sl_tp_batch, get_prices
+from data_sources import get_source
 from news_scanner import NewsScanner
 from trading_strategy import TradingStrategy
+from trade_journal import TradeJournal
+from trade_review import resolve_trades
+from scheduler import Scheduler, ServerClock, timeframe_seconds, last_closed_candle
+from analysis_cache import AnalysisCache
+from snapshot import save_snapshot, load_snapshot, validate_candles, pack_candles, unpack_candles
+from telegram_notifier import TelegramBot, TelegramDispatcher
+from profiling import CycleProfiler
+from execution import BybitClient, BracketExecutor
+from scanner import UniverseScanner
+from recorder import CycleRecorder
+from api import StateStore, start_api_server
+from deadline import Deadline, map_until
+from startup import StartupReport, preload
+from instrumentation import (
+    timed, start_metrics_server, CYCLE_SECONDS, CYCLE_LAG, CYCLES, SIGNALS, TELEGRAM_QUEUE, CYCLE_OVERRUNS,
+    LATE_SYMBOLS
+)
 from config import (
-    SYMBOLS, TIMEFRAME,
-    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, UPDATE_INTERVAL
+    SYMBOLS, TIMEFRAME, DATA_SOURCE, ANALYSIS_CACHE_SIZE,
+    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
+    CANDLE_CLOSE_DELAY, REVIEW_INTERVAL, SENTIMENT_INTERVAL, CLOCK_SYNC_INTERVAL, NEWS_POLL_INTERVAL,
+    TRADE_JOURNAL_FILE, JOURNAL_ARCHIVE_AFTER, TRADE_RECHECK_AFTER, TRADE_MAX_AGE,
+    TELEGRAM_OUTBOX_FILE, TELEGRAM_RATE, TELEGRAM_BURST, TELEGRAM_COALESCE_WINDOW,
+    WORKERS, METRICS_HOST, METRICS_PORT, API_HOST, API_PORT, LOGIN_PASSWORD,
+    PROFILE_DIR, PROFILE_FLAG_FILE, PROFILE_CYCLES, PROFILE_ON_START, PROFILE_MODE,
+    SNAPSHOT_FILE, SNAPSHOT_MAX_AGE, SNAPSHOT_PRICE_TOLERANCE, STARTUP_REPORT,
+    TRADING_ENABLED, API_KEY, API_SECRET, BYBIT_TRADE_URL, TRADE_RISK_USDT, MAX_POSITION_USDT,
+    ORDER_POLL_INTERVAL, ORDER_WORKERS,
+    SCANNER_ENABLED, SCANNER_TOP_K, SCANNER_TOP_N, SCANNER_BUDGET, SCANNER_MIN_QUOTE_VOLUME, SCANNER_MIN_RANGE,
+    SCANNER_WEIGHTS, RECORDER_ENABLED, RECORDER_DIR, RECORDER_SEGMENT_BYTES, RECORDER_MAX_SEGMENTS,
+    RECORDER_FLUSH_INTERVAL, CYCLE_DEADLINE, CYCLE_DEADLINE_MARGIN, CYCLE_WORKERS
 )
 
 
-class TelegramBot:
-    def __init__(self, bot_token, chat_id):
-        self.bot_token = bot_token
-        self.chat_id = chat_id
-        self.api_url = f"https://api.telegram.org/bot{bot_token}"
-        self._session = requests.Session()
-        self._session.headers.update({"User-Agent": "Mozilla/5.0"})
-    
-    def send_message(self, text, parse_mode="HTML", retries=3):
-        for attempt in range(retries):
-            try:
-                url = f"{self.api_url}/sendMessage"
-                payload = {"chat_id": self.chat_id, "text": text, "parse_mode": parse_mode}
-                response = self._session.post(url, json=payload, timeout=30)
-                if response.status_code == 200:
-                    return True
-                elif response.status_code == 429:
-                    wait_time = int(response.json().get("parameters", {}).get("retry_after", 60))
-                    print(f"Rate limited. Waiting {wait_time}s...")
-                    time.sleep(wait_time)
-            except requests.exceptions.Timeout:
-                print(f"Telegram timeout (attempt {attempt+1}/{retries}), retrying...")
-                time.sleep(5)
-            except Exception as e:
-                print(f"Telegram error: {e}")
-                time.sleep(2)
-        print("Failed to send Telegram message after retries")
-        return False
+# Per-symbol fields of a cycle served by the read API
+PUBLISHED_FIELDS = ('analysis', 'signal', 'score', 'indicators', 'blocked', 'fired', 'sl_tp')
 
 
-def format_signal(symbol, a, sl_tp, indicators, strategy):
+def format_signal(symbol, a, sl_tp, indicators, signal):
     price = a['price']
     rsi = a['rsi']
     change = a['change_24h']
@@ -56,8 +56,6 @@ def format_signal(symbol, a, sl_tp, indicators, strategy):
     kdj_j = a['kdj'][2] if a['kdj'] and len(a['kdj']) > 2 else 0
     cci = a['cci'] if a['cci'] else 0
     
-    signal, score, _ = strategy.analyze_signal(a, price)
-    
     if signal == "WAIT":
         return None
     
@@ -91,7 +89,7 @@ def format_signal(symbol, a, sl_tp, indicators, strategy):
     return msg
 
 
-def format_summary(results, sentiment_info):
+def format_summary(results, sentiment_info, late=()):
     msg = f"📊 <b>Market Summary</b> - {TIMEFRAME}\n"
     msg += f"{sentiment_info}\n\n"
     
@@ -109,49 +107,147 @@ def format_summary(results, sentiment_info):
         msg += f"{emoji} {symbol}: ${a['price']:,.0f}\n"
         msg += f"   RSI: {rsi:.0f} | KDJ: {kdj_j:.0f} | {signal}\n\n"
     
+    if late:
+        msg += f"⏳ Not analysed in time: {', '.join(late)}\n\n"
+    
     msg += f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     return msg
 
 
 class SignalBot:
-    def __init__(self):
-        self.telegram = TelegramBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+    def __init__(self, symbols=None):
+        self.startup = StartupReport(STARTUP_REPORT)
+        # Import pandas in the background while start-up waits on the network
+        self.preloading = preload("pandas")
+        self.symbols = list(symbols or SYMBOLS)
+        self.telegram = TelegramDispatcher(
+            TelegramBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID), TELEGRAM_OUTBOX_FILE,
+            rate=TELEGRAM_RATE, burst=TELEGRAM_BURST, coalesce_window=TELEGRAM_COALESCE_WINDOW
+        )
+        TELEGRAM_QUEUE.set_function(self.telegram.queue_depth)
         self.markets = {}
-        self.last_signals = {sym: None for sym in SYMBOLS}
+        self.last_signals = {sym: None for sym in self.symbols}
         self.cached_data = {}
-        self.cache_time = 0
-        self.cache_ttl = 60
+        self.analysis_cache = AnalysisCache(ANALYSIS_CACHE_SIZE)
+        self.last_cycle_candle = None
+        # Symbols the last cycle's deadline left out, and analyses still running past it
+        self.late_symbols = []
+        self.busy = {}
+        self.analysis_job = None
         
-        self.trade_history_file = "trade_history.json"
-        self.trade_history = self.load_trade_history()
-        self.pending_reviews = []
+        self.journal = TradeJournal(TRADE_JOURNAL_FILE, legacy_json="trade_history.json")
         
-        self.news_scanner = NewsScanner()
+        self.news_scanner = NewsScanner(self.symbols)
         self.strategy = TradingStrategy()
+        self.scanner = None
+        if SCANNER_ENABLED:
+            self.scanner = UniverseScanner(get_source(), SCANNER_TOP_K, SCANNER_TOP_N, SCANNER_BUDGET,
+                                           SCANNER_MIN_QUOTE_VOLUME, SCANNER_MIN_RANGE, SCANNER_WEIGHTS)
         
-        self.news_sentiment = self.news_scanner.get_market_sentiment(force=True)
+        self.clock = ServerClock(get_source().server_time)
+        self.scheduler = Scheduler(self.clock)
+        self.profiler = CycleProfiler(PROFILE_DIR, PROFILE_FLAG_FILE, PROFILE_CYCLES,
+                                      start_cycles=PROFILE_ON_START, start_mode=PROFILE_MODE)
         
-        self.telegram.send_message(
+        # What the read API serves; published once per cycle
+        self.api_state = StateStore() if API_PORT else None
+        self.recorder = None
+        if RECORDER_ENABLED:
+            self.recorder = CycleRecorder(RECORDER_DIR, RECORDER_SEGMENT_BYTES, RECORDER_MAX_SEGMENTS,
+                                          RECORDER_FLUSH_INTERVAL)
+            MarketReader.record_levels = True
+        
+        self.executor = None
+        if TRADING_ENABLED and API_KEY and API_SECRET:
+            client = BybitClient(BYBIT_TRADE_URL, API_KEY, API_SECRET, clock=self.clock.now)
+            self.executor = BracketExecutor(client, TRADE_RISK_USDT, MAX_POSITION_USDT, ORDER_POLL_INTERVAL,
+                                            ORDER_WORKERS, notify=self.telegram.send)
+        elif TRADING_ENABLED:
+            print("Trading is enabled but API_KEY/API_SECRET are not set, sending signals only")
+        
+        tasks = {
+            'clock_sync': self.clock.sync,
+            'snapshot': self.restore_snapshot,
+            'sentiment': lambda: self.news_scanner.get_market_sentiment(force=True),
+        }
+        if self.executor:
+            tasks['instruments'] = self.executor.start
+        init = self.startup.run_parallel(tasks)
+        self.news_sentiment = self.news_scanner.get_market_sentiment()
+        if init['snapshot']:
+            print("Bot restarted from snapshot")
+            self.startup.print()
+            return
+        
+        self.telegram.send(
             f"🤖 <b>Advanced RSI Bot Started</b>\n\n"
-            f"📊 Pairs: {', '.join(SYMBOLS)}\n"
+            f"📊 Pairs: {', '.join(self.symbols)}\n"
             f"⏱️ Timeframe: {TIMEFRAME}\n"
-            f"🔄 Update: Every {UPDATE_INTERVAL//60} min\n"
+            f"🔄 Update: Every {TIMEFRAME} candle close\n"
             f"{self.news_scanner.get_news_summary()}"
         )
         print("Bot started!")
+        self.startup.print()
     
-    def load_trade_history(self):
-        if os.path.exists(self.trade_history_file):
-            try:
-                with open(self.trade_history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    def save_snapshot(self):
+        """Persist candle buffers, analyses, last signals and sentiment for a warm restart"""
+        state = {
+            'timeframe': TIMEFRAME,
+            'source': DATA_SOURCE,
+            'candles': {s: pack_candles(m.candles) for s, m in self.markets.items() if m.candles is not None},
+            'levels': {s: m.levels for s, m in self.markets.items() if m.candles is not None},
+            'analyses': self.analysis_cache.items(),
+            'last_signals': self.last_signals,
+            'last_cycle_candle': self.last_cycle_candle,
+            'sentiment': (self.news_scanner.cached_sentiment, self.news_scanner.cache_time),
+            'brackets': self.executor.state() if self.executor else {},
+        }
+        try:
+            with timed("snapshot"):
+                save_snapshot(SNAPSHOT_FILE, state)
+        except Exception as e:
+            print(f"Could not save snapshot: {e}")
     
-    def save_trade_history(self):
-        with open(self.trade_history_file, 'w') as f:
-            json.dump(self.trade_history, f, indent=2)
+    def restore_snapshot(self):
+        """Load the last snapshot if it is recent and its candles agree with live prices"""
+        state = load_snapshot(SNAPSHOT_FILE, SNAPSHOT_MAX_AGE, TIMEFRAME)
+        if not state:
+            return False
+        if state.get('source', DATA_SOURCE) != DATA_SOURCE:
+            print(f"Ignoring snapshot of {state['source']} data")
+            return False
+        
+        candles = {s: c for s, c in state['candles'].items() if s in self.symbols}
+        prices = get_prices(list(candles)) if candles else {}
+        valid = validate_candles(candles, prices, SNAPSHOT_PRICE_TOLERANCE)
+        if candles and not valid:
+            print("Snapshot candles do not match live prices, starting cold")
+            return False
+        
+        for symbol in valid:
+            market = self.markets[symbol] = MarketReader(symbol, TIMEFRAME)
+            market.restore_candles(unpack_candles(candles[symbol]))
+            if symbol in state.get('levels', {}):
+                market.levels = state['levels'][symbol]
+        for (symbol, timeframe), (candle_time, a) in state['analyses']:
+            if symbol in valid or (not candles and symbol in self.symbols):
+                self.analysis_cache.put(symbol, timeframe, candle_time, a)
+                self.cached_data[symbol] = a
+        for symbol, signal in state['last_signals'].items():
+            # The scanner's universe changes from cycle to cycle, so keep all of its symbols
+            if symbol in self.last_signals or self.scanner:
+                self.last_signals[symbol] = signal
+        self.last_cycle_candle = state.get('last_cycle_candle')
+        if self.executor:
+            self.executor.restore(state.get('brackets'))
+        sentiment, sentiment_time = state.get('sentiment', (None, 0))
+        if sentiment and sentiment_time > self.news_scanner.cache_time:
+            self.news_scanner.cached_sentiment = sentiment
+            self.news_scanner.cache_time = sentiment_time
+        
+        print(f"Restored snapshot: {len(valid)}/{len(self.symbols)} candle buffers, "
+              f"{len(self.analysis_cache)} analyses")
+        return True
     
     def record_trade(self, symbol, signal_type, price, sl_tp, indicators):
         trade = {
@@ -167,13 +263,27 @@ class SignalBot:
             'indicators': indicators,
             'status': 'pending_review'
         }
-        self.trade_history.append(trade)
-        self.save_trade_history()
+        self.journal.record(trade)
         print(f"Trade recorded: {symbol} {signal_type} at ${price}")
     
+    def fetch_review_paths(self, trades):
+        """One kline request per symbol covering every pending trade of that symbol"""
+        since = {}
+        for t in trades:
+            entry = datetime.fromisoformat(t['entry_time']).timestamp()
+            since[t['symbol']] = min(entry, since.get(t['symbol'], entry))
+        
+        paths = {}
+        for symbol, start in since.items():
+            start_ms = int(start - timeframe_seconds(TIMEFRAME)) * 1000
+            candles = get_source().klines(symbol, TIMEFRAME, limit=1000, start=start_ms)
+            if candles is not None and len(candles):
+                paths[symbol] = (candles['open_time'], candles['high'], candles['low'], candles['close'])
+        return paths
+    
     def review_trades(self):
-        current_time = datetime.now().timestamp()
-        trades_to_review = [t for t in self.trade_history if t.get('status') == 'pending_review' and t.get('review_time', 0) <= current_time]
+        now = datetime.now().timestamp()
+        trades_to_review = self.journal.due_for_review(now)
         
         if not trades_to_review:
             return
@@ -183,75 +293,36 @@ class SignalBot:
         failed = 0
         pending = 0
         
-        for trade in trades_to_review:
-            symbol = trade['symbol']
-            signal_type = trade['signal_type']
-            entry_price = trade['entry_price']
-            sl = trade.get('sl')
-            tp1 = trade.get('tp1')
-            tp2 = trade.get('tp2')
-            tp3 = trade.get('tp3')
-            
-            market = MarketReader(symbol, TIMEFRAME)
-            current_price = market.get_current_price()
-            
-            if current_price is None:
+        outcomes = resolve_trades(trades_to_review, self.fetch_review_paths(trades_to_review),
+                                  get_prices({t['symbol'] for t in trades_to_review}),
+                                  timeframe_seconds(TIMEFRAME))
+        
+        for trade, (trade_result, exit_price, pnl_pct) in zip(trades_to_review, outcomes):
+            if trade_result == "PENDING":
                 pending += 1
                 continue
-            
-            trade_result = "PENDING"
-            pnl_pct = 0
-            
-            if signal_type == "BUY":
-                if sl and current_price <= sl:
-                    trade_result = "STOP_LOSS"
-                    pnl_pct = ((sl - entry_price) / entry_price) * 100
-                    failed += 1
-                elif tp3 and current_price >= tp3:
-                    trade_result = "TAKE_PROFIT_3"
-                    pnl_pct = ((tp3 - entry_price) / entry_price) * 100
-                    successful += 1
-                elif tp2 and current_price >= tp2:
-                    trade_result = "TAKE_PROFIT_2"
-                    pnl_pct = ((tp2 - entry_price) / entry_price) * 100
-                    successful += 1
-                elif tp1 and current_price >= tp1:
-                    trade_result = "TAKE_PROFIT_1"
-                    pnl_pct = ((tp1 - entry_price) / entry_price) * 100
-                    successful += 1
-                else:
-                    pnl_pct = ((current_price - entry_price) / entry_price) * 100
-                    trade_result = "IN_PROGRESS"
-                    pending += 1
-            elif signal_type == "SELL":
-                if sl and current_price >= sl:
-                    trade_result = "STOP_LOSS"
-                    pnl_pct = ((entry_price - sl) / entry_price) * 100
-                    failed += 1
-                elif tp3 and current_price <= tp3:
-                    trade_result = "TAKE_PROFIT_3"
-                    pnl_pct = ((entry_price - tp3) / entry_price) * 100
-                    successful += 1
-                elif tp2 and current_price <= tp2:
-                    trade_result = "TAKE_PROFIT_2"
-                    pnl_pct = ((entry_price - tp2) / entry_price) * 100
-                    successful += 1
-                elif tp1 and current_price <= tp1:
-                    trade_result = "TAKE_PROFIT_1"
-                    pnl_pct = ((entry_price - tp1) / entry_price) * 100
-                    successful += 1
+            next_review = None
+            if trade_result == "IN_PROGRESS":
+                # Re-checked later until it resolves or gets too old to follow
+                if now - datetime.fromisoformat(trade['entry_time']).timestamp() >= TRADE_MAX_AGE:
+                    trade_result = "EXPIRED"
                 else:
-                    pnl_pct = ((entry_price - current_price) / entry_price) * 100
-                    trade_result = "IN_PROGRESS"
-                    pending += 1
+                    next_review = now + TRADE_RECHECK_AFTER
+            if "TAKE_PROFIT" in trade_result:
+                successful += 1
+            elif trade_result == "STOP_LOSS":
+                failed += 1
+            else:
+                pending += 1
             
-            trade['status'] = trade_result
-            trade['exit_price'] = current_price
-            trade['pnl_pct'] = pnl_pct
+            self.journal.resolve(trade['id'], trade_result, exit_price, datetime.now().isoformat(), pnl_pct,
+                                 next_review)
             
+            symbol = trade['symbol']
+            label = "Current" if trade_result in ("IN_PROGRESS", "EXPIRED") else "Exit"
             emoji = "✅" if "TAKE_PROFIT" in trade_result else "❌" if "STOP_LOSS" in trade_result else "⏳"
-            report += f"{emoji} <b>{symbol}</b> {signal_type}\n"
-            report += f"   Entry: ${entry_price:,.2f} | Current: ${current_price:,.2f}\n"
+            report += f"{emoji} <b>{symbol}</b> {trade['signal_type']}\n"
+            report += f"   Entry: ${trade['entry_price']:,.2f} | {label}: ${exit_price:,.2f}\n"
             report += f"   Result: {trade_result} ({pnl_pct:+.2f}%)\n"
             if trade.get('indicators'):
                 report += f"   Signals: {', '.join(trade['indicators'][:3])}\n"
@@ -266,68 +337,141 @@ class SignalBot:
             win_rate = (successful / (successful + failed)) * 100
             report += f"   📊 Win Rate: {win_rate:.1f}%\n"
         
+        m = self.journal.stats()
+        if m['trades'] > 0:
+            report += f"\n📚 <b>All-time ({m['trades']} closed):</b>\n"
+            report += f"   Win Rate: {m['win_rate']:.1f}% | PF: {m['profit_factor']:.2f}\n"
+            report += f"   Expectancy: {m['expectancy']*100:+.2f}% | Max DD: {m['max_drawdown']*100:.1f}%\n"
+        
         report += f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         
-        self.save_trade_history()
-        self.telegram.send_message(report)
+        self.telegram.send(report)
+        if self.api_state:
+            self.api_state.publish(trades=self.journal.open_trades())
         print(f"Trade review report sent: {successful}W/{failed}L/{pending}P")
     
-    def get_analysis(self, symbol, force=False):
-        now = time.time()
-        if not force and symbol in self.cached_data and (now - self.cache_time) < self.cache_ttl:
-            return self.cached_data[symbol]
+    def get_analysis(self, symbol, force=False, change_24h=None):
+        """Analysis as of the last closed candle; only recomputed once a new candle has closed"""
+        now = self.clock.now()
+        candle_time = last_closed_candle(now, TIMEFRAME)
+        if not force:
+            a = self.analysis_cache.get(symbol, TIMEFRAME, candle_time)
+            if a is not None:
+                return a
         
         if symbol not in self.markets:
             self.markets[symbol] = MarketReader(symbol, TIMEFRAME)
         
-        a = self.markets[symbol].analyze()
+        a = self.markets[symbol].analyze(change_24h, now)
         if a:
-            self.cached_data[symbol] = a
-            self.cache_time = now
+            self.remember_analysis(symbol, a)
         return a
     
-    def calculate_sl_tp(self, price, signal_type):
-        m = MarketReader('BTCUSDT', TIMEFRAME)
-        df = m.get_klines(limit=50)
-        if df is None:
-            return None
-        
-        closes = df['close'].values
-        highs = df['high'].values
-        lows = df['low'].values
-        
-        atr = m.calculate_atr(highs, lows, closes)
-        support, resistance = m.find_support_resistance(closes, highs, lows)
-        
-        sl_tp = m.calculate_sl_tp(price, signal_type, atr, support, resistance)
-        if sl_tp:
-            sl_tp['type'] = signal_type
-        return sl_tp
+    def remember_analysis(self, symbol, a):
+        self.cached_data[symbol] = a
+        self.analysis_cache.put(symbol, TIMEFRAME, a.get('candle_time', 0), a)
     
-    def check_signals(self):
-        print("Checking signals...")
-        
-        if int(time.time()) % (UPDATE_INTERVAL * 2) < 30:
-            self.news_sentiment = self.news_scanner.get_market_sentiment(force=True)
-            print(f"News sentiment: {self.news_sentiment['sentiment']}")
+    def calculate_sl_tp(self, a, signal_type):
+        return self.calculate_sl_tp_batch([(a, signal_type)])[0]
+    
+    def calculate_sl_tp_batch(self, signals):
+        """SL/TP for (analysis, signal_type) pairs from the cycle's own ATR and support/resistance"""
+        if not signals:
+            return []
+        levels = calculate_sl_tp_batch(
+            [a['price'] for a, _ in signals],
+            [signal_type for _, signal_type in signals],
+            [a.get('atr') for a, _ in signals],
+            [a.get('support') for a, _ in signals],
+            [a.get('resistance') for a, _ in signals]
+        )
+        for sl_tp, (_, signal_type) in zip(levels, signals):
+            if sl_tp:
+                sl_tp['type'] = signal_type
+        return levels
+    
+    def refresh_sentiment(self):
+        self.news_sentiment = self.news_scanner.get_market_sentiment(force=True)
+        print(f"News sentiment: {self.news_sentiment['sentiment']}")
+    
+    def cycle_deadline(self):
+        """Stop CYCLE_DEADLINE_MARGIN seconds before the analysis job is next due"""
+        job = self.analysis_job
+        if job and job.deadline:
+            budget = job.deadline - self.clock.now()
+        else:
+            budget = timeframe_seconds(TIMEFRAME)
+        budget -= CYCLE_DEADLINE_MARGIN
+        if CYCLE_DEADLINE:
+            budget = min(budget, CYCLE_DEADLINE)
+        return Deadline(max(budget, 1))
+    
+    def collect_analyses(self, deadline=None):
+        """Analysis for every symbol finished by the deadline, {symbol: analysis or None}.
         
-        results = {}
+        Symbols left out last cycle go first. A symbol whose analysis is still running from
+        an earlier cycle is not started again.
+        """
+        deadline = deadline or self.cycle_deadline()
+        self.busy = {s: f for s, f in self.busy.items() if not f.done()}
+        order = [s for s in self.late_symbols if s in self.symbols]
+        order += [s for s in self.symbols if s not in order]
+        results, late = map_until(self.profiler.wrap(self.get_analysis), [s for s in order if s not in self.busy], deadline, CYCLE_WORKERS)
+        self.busy.update((s, f) for s, f in late.items() if not f.done())
+        self.late_symbols = [s for s in order if s not in results]
+        return {symbol: results.get(symbol) for symbol in self.symbols}
+    
+    def scan_universe(self, deadline=None):
+        """Top signals across the whole universe, {symbol: analysis} strongest first"""
+        deadline = deadline or self.cycle_deadline()
+        with deadline.active():
+            top = self.scanner.scan(lambda symbol, change: self.get_analysis(symbol, change_24h=change),
+                                    lambda a: self.strategy.analyze_signal(a, a['price']),
+                                    budget=min(self.scanner.budget, deadline.remaining()))
+        stats = self.scanner.last_scan
+        print(f"Scanner: {stats['universe']} pairs ranked, {stats['analysed']}/{stats['candidates']} analysed "
+              f"in {stats['seconds']:.1f}s" + (" (budget reached)" if stats['over_budget'] else ""))
+        return dict(top)
+    
+    def check_signals(self):
+        start = time.perf_counter()
+        depth = self.telegram.queue_depth()
+        print(f"Checking signals... (Telegram queue: {depth})" if depth else "Checking signals...")
         
-        for symbol in SYMBOLS:
-            a = self.get_analysis(symbol, force=True)
-            results[symbol] = a
+        deadline = self.cycle_deadline()
+        with self.profiler.cycle():
+            self.process_signals(self.scan_universe(deadline) if self.scanner else self.collect_analyses(deadline))
+        if self.late_symbols:
+            CYCLE_OVERRUNS.inc()
+            LATE_SYMBOLS.inc(amount=len(self.late_symbols))
+            print(f"Cycle deadline ({deadline.seconds:.1f}s) reached, late: {', '.join(self.late_symbols)}")
+        self.last_cycle_candle = last_closed_candle(self.clock.now(), TIMEFRAME)
+        self.save_snapshot()
         
+        CYCLES.inc()
+        CYCLE_SECONDS.observe(time.perf_counter() - start)
+        step = timeframe_seconds(TIMEFRAME)
+        now = self.clock.now()
+        CYCLE_LAG.set(now - (now // step) * step)
+    
+    def process_signals(self, results):
         sentiment_info = self.news_scanner.get_news_summary()
-        self.telegram.send_message(format_summary(results, sentiment_info))
+        with timed("telegram"):
+            self.telegram.send(format_summary(results, sentiment_info, self.late_symbols))
         
+        entries = {}
+        fired = []
         for symbol, a in results.items():
             if not a:
                 continue
             
-            signal, score, indicators = self.strategy.analyze_signal(a, a['price'])
+            with timed("analyze_signal"):
+                signal, score, indicators = self.strategy.analyze_signal(a, a['price'])
+            entries[symbol] = {'analysis': a, 'signal': signal, 'score': score, 'indicators': indicators}
             
             blocked, reason = self.news_scanner.should_block_signal(signal, [symbol])
             if blocked:
+                entries[symbol]['blocked'] = reason
                 print(f"Blocked {signal} for {symbol}: {reason}")
                 continue
             
@@ -336,41 +480,93 @@ class SignalBot:
                 if signal != last_sig:
                     self.last_signals[symbol] = signal
                     signal_type = "BUY" if "BUY" in signal else "SELL"
-                    sl_tp = self.calculate_sl_tp(a['price'], signal_type)
-                    msg = format_signal(symbol, a, sl_tp, indicators, self.strategy)
-                    if msg:
-                        self.telegram.send_message(msg)
-                        self.record_trade(symbol, signal_type, a['price'], sl_tp, indicators)
-                        print(f"Signal sent: {signal} {symbol} (Score: {score})")
+                    fired.append((symbol, a, signal, signal_type, score, indicators, time.perf_counter()))
+                    entries[symbol]['fired'] = True
+        
+        with timed("sl_tp"):
+            levels = self.calculate_sl_tp_batch([(a, signal_type) for _, a, _, signal_type, _, _, _ in fired])
+        
+        for (symbol, a, signal, signal_type, score, indicators, signalled_at), sl_tp in zip(fired, levels):
+            entries[symbol]['sl_tp'] = sl_tp
+            # Orders go out before the Telegram message; open_bracket returns without waiting for acks
+            if self.executor and sl_tp:
+                self.executor.open_bracket(symbol, signal_type, a['price'], sl_tp, signalled_at)
+            msg = format_signal(symbol, a, sl_tp, indicators, signal)
+            if msg:
+                with timed("telegram"):
+                    self.telegram.send(msg)
+                self.record_trade(symbol, signal_type, a['price'], sl_tp, indicators)
+                SIGNALS.inc((signal,))
+                print(f"Signal sent: {signal} {symbol} (Score: {score})")
+        
+        if self.api_state:
+            self.publish_cycle(entries)
+        if self.recorder:
+            self.record_cycle(entries)
+    
+    def publish_cycle(self, entries):
+        """Hand the cycle's analyses, signals and open trades to the read API"""
+        now = self.clock.now()
+        self.api_state.publish(
+            cycle={'candle_time': last_closed_candle(now, TIMEFRAME), 'time': now, 'timeframe': TIMEFRAME,
+                   'source': DATA_SOURCE, 'sentiment': self.news_sentiment, 'late': self.late_symbols},
+            symbols={symbol: {k: entry[k] for k in PUBLISHED_FIELDS if k in entry}
+                     for symbol, entry in entries.items()},
+            trades=self.journal.open_trades())
+    
+    def record_cycle(self, entries):
+        """Hand the cycle to the recorder, with the candles, 24h change and level index behind each analysis"""
+        for symbol, entry in entries.items():
+            market = self.markets.get(symbol)
+            inputs = market.last_input if market else None
+            # Analyses restored from a snapshot or computed by sharding workers have no inputs here
+            if inputs and inputs['analysis'] is entry['analysis']:
+                entry.update(candles=inputs['candles'], change_24h=inputs['change_24h'], now=inputs['now'],
+                             levels=inputs['levels'])
+        self.recorder.record({
+            'time': self.clock.now(),
+            'timeframe': TIMEFRAME,
+            'source': DATA_SOURCE,
+            'sentiment': self.news_sentiment,
+            'late': self.late_symbols,
+            'symbols': entries,
+        })
     
     def run(self):
-        print(f"Bot running - checking every {UPDATE_INTERVAL} seconds")
-        self.last_review_time = time.time()
-        
-        self.check_signals()
-        next_check = time.time() + UPDATE_INTERVAL
-        
-        while True:
-            try:
-                now = time.time()
-                if now >= next_check:
-                    self.check_signals()
-                    next_check = now + UPDATE_INTERVAL
-                
-                if now - self.last_review_time >= 3600:
-                    self.review_trades()
-                    self.last_review_time = now
-                
-                time.sleep(10)
-                
-            except KeyboardInterrupt:
-                print("\nBot stopped")
-                break
-            except Exception as e:
-                print(f"Error: {e}")
-                time.sleep(30)
-
+        print(f"Bot running - analysing on every {TIMEFRAME} candle close")
+        
+        # Jobs due at the same moment run in this order, so analysis sees a fresh clock and sentiment
+        self.scheduler.add_job("clock_sync", self.clock.sync, CLOCK_SYNC_INTERVAL,
+                               run_immediately=self.clock.synced_at is None)
+        self.scheduler.add_job("sentiment", self.refresh_sentiment, SENTIMENT_INTERVAL)
+        if self.news_scanner.news:
+            self.scheduler.add_job("news", self.news_scanner.poll_news, NEWS_POLL_INTERVAL, run_immediately=True)
+        # After a warm restart within the same candle the cycle has already run, so wait for the next close
+        done = self.last_cycle_candle == last_closed_candle(self.clock.now(), TIMEFRAME)
+        self.analysis_job = self.scheduler.add_job("analysis", self.check_signals, timeframe_seconds(TIMEFRAME),
+                               delay=CANDLE_CLOSE_DELAY, run_immediately=not done)
+        self.scheduler.add_job("review", self.review_trades, REVIEW_INTERVAL)
+        self.scheduler.add_job("journal_compact", lambda: self.journal.compact(JOURNAL_ARCHIVE_AFTER), 86400)
+        
+        try:
+            self.scheduler.run_forever()
+        except KeyboardInterrupt:
+            print("\nBot stopped")
+            self.save_snapshot()
+            if self.executor:
+                self.executor.stop()
+            if self.recorder:
+                self.recorder.close()
+            self.telegram.close(timeout=10)
 
 if __name__ == "__main__":
-    bot = SignalBot()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, METRICS_PORT)
+    if WORKERS > 1:
+        from sharding import ShardedSignalBot
+        bot = ShardedSignalBot(WORKERS)
+    else:
+        bot = SignalBot()
+    if API_PORT:
+        start_api_server(bot.api_state, LOGIN_PASSWORD, API_HOST, API_PORT)
     bot.run()
@@ -6,23 +6,154 @@ import os
 # Market Data Settings
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
 TIMEFRAME = "15m"
+# Where candles, prices and tickers come from for the bot and backtests: "binance" (spot) or "bybit" (linear)
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "binance")
+# API base URLs; point these at mock_exchange.py for offline load tests
+BINANCE_API_URL = os.environ.get("BINANCE_API_URL", "https://api.binance.com/api/v3")
+BYBIT_API_URL = os.environ.get("BYBIT_API_URL", "https://api.bybit.com")
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+# Keep-alive connections per host shared by all data sources
+HTTP_POOL_SIZE = 32
+# Readers of the same symbol/timeframe within this many seconds share one candle fetch
+CANDLE_CACHE_MAX_AGE = float(os.environ.get("CANDLE_CACHE_MAX_AGE", "5"))
 
 # RSI Settings
 RSI_PERIOD = 14
 RSI_OVERBOUGHT = 70
 RSI_OVERSOLD = 30
 
+# Support/resistance levels: swing pivots confirmed LEVEL_PIVOT_BARS candles either side, clustered
+# within LEVEL_TOLERANCE_PCT into volume-weighted levels from the newest LEVEL_MAX_PIVOTS pivots.
+# Price within LEVEL_PROXIMITY_PCT of a level with LEVEL_MIN_TOUCHES pivots adds to the signal score.
+LEVEL_PIVOT_BARS = 3
+LEVEL_TOLERANCE_PCT = 0.3
+LEVEL_MAX_PIVOTS = 200
+LEVEL_MIN_TOUCHES = 2
+LEVEL_PROXIMITY_PCT = 0.5
+
 # Telegram Notifications (use env vars on production)
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "8593238089:AAFHSrO4S-P0ahGp-Ox2DikSV07jRXylUKo")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "6431370638")
+TELEGRAM_OUTBOX_FILE = os.environ.get("TELEGRAM_OUTBOX_FILE", "telegram_outbox.jsonl")  # undelivered messages survive restarts
+TELEGRAM_RATE = 1.0  # messages per second (Telegram per-chat limit)
+TELEGRAM_BURST = 1
+TELEGRAM_COALESCE_WINDOW = 1.0  # seconds to wait for more messages to merge
 
 # Update interval (in seconds)
 UPDATE_INTERVAL = 300  # 5 minutes
 
+# Scheduling (in seconds) - analysis runs on every TIMEFRAME candle close
+CANDLE_CLOSE_DELAY = 2  # give the exchange time to publish the closed candle
+REVIEW_INTERVAL = 3600  # 1 hour
+SENTIMENT_INTERVAL = UPDATE_INTERVAL * 2
+CLOCK_SYNC_INTERVAL = 3600
+
+# Market breadth sentiment, from one bulk 24h ticker snapshot of every USDT pair.
+# BULLISH/BEARISH needs the volume-weighted change beyond the threshold (in %) and at least
+# BREADTH_ADVANCE_THRESHOLD of pairs moving the same way. A reading older than
+# BREADTH_MAX_STALE (refreshes failing) counts as NEUTRAL, so it can no longer block signals.
+BREADTH_TTL = SENTIMENT_INTERVAL
+BREADTH_MAX_STALE = SENTIMENT_INTERVAL * 3
+BREADTH_MIN_QUOTE_VOLUME = 100_000  # ignore illiquid pairs (24h USDT volume)
+BREADTH_CHANGE_THRESHOLD = 2.0
+BREADTH_ADVANCE_THRESHOLD = 0.6
+
+# News feeds (comma-separated RSS/Atom/JSON URLs or local files; .jsonl files are tailed).
+# Headlines are tagged with the symbols they mention and scored with a keyword list; the
+# per-symbol score decays with NEWS_HALF_LIFE. A signal against a symbol's news is blocked
+# once the score passes NEWS_BLOCK_THRESHOLD with at least NEWS_MIN_MENTIONS recent mentions.
+NEWS_FEEDS = [f.strip() for f in os.environ.get("NEWS_FEEDS", "").split(",") if f.strip()]
+NEWS_POLL_INTERVAL = 60
+NEWS_HALF_LIFE = 3600
+NEWS_MAX_AGE = 6 * 3600
+NEWS_BLOCK_THRESHOLD = 0.5
+NEWS_MIN_MENTIONS = 2
+
+# Analyses kept in memory (LRU), each valid until its symbol's next candle close
+ANALYSIS_CACHE_SIZE = 2000
+
+# Warm-start snapshot (candle buffers, analyses, last signals, sentiment), written after every cycle.
+# Ignored when older than SNAPSHOT_MAX_AGE or when its last closes differ from live prices by more
+# than SNAPSHOT_PRICE_TOLERANCE. Put it on a persistent volume to survive redeploys.
+SNAPSHOT_FILE = os.environ.get("SNAPSHOT_FILE", "bot_state.snapshot")
+SNAPSHOT_MAX_AGE = 6 * 3600
+SNAPSHOT_PRICE_TOLERANCE = 0.05
+
+# Cycle recorder (BOT_RECORDER=1): each cycle's candles, 24h change, analyses and signals are appended
+# to gzip segments in RECORDER_DIR for `python recorder.py list|replay`. Only the newest
+# RECORDER_MAX_SEGMENTS segments are kept.
+RECORDER_ENABLED = os.environ.get("BOT_RECORDER", "") not in ("", "0")
+RECORDER_DIR = os.environ.get("RECORDER_DIR", "recordings")
+RECORDER_SEGMENT_BYTES = 32 * 1024 * 1024
+RECORDER_MAX_SEGMENTS = 50
+RECORDER_FLUSH_INTERVAL = 5  # seconds between writes
+
+# Trade journal (SQLite) - resolved trades move to the archive table after this many seconds
+TRADE_JOURNAL_FILE = os.environ.get("TRADE_JOURNAL_FILE", "trade_journal.db")
+JOURNAL_ARCHIVE_AFTER = 7 * 86400
+# Trades still in progress at review are checked again this much later, and expire (and so
+# get archived) once this old
+TRADE_RECHECK_AFTER = 6 * 3600
+TRADE_MAX_AGE = 3 * 86400
+
+# Worker processes for analysis; symbols are sharded across them by consistent hashing.
+# 0 or 1 = analyse in the main process, "auto" = one per CPU core
+_workers = os.environ.get("WORKERS", "0")
+WORKERS = (os.cpu_count() or 1) if _workers == "auto" else int(_workers)
+SHARD_CYCLE_TIMEOUT = 120  # seconds to wait for workers before finishing a cycle without them
+
+# Cycle deadline: analysis stops CYCLE_DEADLINE_MARGIN seconds before the next cycle is due (or after
+# CYCLE_DEADLINE seconds, if set and sooner) and the cycle goes on with the symbols finished by then.
+# Symbols are analysed CYCLE_WORKERS at a time, and the ones left out go first next cycle.
+CYCLE_DEADLINE = float(os.environ.get("CYCLE_DEADLINE", "0"))
+CYCLE_DEADLINE_MARGIN = 5
+CYCLE_WORKERS = int(os.environ.get("CYCLE_WORKERS", "8"))
+
+# Universe scanner (BOT_SCANNER=1): instead of SYMBOLS, rank every USDT pair from one bulk ticker
+# snapshot and fully analyse only the best SCANNER_TOP_K, keeping the SCANNER_TOP_N strongest signals
+SCANNER_ENABLED = os.environ.get("BOT_SCANNER", "") not in ("", "0")
+SCANNER_TOP_K = int(os.environ.get("SCANNER_TOP_K", "40"))
+SCANNER_TOP_N = int(os.environ.get("SCANNER_TOP_N", "10"))
+SCANNER_BUDGET = float(os.environ.get("SCANNER_BUDGET", "60"))  # seconds of analysis per cycle
+SCANNER_MIN_QUOTE_VOLUME = 5_000_000  # 24h USDT volume
+SCANNER_MIN_RANGE = 2.0  # 24h high-low range, % of price
+SCANNER_WEIGHTS = (1.0, 1.0, 0.5)  # volume, range, |change| in the prefilter score
+
+# Prometheus metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics), port 0 disables it
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+
+# Print how long each start-up phase took (BOT_STARTUP_REPORT=1); `python startup.py` reports import times
+STARTUP_REPORT = os.environ.get("BOT_STARTUP_REPORT", "") not in ("", "0")
+
+# On-demand profiling: SIGUSR1 (cProfile) / SIGUSR2 (sampling), or create PROFILE_FLAG_FILE
+# containing "<cycles> [cprofile|sample]". BOT_PROFILE_CYCLES profiles the first cycles after start.
+PROFILE_DIR = "profiles"
+PROFILE_FLAG_FILE = "profile.flag"
+PROFILE_CYCLES = 3
+PROFILE_ON_START = int(os.environ.get("BOT_PROFILE_CYCLES", "0"))
+PROFILE_MODE = os.environ.get("BOT_PROFILE_MODE", "cprofile")
+
 # Login Password (use env var on production)
-LOGIN_PASSWORD = os.environ.get("LOGIN_PASSWORD", "aissa2005go")
+DEFAULT_LOGIN_PASSWORD = "aissa2005go"
+LOGIN_PASSWORD = os.environ.get("LOGIN_PASSWORD", DEFAULT_LOGIN_PASSWORD)
 
-# Bybit API (optional - for test_connection.py and backtest.py)
+# Read-only JSON API (http://API_HOST:API_PORT/api/state) behind LOGIN_PASSWORD, port 0 disables it.
+# It does not start while LOGIN_PASSWORD is the default above.
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "0"))
+
+# Bybit API keys (for order execution and the account checks in test_connection.py)
 API_KEY = os.environ.get("API_KEY", "")
 API_SECRET = os.environ.get("API_SECRET", "")
 TESTNET = True
+BYBIT_TRADE_URL = os.environ.get("BYBIT_TRADE_URL",
+                                 "https://api-testnet.bybit.com" if TESTNET else "https://api.bybit.com")
+
+# Order execution: each signal opens an entry, a stop-loss and three partial take-profits on Bybit.
+# Off unless BOT_TRADING_ENABLED=1; signals are still sent to Telegram either way.
+TRADING_ENABLED = os.environ.get("BOT_TRADING_ENABLED", "") not in ("", "0")
+TRADE_RISK_USDT = float(os.environ.get("TRADE_RISK_USDT", "10"))  # loss if the stop is hit
+MAX_POSITION_USDT = float(os.environ.get("MAX_POSITION_USDT", "500"))
+ORDER_POLL_INTERVAL = 2  # seconds between fill checks
+ORDER_WORKERS = 8  # concurrent order requests
@@ -0,0 +1,369 @@
+"""
+Market data sources: one interface over Binance spot and Bybit linear REST, sharing a
+connection pool, a compact candle array format and a process-wide candle cache
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import track_request
+from deadline import current_deadline
+from scheduler import timeframe_seconds
+from startup import LazyModule
+from config import BINANCE_API_URL, BYBIT_API_URL, DATA_SOURCE, HTTP_POOL_SIZE, CANDLE_CACHE_MAX_AGE
+
+pd = LazyModule("pandas")
+
+CANDLE_DTYPE = np.dtype([
+    ('open_time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+    ('volume', 'f8'), ('close_time', 'i8'),
+])
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": "Mozilla/5.0"})
+            _session = session
+        return _session
+
+
+def _after_fork():
+    # A forked worker must not share the parent's sockets, and another thread may have held the lock
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def http_get(url, endpoint, params=None, timeout=10):
+    """GET over the shared session with per-endpoint request, error and latency metrics.
+
+    Under an active cycle deadline the timeout is capped to the time left, and once the
+    deadline has passed no request is sent at all (DeadlineExceeded).
+    """
+    deadline = current_deadline()
+    if deadline is not None:
+        timeout = deadline.timeout(timeout)
+    with track_request(endpoint) as request:
+        response = get_session().get(url, params=params, timeout=timeout)
+        if response.status_code >= 400:
+            request.error()
+        return response
+
+
+def _candles(open_times, columns, close_times):
+    candles = np.empty(len(open_times), dtype=CANDLE_DTYPE)
+    candles['open_time'] = open_times
+    for name, values in zip(PRICE_FIELDS, columns):
+        candles[name] = np.asarray(values, dtype=float)
+    candles['close_time'] = close_times
+    return candles
+
+
+def normalize_binance(rows):
+    """Binance /klines rows (oldest first) -> candle array"""
+    if not rows:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    cols = list(zip(*rows))
+    return _candles(np.asarray(cols[0], dtype=np.int64), cols[1:6], np.asarray(cols[6], dtype=np.int64))
+
+
+def normalize_bybit(rows, step_ms):
+    """Bybit /v5/market/kline rows (newest first, no close time) -> candle array, oldest first"""
+    if not rows:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    cols = list(zip(*rows[::-1]))
+    open_times = np.asarray(cols[0], dtype=np.int64)
+    return _candles(open_times, cols[1:6], open_times + step_ms - 1)
+
+
+def to_frame(candles):
+    """Candle array -> the DataFrame layout the indicators expect"""
+    return pd.DataFrame({
+        'timestamp': candles['open_time'], 'open': candles['open'], 'high': candles['high'],
+        'low': candles['low'], 'close': candles['close'], 'volume': candles['volume'],
+        'close_time': candles['close_time'],
+    })
+
+
+def from_frame(df):
+    return _candles(df['timestamp'].to_numpy(dtype=np.int64), [df[c].to_numpy() for c in PRICE_FIELDS],
+                    df['close_time'].to_numpy(dtype=np.int64))
+
+
+class CandleCache:
+    """Rolling candle buffers shared by every reader of a (venue, symbol, interval) in the process"""
+
+    def __init__(self):
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._buffers.get(key, (None, 0))
+
+    def put(self, key, candles, fetched_at=None):
+        with self._lock:
+            self._buffers[key] = (candles, time.time() if fetched_at is None else fetched_at)
+
+    def drop(self, key):
+        with self._lock:
+            self._buffers.pop(key, None)
+
+
+CANDLE_CACHE = CandleCache()
+
+
+class DataSource:
+    """Venue adapter. Subclasses implement klines, server_time, prices, ticker_24h and tickers_24h;
+    candles() and history() are built on klines()."""
+
+    name = None
+    page_limit = 1000
+
+    def __init__(self, base_url, cache=CANDLE_CACHE):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+
+    def klines(self, symbol, interval, limit=500, start=None, end=None):
+        """Candle array, oldest first, or None on error"""
+        raise NotImplementedError
+
+    def candles(self, symbol, interval, limit=300, max_age=CANDLE_CACHE_MAX_AGE):
+        """Last `limit` candles, fetching only what is new since the cached buffer.
+
+        Callers within `max_age` seconds of the last fetch share it without a request.
+        """
+        key = (self.name, symbol, interval)
+        buffer, fetched_at = self.cache.get(key)
+        if buffer is not None and len(buffer) >= limit and time.time() - fetched_at < max_age:
+            return buffer[-limit:]
+
+        if buffer is None or len(buffer) < limit:
+            return self._refetch(key, symbol, interval, limit)
+
+        step = timeframe_seconds(interval) * 1000
+        last_open = int(buffer['open_time'][-1])
+        # The last buffered candle may still have been forming, so always refetch it
+        missing = max((int(time.time() * 1000) - last_open) // step, 0) + 1
+        if missing >= limit:
+            return self._refetch(key, symbol, interval, limit)
+
+        fresh = self.klines(symbol, interval, limit=missing + 1)
+        if fresh is None or len(fresh) == 0:
+            return None
+        if fresh['open_time'][0] > last_open:
+            # Gap between the buffer and the new candles, start over
+            return self._refetch(key, symbol, interval, limit)
+
+        kept = buffer[buffer['open_time'] < fresh['open_time'][0]]
+        merged = np.concatenate([kept, fresh])[-max(limit, len(buffer)):]
+        self.cache.put(key, merged)
+        return merged[-limit:]
+
+    def _refetch(self, key, symbol, interval, limit):
+        fresh = self.klines(symbol, interval, limit=limit)
+        if fresh is None:
+            return None
+        self.cache.put(key, fresh)
+        return fresh
+
+    def seed(self, symbol, interval, candles):
+        """Prime the cache (warm start); the next candles() call refetches only what is new"""
+        # Never fetched in this process, so the buffer is not shared as fresh
+        self.cache.put((self.name, symbol, interval), candles, fetched_at=0)
+
+    def history(self, symbol, interval, bars):
+        """The last `bars` candles, paging back from now"""
+        pages = []
+        total = 0
+        end = None
+        while total < bars:
+            limit = min(bars - total, self.page_limit)
+            page = self.klines(symbol, interval, limit=limit, end=end)
+            if page is None:
+                raise Exception(f"Failed to fetch {symbol} {interval} candles from {self.name}")
+            if len(page) == 0:
+                break
+            pages.append(page)
+            total += len(page)
+            end = int(page['open_time'][0]) - 1
+            if len(page) < limit:
+                break
+        if not pages:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.concatenate(pages[::-1])[-bars:]
+
+
+class BinanceSource(DataSource):
+    name = "binance"
+
+    def klines(self, symbol, interval, limit=500, start=None, end=None):
+        params = {"symbol": symbol, "interval": interval, "limit": min(limit, self.page_limit)}
+        if start is not None:
+            params["startTime"] = start
+        if end is not None:
+            params["endTime"] = end
+        try:
+            data = http_get(f"{self.base_url}/klines", "klines", params=params, timeout=15).json()
+            if isinstance(data, dict) and 'code' in data:
+                return None
+            return normalize_binance(data)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    def server_time(self):
+        try:
+            return http_get(f"{self.base_url}/time", "time", timeout=5).json()['serverTime'] / 1000
+        except:
+            return None
+
+    def prices(self, symbols):
+        try:
+            symbols = sorted({s.upper() for s in symbols})
+            if len(symbols) == 1:
+                response = http_get(f"{self.base_url}/ticker/price", "ticker/price",
+                                    params={"symbol": symbols[0]}, timeout=10)
+                data = [response.json()]
+            else:
+                response = http_get(f"{self.base_url}/ticker/price", "ticker/price",
+                                    params={"symbols": '[' + ','.join(f'"{s}"' for s in symbols) + ']'},
+                                    timeout=10)
+                data = response.json()
+            return {item['symbol']: float(item['price']) for item in data}
+        except:
+            return {}
+
+    def ticker_24h(self, symbol):
+        try:
+            data = http_get(f"{self.base_url}/ticker/24hr", "ticker/24hr",
+                            params={"symbol": symbol}, timeout=10).json()
+            return {
+                'price_change': float(data['priceChange']),
+                'price_change_percent': float(data['priceChangePercent']),
+                'high': float(data['highPrice']),
+                'low': float(data['lowPrice']),
+                'volume': float(data['volume']),
+                'quote_volume': float(data['quoteVolume'])
+            }
+        except:
+            return None
+
+    def tickers_24h(self):
+        """Every pair's 24h ticker as {symbol, openPrice, lastPrice, highPrice, lowPrice, quoteVolume}, or None"""
+        try:
+            response = http_get(f"{self.base_url}/ticker/24hr", "ticker/24hr/all", params={"type": "MINI"}, timeout=10)
+            if response.status_code != 200:
+                print(f"Bulk ticker request failed: HTTP {response.status_code}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"Bulk ticker request failed: {e}")
+            return None
+
+
+BYBIT_INTERVALS = {"1d": "D"}
+
+
+class BybitSource(DataSource):
+    name = "bybit"
+
+    def __init__(self, base_url, category="linear", cache=CANDLE_CACHE):
+        super().__init__(base_url, cache)
+        self.category = category
+
+    def _get(self, path, endpoint, params, timeout=10):
+        data = http_get(f"{self.base_url}/v5/market/{path}", endpoint,
+                        params=dict(params, category=self.category), timeout=timeout).json()
+        if data.get('retCode') != 0:
+            raise Exception(data.get('retMsg', 'Bybit error'))
+        return data
+
+    def klines(self, symbol, interval, limit=500, start=None, end=None):
+        params = {"symbol": symbol, "interval": BYBIT_INTERVALS.get(interval, str(timeframe_seconds(interval) // 60)),
+                  "limit": min(limit, self.page_limit)}
+        if start is not None:
+            params["start"] = start
+        if end is not None:
+            params["end"] = end
+        try:
+            rows = self._get("kline", "bybit/kline", params, timeout=15)['result']['list']
+            return normalize_bybit(rows, timeframe_seconds(interval) * 1000)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    def server_time(self):
+        try:
+            return int(self._get("time", "bybit/time", {}, timeout=5)['result']['timeNano']) / 1e9
+        except:
+            return None
+
+    def _tickers(self, symbol=None):
+        params = {"symbol": symbol} if symbol else {}
+        return self._get("tickers", "bybit/tickers", params)['result']['list']
+
+    def prices(self, symbols):
+        try:
+            wanted = {s.upper() for s in symbols}
+            tickers = self._tickers(next(iter(wanted))) if len(wanted) == 1 else self._tickers()
+            return {t['symbol']: float(t['lastPrice']) for t in tickers if t['symbol'] in wanted}
+        except:
+            return {}
+
+    def ticker_24h(self, symbol):
+        try:
+            t = self._tickers(symbol)[0]
+            last, prev = float(t['lastPrice']), float(t['prevPrice24h'])
+            return {
+                'price_change': last - prev,
+                'price_change_percent': float(t['price24hPcnt']) * 100,
+                'high': float(t['highPrice24h']),
+                'low': float(t['lowPrice24h']),
+                'volume': float(t['volume24h']),
+                'quote_volume': float(t['turnover24h'])
+            }
+        except:
+            return None
+
+    def tickers_24h(self):
+        try:
+            return [{'symbol': t['symbol'], 'openPrice': t['prevPrice24h'], 'lastPrice': t['lastPrice'],
+                     'highPrice': t['highPrice24h'], 'lowPrice': t['lowPrice24h'], 'quoteVolume': t['turnover24h']}
+                    for t in self._tickers()]
+        except Exception as e:
+            print(f"Bulk ticker request failed: {e}")
+            return None
+
+
+SOURCES = {"binance": lambda: BinanceSource(BINANCE_API_URL), "bybit": lambda: BybitSource(BYBIT_API_URL)}
+_instances = {}
+
+
+def get_source(name=None):
+    """The shared adapter for a venue (DATA_SOURCE by default)"""
+    name = (name or DATA_SOURCE).lower()
+    if name not in _instances:
+        if name not in SOURCES:
+            raise ValueError(f"Unknown data source '{name}' (choose from {', '.join(SOURCES)})")
+        _instances[name] = SOURCES[name]()
+    return _instances[name]
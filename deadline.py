@@ -0,0 +1,88 @@
+"""
+Per-cycle deadlines: every market data request made while one is active times out by then,
+and per-symbol work that has not finished is left behind instead of delaying the cycle
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, limit):
+        """`limit` capped to the time left; raises DeadlineExceeded once it has passed"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"deadline of {self.seconds:.0f}s passed")
+        return min(limit, remaining)
+
+    @contextmanager
+    def active(self):
+        """Make this the deadline of the current thread's requests"""
+        previous = getattr(_local, 'deadline', None)
+        _local.deadline = self
+        try:
+            yield self
+        finally:
+            _local.deadline = previous
+
+
+def current_deadline():
+    return getattr(_local, 'deadline', None)
+
+
+def _call(deadline, func, item):
+    if deadline.expired():
+        raise DeadlineExceeded("not started before the deadline")
+    with deadline.active():
+        result = func(item)
+    if result is None and deadline.expired():
+        # Most likely a request cut short by the deadline
+        raise DeadlineExceeded("ran past the deadline")
+    return result
+
+
+def map_until(func, items, deadline, workers=8):
+    """func(item) for every item on a thread pool, until the deadline.
+
+    Returns ({item: result}, {item: future}) for the finished and the late items. A call
+    that raised counts as finished with the result None. Late calls that had not started
+    are cancelled. Running ones cannot be interrupted, but their next request fails
+    immediately and the one in flight times out at the deadline, so they end soon after.
+    """
+    items = list(items)
+    if not items:
+        return {}, {}
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(items)), thread_name_prefix="cycle")
+    futures = {pool.submit(_call, deadline, func, item): item for item in items}
+    done, pending = wait(futures, timeout=max(deadline.remaining(), 0))
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for future in done:
+        item = futures[future]
+        try:
+            results[item] = future.result()
+        except DeadlineExceeded:
+            pending.add(future)
+        except Exception as e:
+            print(f"{item} error: {e}")
+            results[item] = None
+    return results, {futures[f]: f for f in pending}
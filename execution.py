@@ -0,0 +1,452 @@
+"""
+Bracket order execution on Bybit v5 (linear): the entry, the stop-loss and three partial
+take-profits go out concurrently over one signed keep-alive session; a tracker thread
+follows the fills and moves the stop as the take-profits are hit
+"""
+
+import copy
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from data_sources import get_session
+from instrumentation import track_request, ORDER_ACK_SECONDS, ORDERS, OPEN_BRACKETS
+
+FINAL_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+TP_LEGS = ("tp1", "tp2", "tp3")
+
+
+class OrderError(Exception):
+    def __init__(self, code, message):
+        super().__init__(f"{message} (retCode {code})")
+        self.code = code
+
+
+def _decimals(step):
+    text = f"{step:.10f}".rstrip("0")
+    return len(text.split(".")[1]) if "." in text else 0
+
+
+def round_step(value, step):
+    """`value` rounded down to the exchange's qty grid, as the string the API expects"""
+    units = math.floor(value / step + 1e-9)
+    return f"{units * step:.{_decimals(step)}f}"
+
+
+def round_tick(price, tick):
+    return f"{round(price / tick) * tick:.{_decimals(tick)}f}"
+
+
+class BybitClient:
+    """Signed Bybit v5 REST calls (HMAC-SHA256) over the shared connection pool"""
+
+    def __init__(self, base_url, api_key, api_secret, recv_window=5000, clock=time.time, category="linear"):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.recv_window = str(recv_window)
+        self.clock = clock
+        self.category = category
+        self.instruments = {}
+
+    def _headers(self, payload):
+        timestamp = str(int(self.clock() * 1000))
+        signature = hmac.new(self.api_secret, (timestamp + self.api_key + self.recv_window + payload).encode(),
+                             hashlib.sha256).hexdigest()
+        return {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": self.recv_window,
+            "X-BAPI-SIGN": signature,
+        }
+
+    def _result(self, response, request):
+        try:
+            data = response.json()
+        except ValueError:
+            request.error()
+            raise OrderError(response.status_code, f"HTTP {response.status_code}")
+        if data.get('retCode') != 0:
+            request.error()
+            raise OrderError(data.get('retCode'), data.get('retMsg', 'Bybit error'))
+        return data['result']
+
+    def get(self, path, params, endpoint):
+        query = urlencode(dict(params, category=self.category))
+        with track_request(endpoint) as request:
+            response = get_session().get(f"{self.base_url}{path}?{query}", headers=self._headers(query), timeout=10)
+            return self._result(response, request)
+
+    def post(self, path, body, endpoint):
+        payload = json.dumps(dict(body, category=self.category), separators=(',', ':'))
+        headers = dict(self._headers(payload), **{"Content-Type": "application/json"})
+        with track_request(endpoint) as request:
+            response = get_session().post(f"{self.base_url}{path}", data=payload, headers=headers, timeout=10)
+            return self._result(response, request)
+
+    def load_instruments(self):
+        """Qty step, minimum qty and tick size for every linear contract (one request per 1000)"""
+        cursor = ""
+        while True:
+            params = {"limit": 1000, "cursor": cursor} if cursor else {"limit": 1000}
+            result = self.get("/v5/market/instruments-info", params, "bybit/instruments")
+            for item in result['list']:
+                self.instruments[item['symbol']] = {
+                    'qty_step': float(item['lotSizeFilter']['qtyStep']),
+                    'min_qty': float(item['lotSizeFilter']['minOrderQty']),
+                    'tick': float(item['priceFilter']['tickSize']),
+                }
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                return self.instruments
+
+    def instrument(self, symbol):
+        if symbol not in self.instruments:
+            self.load_instruments()
+        return self.instruments[symbol]
+
+    def create_order(self, order):
+        return self.post("/v5/order/create", order, "bybit/order/create")
+
+    def amend_order(self, symbol, link_id, **changes):
+        return self.post("/v5/order/amend", dict(changes, symbol=symbol, orderLinkId=link_id), "bybit/order/amend")
+
+    def cancel_order(self, symbol, link_id):
+        return self.post("/v5/order/cancel", {"symbol": symbol, "orderLinkId": link_id}, "bybit/order/cancel")
+
+    def open_orders(self, symbol):
+        """Active and untriggered orders for a symbol, {orderLinkId: order}"""
+        orders = self.get("/v5/order/realtime", {"symbol": symbol, "limit": 50}, "bybit/order/realtime")['list']
+        return {o['orderLinkId']: o for o in orders}
+
+    def order(self, symbol, link_id):
+        """One order by link id, including recently closed ones"""
+        orders = self.get("/v5/order/realtime", {"symbol": symbol, "orderLinkId": link_id},
+                          "bybit/order/realtime")['list']
+        return orders[0] if orders else None
+
+
+def order_ladder(signal_type, price, sl_tp):
+    """The partials with their targets in the order price reaches them, or None if the stop or
+    a target is not on its side of the entry or two targets coincide.
+
+    A target clamped to a nearby level can come before the earlier ones; it takes over the
+    first slot, so the first target hit still moves the stop to breakeven and the last one
+    closes the position.
+    """
+    direction = 1 if signal_type == "BUY" else -1
+    targets = sorted((p['target'] for p in sl_tp['partials']), key=lambda t: t * direction)
+    if (sl_tp['sl'] - price) * direction >= 0 or (targets[0] - price) * direction <= 0 \
+            or any(a == b for a, b in zip(targets, targets[1:])):
+        return None
+    return [dict(p, target=t) for p, t in zip(sl_tp['partials'], targets)]
+
+
+def build_legs(bracket_id, symbol, signal_type, qty, sl_tp, instrument):
+    """Order bodies for the entry, stop and take-profits, {leg: order}.
+
+    The protective legs are reduce-only conditional market orders, so the exchange accepts
+    them before the entry has filled and all five can be sent at the same time.
+    """
+    side, exit_side = ("Buy", "Sell") if signal_type == "BUY" else ("Sell", "Buy")
+    # triggerDirection: 1 = when price rises to the trigger, 2 = when it falls to it
+    profit_direction, loss_direction = (1, 2) if signal_type == "BUY" else (2, 1)
+    step, tick = instrument['qty_step'], instrument['tick']
+
+    legs = {
+        'entry': {"symbol": symbol, "side": side, "orderType": "Market", "qty": round_step(qty, step)},
+        'sl': {"symbol": symbol, "side": exit_side, "orderType": "Market", "qty": round_step(qty, step),
+               "triggerPrice": round_tick(sl_tp['sl'], tick), "triggerDirection": loss_direction,
+               "triggerBy": "LastPrice", "reduceOnly": True, "closeOnTrigger": True},
+    }
+    remaining = float(legs['entry']['qty'])
+    for i, (leg, partial) in enumerate(zip(TP_LEGS, sl_tp['partials'])):
+        # The last target closes whatever the earlier ones left; a partial too small for the
+        # qty step is skipped and its share stays with the later targets
+        part = remaining if i == len(TP_LEGS) - 1 else float(round_step(qty * partial['pct'] / 100, step))
+        if part <= 0:
+            continue
+        remaining -= part
+        legs[leg] = {"symbol": symbol, "side": exit_side, "orderType": "Market", "qty": round_step(part, step),
+                     "triggerPrice": round_tick(partial['target'], tick), "triggerDirection": profit_direction,
+                     "triggerBy": "LastPrice", "reduceOnly": True}
+    for leg, order in legs.items():
+        order["orderLinkId"] = f"{bracket_id}-{leg}"
+    return legs
+
+
+class BracketExecutor:
+    """Opens bracket positions from signals and manages them until they are flat"""
+
+    def __init__(self, client, risk_usdt, max_position_usdt, poll_interval=2, workers=8, notify=None):
+        self.client = client
+        self.risk_usdt = risk_usdt
+        self.max_position_usdt = max_position_usdt
+        self.poll_interval = poll_interval
+        self.notify = notify or (lambda text: None)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self.brackets = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        try:
+            self.client.load_instruments()
+        except Exception as e:
+            print(f"Could not load instrument filters: {e}")
+        self._thread = threading.Thread(target=self._track, name="order-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.pool.shutdown(wait=True)
+
+    def position_size(self, price, sl, instrument):
+        """Qty that loses `risk_usdt` at the stop, capped at `max_position_usdt`; None if below the minimum"""
+        risk = abs(price - sl)
+        if risk <= 0:
+            return None
+        qty = float(round_step(min(self.risk_usdt / risk, self.max_position_usdt / price), instrument['qty_step']))
+        return qty if qty >= instrument['min_qty'] else None
+
+    def open_bracket(self, symbol, signal_type, price, sl_tp, signalled_at=None):
+        """Send all five legs at once and return the bracket id without waiting for the acks"""
+        signalled_at = time.perf_counter() if signalled_at is None else signalled_at
+        try:
+            instrument = self.client.instrument(symbol)
+        except Exception as e:
+            print(f"Not trading {symbol}: {e}")
+            return None
+        qty = self.position_size(price, sl_tp['sl'], instrument)
+        if qty is None:
+            print(f"Not trading {symbol}: position below the minimum order size")
+            return None
+        partials = order_ladder(signal_type, price, sl_tp)
+        if partials is None:
+            print(f"Not trading {symbol}: stop or targets on the wrong side of ${price:,.4f}")
+            return None
+        sl_tp = dict(sl_tp, partials=partials)
+
+        bracket_id = uuid.uuid4().hex[:12]
+        legs = build_legs(bracket_id, symbol, signal_type, qty, sl_tp, instrument)
+        bracket = {
+            'id': bracket_id, 'symbol': symbol, 'type': signal_type, 'qty': qty, 'remaining': qty,
+            'entry_price': price, 'sl': sl_tp['sl'], 'targets': [p['target'] for p in sl_tp['partials']],
+            'actions': [p['action'] for p in sl_tp['partials']],
+            'state': 'submitting', 'created': time.time(), 'ack_seconds': {},
+            'legs': {leg: {'link_id': o['orderLinkId'], 'qty': float(o['qty']), 'status': 'Submitting'}
+                     for leg, o in legs.items()},
+        }
+        with self._lock:
+            self.brackets[bracket_id] = bracket
+            OPEN_BRACKETS.set(len(self.brackets))
+        for leg, order in legs.items():
+            self.pool.submit(self._place, bracket, leg, order, signalled_at)
+        return bracket_id
+
+    def _place(self, bracket, leg, order, signalled_at):
+        kind = 'entry' if leg == 'entry' else 'sl' if leg == 'sl' else 'tp'
+        try:
+            self.client.create_order(order)
+            status = 'New'
+        except OrderError as e:
+            status = 'Rejected'
+            print(f"{bracket['symbol']} {leg} order rejected: {e}")
+        except Exception as e:
+            # A timeout or reset may come after the exchange accepted the order
+            status = self._lookup(bracket['symbol'], order['orderLinkId'])
+            print(f"{bracket['symbol']} {leg} order {status.lower()} after {type(e).__name__}: {e}")
+        ORDERS.inc((kind, {'New': 'accepted', 'Rejected': 'rejected'}.get(status, 'unknown')))
+        elapsed = time.perf_counter() - signalled_at
+        ORDER_ACK_SECONDS.observe(elapsed, (kind,))
+
+        with self._lock:
+            bracket['ack_seconds'][leg] = elapsed
+            bracket['legs'][leg]['status'] = status
+            if any(l['status'] == 'Submitting' for l in bracket['legs'].values()):
+                return
+            entry = bracket['legs']['entry']['status']
+            stop = bracket['legs']['sl']['status']
+            bracket['state'] = 'open' if entry == stop == 'New' else 'failed'
+
+        if bracket['state'] == 'failed':
+            self._unwind(bracket, entry, "stop-loss was rejected")
+        else:
+            slowest = max(bracket['ack_seconds'].values())
+            print(f"Bracket {bracket['id']} {bracket['type']} {bracket['symbol']} x{bracket['qty']} "
+                  f"acknowledged in {slowest * 1000:.0f} ms")
+
+    def _unwind(self, bracket, entry, reason):
+        # Never leave a position without a stop, or stops without a position. An entry
+        # in an unknown state may have filled; closing is reduce-only, so it is harmless if not
+        if entry != 'Rejected':
+            self._market_close(bracket, reason)
+        self._cancel_legs(bracket, exclude=('entry',))
+        self.notify(f"⚠️ <b>{bracket['symbol']}</b> bracket failed, nothing left open")
+
+    def _lookup(self, symbol, link_id):
+        """'New' if the exchange has the order, 'Rejected' if it does not, 'Unknown' if it cannot tell"""
+        try:
+            order = self.client.order(symbol, link_id)
+        except Exception as e:
+            print(f"Order lookup for {link_id} failed: {e}")
+            return 'Unknown'
+        return 'Rejected' if order is None or order['orderStatus'] == 'Rejected' else 'New'
+
+    def _market_close(self, bracket, reason):
+        side = "Sell" if bracket['type'] == "BUY" else "Buy"
+        try:
+            step = self.client.instrument(bracket['symbol'])['qty_step']
+            self.client.create_order({"symbol": bracket['symbol'], "side": side, "orderType": "Market",
+                                      "qty": round_step(bracket['remaining'], step), "reduceOnly": True,
+                                      "orderLinkId": f"{bracket['id']}-close"})
+            print(f"Closed {bracket['symbol']} bracket {bracket['id']}: {reason}")
+        except Exception as e:
+            print(f"Could not close {bracket['symbol']} bracket {bracket['id']}: {e}")
+
+    def _cancel_legs(self, bracket, exclude=()):
+        for leg, info in bracket['legs'].items():
+            if leg in exclude or info['status'] in FINAL_STATUSES:
+                continue
+            try:
+                self.client.cancel_order(bracket['symbol'], info['link_id'])
+                with self._lock:
+                    info['status'] = 'Cancelled'
+            except Exception as e:
+                print(f"Could not cancel {bracket['symbol']} {leg}: {e}")
+
+    def _move_stop(self, bracket, price, reason=None):
+        """Move the stop to `price` and size it to the remaining qty; without a reason only the size changes"""
+        info = bracket['legs']['sl']
+        if info['status'] in FINAL_STATUSES:
+            return
+        instrument = self.client.instrument(bracket['symbol'])
+        try:
+            self.client.amend_order(bracket['symbol'], info['link_id'],
+                                    triggerPrice=round_tick(price, instrument['tick']),
+                                    qty=round_step(bracket['remaining'], instrument['qty_step']))
+            with self._lock:
+                info['qty'] = bracket['remaining']
+                bracket['sl'] = price
+            if reason:
+                self.notify(f"🛡️ <b>{bracket['symbol']}</b> stop moved to ${price:,.4f} ({reason})")
+        except Exception as e:
+            print(f"Could not move {bracket['symbol']} stop: {e}")
+
+    def _on_filled(self, bracket, leg, order):
+        """Apply the partial's action when a leg fills"""
+        price = float(order.get('avgPrice') or 0) or None
+        if leg == 'entry':
+            with self._lock:
+                bracket['entry_price'] = price or bracket['entry_price']
+            return
+        if leg == 'sl':
+            self._cancel_legs(bracket)
+            with self._lock:
+                bracket['remaining'] = 0
+                bracket['state'] = 'stopped'
+            self.notify(f"❌ <b>{bracket['symbol']}</b> stop-loss filled at ${price or bracket['sl']:,.4f}")
+            return
+
+        i = TP_LEGS.index(leg)
+        with self._lock:
+            bracket['remaining'] = max(bracket['remaining'] - bracket['legs'][leg]['qty'], 0)
+        self.notify(f"✅ <b>{bracket['symbol']}</b> TP{i + 1} filled at ${price or bracket['targets'][i]:,.4f}")
+        action = bracket['actions'][i]
+        if bracket['remaining'] <= 0:
+            self._cancel_legs(bracket)
+            with self._lock:
+                bracket['state'] = 'closed'
+        elif action == 'close_all':
+            # The earlier targets have not filled (or were cancelled); the stop keeps guarding the rest
+            self._move_stop(bracket, bracket['sl'])
+        elif action == 'move_sl_to_breakeven':
+            self._move_stop(bracket, bracket['entry_price'], "breakeven")
+        elif action == 'trail_stop':
+            self._move_stop(bracket, bracket['targets'][i - 1] if i else bracket['entry_price'], "trailing")
+
+    def poll(self):
+        """Fetch the state of every open bracket's orders (one request per symbol) and react to fills"""
+        with self._lock:
+            live = [b for b in self.brackets.values() if b['state'] == 'open']
+        by_symbol = {}
+        for bracket in live:
+            by_symbol.setdefault(bracket['symbol'], []).append(bracket)
+
+        for symbol, brackets in by_symbol.items():
+            try:
+                active = self.client.open_orders(symbol)
+            except Exception as e:
+                print(f"Order poll for {symbol} failed: {e}")
+                continue
+            for bracket in brackets:
+                for leg, info in bracket['legs'].items():
+                    if bracket['state'] != 'open':
+                        break
+                    if info['status'] in FINAL_STATUSES:
+                        continue
+                    order = active.get(info['link_id'])
+                    if order is None:
+                        try:
+                            order = self.client.order(symbol, info['link_id'])
+                        except Exception as e:
+                            print(f"Order lookup for {info['link_id']} failed: {e}")
+                            continue
+                    if order is None or order['orderStatus'] == info['status']:
+                        continue
+                    with self._lock:
+                        info['status'] = order['orderStatus']
+                    if info['status'] == 'Filled':
+                        self._on_filled(bracket, leg, order)
+
+        with self._lock:
+            for bracket_id in [i for i, b in self.brackets.items() if b['state'] in ('closed', 'stopped', 'failed')
+                               and time.time() - b['created'] > 86400]:
+                del self.brackets[bracket_id]
+            OPEN_BRACKETS.set(sum(1 for b in self.brackets.values() if b['state'] == 'open'))
+
+    def _track(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Order tracker error: {e}")
+
+    def state(self):
+        """Copy of the brackets still being managed, for the snapshot"""
+        with self._lock:
+            return copy.deepcopy({i: b for i, b in self.brackets.items() if b['state'] in ('open', 'submitting')})
+
+    def restore(self, brackets):
+        """Resume tracking brackets from a snapshot; the next poll catches up on missed fills.
+
+        A bracket saved while its legs were still being sent is checked against the exchange
+        first: it is only reopened when both the entry and the stop made it there.
+        """
+        for bracket_id, bracket in (brackets or {}).items():
+            if bracket['state'] == 'submitting':
+                self._reconcile(bracket)
+            with self._lock:
+                self.brackets.setdefault(bracket_id, bracket)
+
+    def _reconcile(self, bracket):
+        for leg, info in bracket['legs'].items():
+            if info['status'] == 'Submitting':
+                # 'New' even if it has filled since, so the next poll applies the fill as usual
+                info['status'] = self._lookup(bracket['symbol'], info['link_id'])
+        entry = bracket['legs']['entry']['status']
+        stop = bracket['legs']['sl']['status']
+        bracket['state'] = 'open' if entry == stop == 'New' else 'failed'
+        print(f"Restored bracket {bracket['id']} {bracket['symbol']} as {bracket['state']} "
+              f"(entry {entry.lower()}, stop {stop.lower()})")
+        if bracket['state'] == 'failed' and any(l['status'] != 'Rejected' for l in bracket['legs'].values()):
+            self._unwind(bracket, entry, "stop-loss missing after restart")
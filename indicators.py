@@ -0,0 +1,136 @@
+"""
+Indicators for many periods at once: each function takes a vector of periods and returns a
+(periods x bars) matrix, NaN until a period has enough bars
+"""
+
+import numpy as np
+
+BLOCK = 64  # bars per block in the recursive smoother
+CUTOFF = np.log(1e-18)
+
+
+def _periods(periods):
+    periods = np.atleast_1d(np.asarray(periods, dtype=np.int64))
+    if periods.ndim != 1 or len(periods) == 0 or periods.min() < 1:
+        raise ValueError("periods must be a non-empty list of positive integers")
+    return periods
+
+
+def _smooth(values, alphas, starts, seeds):
+    """Exponential smoothing y[t] = (1 - a) * y[t-1] + a * x[t] for several alphas at once.
+
+    Row r starts at bar starts[r] with the value seeds[r]; earlier bars are NaN. The
+    recursion runs for every row from zero over blocks of BLOCK bars: within a block it is
+    one matrix product with the decay kernel, and only the block carries are sequential.
+    The zero start is then corrected with seed - raw[start], decayed forward, which only
+    ever shrinks, so the result matches the bar-by-bar recursion to rounding.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    rows = len(alphas)
+    if n == 0:
+        return np.full((rows, 0), np.nan)
+
+    alphas = np.asarray(alphas, dtype=float)
+    decay = 1.0 - alphas
+    blocks = -(-n // BLOCK)
+    padded = np.zeros(blocks * BLOCK)
+    padded[:n] = values
+
+    steps = np.arange(BLOCK)
+    lag = steps[:, None] - steps[None, :]
+    # kernel[r, j, i] = a * (1 - a) ** (j - i) for i <= j
+    kernel = np.where(lag >= 0, alphas[:, None, None] * np.power(decay[:, None, None], np.maximum(lag, 0)), 0.0)
+    # (rows, BLOCK, BLOCK) @ (BLOCK, blocks) -> (rows, BLOCK, blocks), one BLAS call per row
+    raw = np.matmul(kernel, padded.reshape(blocks, BLOCK).T)
+
+    carry_decay = np.power(decay[:, None], steps + 1)
+    carry = np.zeros(rows)
+    for b in range(blocks):
+        raw[:, :, b] += carry_decay * carry[:, None]
+        carry = raw[:, -1, b]
+    out = raw.transpose(0, 2, 1).reshape(rows, -1)[:, :n]
+    with np.errstate(divide='ignore'):
+        log_decay = np.log(decay)
+    for r in range(rows):
+        start = int(starts[r])
+        if start >= n:
+            out[r] = np.nan
+            continue
+        # Past `span` bars the decayed correction is below float64 resolution
+        span = min(n - start, max(1, int(np.ceil(CUTOFF / log_decay[r]))))
+        # np.power rather than exp(k * log_decay): period 1 has decay 0, and 0 ** 0 is 1
+        out[r, start:start + span] += np.power(decay[r], np.arange(span)) * (seeds[r] - out[r, start])
+        out[r, :start] = np.nan
+    return out
+
+
+def _window_means(values, periods):
+    """Mean of the first `p` values for each period p (NaN when there are fewer), from one cumulative sum"""
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    return np.array([cumulative[p] / p if p <= len(values) else np.nan for p in periods])
+
+
+def wilder_matrix(values, periods):
+    """Wilder's moving average (alpha = 1/p), seeded with the simple mean of the first p values"""
+    values = np.asarray(values, dtype=float)
+    periods = _periods(periods)
+    return _smooth(values, 1.0 / periods, periods - 1, _window_means(values, periods))
+
+
+def sma_matrix(values, periods):
+    """Simple moving averages from one shared cumulative sum"""
+    values = np.asarray(values, dtype=float)
+    periods = _periods(periods)
+    n = len(values)
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    out = np.full((len(periods), n), np.nan)
+    for r, p in enumerate(periods):
+        if p <= n:
+            out[r, p - 1:] = (cumulative[p:] - cumulative[:-p]) / p
+    return out
+
+
+def ema_matrix(values, periods):
+    """Exponential moving averages (alpha = 2/(p+1)) seeded with the first value, like
+    pandas ewm(span=p, adjust=False) and MarketReader.calculate_ema"""
+    values = np.asarray(values, dtype=float)
+    periods = _periods(periods)
+    if len(values) == 0:
+        return np.full((len(periods), 0), np.nan)
+    return _smooth(values, 2.0 / (periods + 1), np.zeros(len(periods)), np.full(len(periods), values[0]))
+
+
+def rsi_matrix(closes, periods):
+    """Wilder's RSI; the first p bars of each row are NaN.
+
+    The price changes, gains and losses are computed once for all periods. A window with
+    no losses reads 100, as in MarketReader.calculate_rsi.
+    """
+    closes = np.asarray(closes, dtype=float)
+    periods = _periods(periods)
+    out = np.full((len(periods), len(closes)), np.nan)
+    if len(closes) < 2:
+        return out
+
+    deltas = np.diff(closes)
+    avg_gains = wilder_matrix(np.where(deltas > 0, deltas, 0.0), periods)
+    avg_losses = wilder_matrix(np.where(deltas < 0, -deltas, 0.0), periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_losses == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gains / avg_losses))
+    out[:, 1:] = np.where(np.isnan(avg_gains), np.nan, rsi)
+    return out
+
+
+def atr_matrix(highs, lows, closes, periods):
+    """Wilder's average true range; the first p bars of each row are NaN"""
+    highs, lows, closes = (np.asarray(v, dtype=float) for v in (highs, lows, closes))
+    periods = _periods(periods)
+    out = np.full((len(periods), len(closes)), np.nan)
+    if len(closes) < 2:
+        return out
+
+    true_range = np.maximum(highs[1:] - lows[1:],
+                            np.maximum(np.abs(highs[1:] - closes[:-1]), np.abs(lows[1:] - closes[:-1])))
+    out[:, 1:] = wilder_matrix(true_range, periods)
+    return out
@@ -0,0 +1,216 @@
+"""
+Lightweight in-process metrics served in Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, labels), value) for labels, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._function = None
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, function):
+        """Evaluate `function` at scrape time instead of storing a value"""
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                return [(self.name, "", self._function())]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (+Inf last), sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        out = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(float(bound))
+                out.append((f"{self.name}_bucket",
+                            _format_labels(self.labelnames, labels, [f'le="{le}"']), cumulative))
+            out.append((f"{self.name}_sum", _format_labels(self.labelnames, labels), total))
+            out.append((f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("bot_stage_seconds", "Time spent in each pipeline stage", ("stage",))
+REQUESTS = REGISTRY.counter("bot_http_requests_total", "Outbound HTTP requests", ("endpoint",))
+REQUEST_ERRORS = REGISTRY.counter("bot_http_request_errors_total", "Failed outbound HTTP requests", ("endpoint",))
+REQUEST_SECONDS = REGISTRY.histogram("bot_http_request_seconds", "Outbound HTTP request latency", ("endpoint",))
+CYCLE_SECONDS = REGISTRY.histogram("bot_cycle_seconds", "Duration of a full analysis cycle")
+CYCLE_LAG = REGISTRY.gauge("bot_cycle_lag_seconds", "Seconds from candle close to the end of the last cycle")
+CYCLES = REGISTRY.counter("bot_cycles_total", "Completed analysis cycles")
+SIGNALS = REGISTRY.counter("bot_signals_total", "Signals sent", ("signal",))
+TELEGRAM_QUEUE = REGISTRY.gauge("bot_telegram_queue_depth", "Telegram messages waiting to be delivered")
+ORDERS = REGISTRY.counter("bot_orders_total", "Orders sent, by bracket leg and outcome", ("leg", "status"))
+ORDER_ACK_SECONDS = REGISTRY.histogram("bot_order_ack_seconds", "Signal-to-acknowledgement latency per bracket leg",
+                                       ("leg",))
+CYCLE_OVERRUNS = REGISTRY.counter("bot_cycle_overruns_total", "Cycles that reached their deadline with symbols left")
+LATE_SYMBOLS = REGISTRY.counter("bot_late_symbols_total", "Symbols left out of a cycle by its deadline")
+API_REQUESTS = REGISTRY.counter("bot_api_requests_total", "Read API requests by route and status",
+                                ("route", "status"))
+OPEN_BRACKETS = REGISTRY.gauge("bot_open_brackets", "Bracket positions being managed")
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, (stage,))
+
+
+class _RequestTracker:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.failed = False
+
+    def error(self):
+        if not self.failed:
+            self.failed = True
+            REQUEST_ERRORS.inc((self.endpoint,))
+
+
+@contextmanager
+def track_request(endpoint):
+    """Count and time one request; exceptions and tracker.error() count as failures"""
+    tracker = _RequestTracker(endpoint)
+    REQUESTS.inc((endpoint,))
+    start = time.perf_counter()
+    try:
+        yield tracker
+    except Exception:
+        tracker.error()
+        raise
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, (endpoint,))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host="127.0.0.1", port=9108):
+    """Serve /metrics from a background thread; None (and the bot carries on) if the port is taken"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrics server not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics on http://{host}:{port}/metrics")
+    return server
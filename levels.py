@@ -0,0 +1,173 @@
+"""
+Incremental support/resistance index: swing pivots from closed candles, clustered into
+volume-weighted price levels kept in sorted order for bisect lookups
+"""
+
+import bisect
+from collections import deque
+
+
+class Level:
+    """A cluster of pivots within the index tolerance of each other"""
+
+    __slots__ = ('price', 'volume', 'touches', 'last_time', '_pv', '_sum')
+
+    def __init__(self):
+        self.price = 0.0
+        self.volume = 0.0
+        self.touches = 0
+        self.last_time = 0
+        self._pv = 0.0
+        self._sum = 0.0
+
+    def add(self, price, volume, time):
+        self._pv += price * volume
+        self._sum += price
+        self.volume += volume
+        self.touches += 1
+        self.last_time = max(self.last_time, time)
+        self._reprice()
+
+    def remove(self, price, volume):
+        self._pv -= price * volume
+        self._sum -= price
+        self.volume -= volume
+        self.touches -= 1
+        self._reprice()
+
+    def absorb(self, other):
+        self._pv += other._pv
+        self._sum += other._sum
+        self.volume += other.volume
+        self.touches += other.touches
+        self.last_time = max(self.last_time, other.last_time)
+        self._reprice()
+
+    def _reprice(self):
+        if self.touches <= 0:
+            return
+        # Volume-weighted; a level whose pivots all had zero volume falls back to the plain mean
+        self.price = self._pv / self.volume if self.volume > 0 else self._sum / self.touches
+
+    def __repr__(self):
+        return f"Level({self.price:.6g}, touches={self.touches}, volume={self.volume:.6g})"
+
+
+class LevelIndex:
+    """Support/resistance levels of one symbol, updated one closed candle at a time.
+
+    A bar is a swing high (low) when its high (low) is above (below) the `pivot_bars`
+    bars before it and not exceeded by the `pivot_bars` bars after it, so a pivot is
+    confirmed `pivot_bars` candles after it formed. Each pivot joins the nearest level
+    within `tolerance_pct` of its price or starts a new one. Only the newest
+    `max_pivots` pivots count; older ones are taken back out of their levels. Level
+    prices are kept sorted, so the nearest support or resistance is a bisect away.
+    """
+
+    def __init__(self, pivot_bars=3, tolerance_pct=0.3, max_pivots=200):
+        self.pivot_bars = pivot_bars
+        self.tolerance = tolerance_pct / 100
+        self.max_pivots = max_pivots
+        self.last_time = None
+        self._window = deque(maxlen=2 * pivot_bars + 1)
+        self._pivots = deque()  # (time, price, volume, level), oldest first
+        self._prices = []
+        self._levels = []
+
+    def __len__(self):
+        return len(self._levels)
+
+    def levels(self):
+        """All levels, lowest price first"""
+        return list(self._levels)
+
+    def update(self, open_times, highs, lows, volumes):
+        """Feed closed candles (oldest first); candles at or before the last one seen are skipped"""
+        for t, high, low, volume in zip(open_times, highs, lows, volumes):
+            t = int(t)
+            if self.last_time is not None and t <= self.last_time:
+                continue
+            self.last_time = t
+            self._window.append((t, float(high), float(low), float(volume)))
+            if len(self._window) == self._window.maxlen:
+                self._check_pivot()
+
+    def _check_pivot(self):
+        bars = self._window
+        n = self.pivot_bars
+        t, high, low, volume = bars[n]
+        before = [bars[i] for i in range(n)]
+        after = [bars[i] for i in range(n + 1, len(bars))]
+        if all(high > b[1] for b in before) and all(high >= b[1] for b in after):
+            self._add_pivot(t, high, volume)
+        if all(low < b[2] for b in before) and all(low <= b[2] for b in after):
+            self._add_pivot(t, low, volume)
+
+    def _add_pivot(self, time, price, volume):
+        level = self._nearest(price)
+        if level is None or abs(level.price - price) > price * self.tolerance:
+            level = Level()
+            level.add(price, volume, time)
+            self._insert(level)
+        else:
+            self._delete(level)
+            level.add(price, volume, time)
+            self._insert(level)
+            self._merge_neighbours(level)
+        self._pivots.append((time, price, volume, level))
+
+        while len(self._pivots) > self.max_pivots:
+            _, old_price, old_volume, old_level = self._pivots.popleft()
+            self._delete(old_level)
+            old_level.remove(old_price, old_volume)
+            if old_level.touches > 0:
+                self._insert(old_level)
+                self._merge_neighbours(old_level)
+
+    def _nearest(self, price):
+        i = bisect.bisect_left(self._prices, price)
+        candidates = [self._levels[j] for j in (i - 1, i) if 0 <= j < len(self._levels)]
+        return min(candidates, key=lambda level: abs(level.price - price)) if candidates else None
+
+    def _insert(self, level):
+        i = bisect.bisect_right(self._prices, level.price)
+        self._prices.insert(i, level.price)
+        self._levels.insert(i, level)
+
+    def _delete(self, level):
+        i = bisect.bisect_left(self._prices, level.price)
+        while self._levels[i] is not level:
+            i += 1
+        del self._prices[i]
+        del self._levels[i]
+
+    def _merge_neighbours(self, level):
+        """A level whose price moved may now sit within tolerance of a neighbour"""
+        while True:
+            i = bisect.bisect_left(self._prices, level.price)
+            while self._levels[i] is not level:
+                i += 1
+            close = [self._levels[j] for j in (i - 1, i + 1) if 0 <= j < len(self._levels)
+                     and abs(self._levels[j].price - level.price) <= level.price * self.tolerance]
+            if not close:
+                return
+            other = close[0]
+            self._delete(level)
+            self._delete(other)
+            level.absorb(other)
+            self._pivots = deque((t, p, v, level if lv is other else lv) for t, p, v, lv in self._pivots)
+            self._insert(level)
+
+    def support(self, price, min_touches=1):
+        """Nearest level at or below `price` with at least `min_touches` pivots, or None"""
+        i = bisect.bisect_right(self._prices, price) - 1
+        while i >= 0 and self._levels[i].touches < min_touches:
+            i -= 1
+        return self._levels[i] if i >= 0 else None
+
+    def resistance(self, price, min_touches=1):
+        """Nearest level above `price` with at least `min_touches` pivots, or None"""
+        i = bisect.bisect_right(self._prices, price)
+        while i < len(self._levels) and self._levels[i].touches < min_touches:
+            i += 1
+        return self._levels[i] if i < len(self._levels) else None
@@ -0,0 +1,172 @@
+"""
+Load test: SignalBot cycle time against symbol count, run against mock_exchange.py
+
+    python load_test.py --symbols 10,50,200,500 --cycles 3 --latency 0.05
+    python load_test.py --symbols 100,1000 --workers 4 --error-rate 0.02 --output load.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args, symbols):
+    """Run the mock in its own process so it does not compete with the bot for the GIL"""
+    port = free_port()
+    command = [sys.executable, os.path.join(HERE, "mock_exchange.py"), "--port", str(port),
+               "--symbols", str(symbols), "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--error-rate", str(args.error_rate), "--rate-limit", str(args.rate_limit),
+               "--weight-limit", str(args.weight_limit)]
+    if args.data:
+        command += ["--data", args.data]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{url}/api/v3/time", timeout=1)
+            return process, url
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("mock exchange did not start")
+
+
+def mock_stats(url):
+    return requests.get(f"{url}/_stats", timeout=5).json()
+
+
+def run_case(symbols, args, url):
+    """Cycle times for one symbol count, from a fresh working directory so that no snapshot,
+    journal or outbox carries over from the previous case"""
+    import bybit_rsi_bot
+    from analysis_cache import AnalysisCache
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    bybit_rsi_bot.TRADE_JOURNAL_FILE = os.path.join(workdir, "trade_journal.db")
+    bybit_rsi_bot.TELEGRAM_OUTBOX_FILE = os.path.join(workdir, "telegram_outbox.jsonl")
+    bybit_rsi_bot.SNAPSHOT_FILE = os.path.join(workdir, "bot_state.snapshot")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if args.workers > 1:
+            from sharding import ShardedSignalBot
+            bot = ShardedSignalBot(args.workers, symbols)
+        else:
+            bot = bybit_rsi_bot.SignalBot(symbols)
+    finally:
+        os.chdir(cwd)
+
+    before = mock_stats(url)
+    durations = []
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        for i in range(args.cycles):
+            # Warm cycles would otherwise be served whole from the analysis cache; with it
+            # empty they measure the incremental candle fetch plus the analysis
+            bot.analysis_cache = AnalysisCache(bot.analysis_cache.max_entries)
+            start = time.perf_counter()
+            with output:
+                bot.check_signals()
+            durations.append(time.perf_counter() - start)
+            print(f"  cycle {i + 1}: {durations[-1]:.2f}s")
+    finally:
+        after = mock_stats(url)
+        bot.telegram.close(timeout=5)
+        bot.journal.close()
+        if args.workers > 1:
+            bot.shutdown()
+
+    requests_made = sum(after['requests'].values()) - sum(before['requests'].values())
+    errors = sum(v for k, v in after['statuses'].items() if int(k) >= 400) - \
+        sum(v for k, v in before['statuses'].items() if int(k) >= 400)
+    warm = durations[1:] or durations
+    analysed = sum(1 for a in bot.cached_data.values() if a)
+    return {
+        'symbols': len(symbols),
+        'cold_seconds': durations[0],
+        'warm_seconds': statistics.median(warm),
+        'warm_ms_per_symbol': statistics.median(warm) / len(symbols) * 1000,
+        'requests_per_cycle': requests_made / len(durations),
+        'errors': errors,
+        'analysed': analysed,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure SignalBot cycle time against symbol count")
+    parser.add_argument("--symbols", type=lambda s: [int(x) for x in s.split(",")], default=[10, 50, 100, 200],
+                        help="comma-separated symbol counts (default: 10,50,100,200)")
+    parser.add_argument("--cycles", type=int, default=3, help="cycles per symbol count; the first is cold")
+    parser.add_argument("--workers", type=int, default=0, help="use ShardedSignalBot with this many workers")
+    parser.add_argument("--source", choices=["binance", "bybit"], default="binance",
+                        help="which of the mock's market-data APIs the bot reads")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--weight-limit", type=int, default=1_000_000)
+    parser.add_argument("--data", metavar="DIR", help="recorded candles for the mock (see mock_exchange.py)")
+    parser.add_argument("--mock", metavar="URL", help="use an already running mock exchange")
+    parser.add_argument("--output", metavar="PATH", help="save results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own output during cycles")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, HERE)
+
+    process = None
+    if args.mock:
+        url = args.mock.rstrip("/")
+    else:
+        process, url = start_mock(args, max(args.symbols))
+
+    # Route the bot to the mock; config reads these on import. Every cycle refetches the
+    # candles that are new instead of reusing the previous cycle's buffers
+    os.environ["DATA_SOURCE"] = args.source
+    os.environ["BINANCE_API_URL"] = f"{url}/api/v3"
+    os.environ["BYBIT_API_URL"] = url
+    os.environ["TELEGRAM_API_URL"] = url
+    os.environ["CANDLE_CACHE_MAX_AGE"] = "0"
+    os.environ["METRICS_PORT"] = "0"
+
+    from mock_exchange import make_symbols
+
+    results = []
+    try:
+        for count in args.symbols:
+            print(f"\n=== {count} symbols ===")
+            results.append(run_case(make_symbols(count), args, url))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print(f"\n{'symbols':>8} {'cold s':>9} {'warm s':>9} {'ms/symbol':>10} {'req/cycle':>10} {'errors':>7} {'analysed':>9}")
+    for r in results:
+        print(f"{r['symbols']:>8} {r['cold_seconds']:>9.2f} {r['warm_seconds']:>9.2f} "
+              f"{r['warm_ms_per_symbol']:>10.1f} {r['requests_per_cycle']:>10.0f} {r['errors']:>7} {r['analysed']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency': args.latency, 'workers': args.workers, 'results': results}, f, indent=2)
+        print(f"\n💾 Results saved to '{args.output}'")
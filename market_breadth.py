@@ -0,0 +1,55 @@
+"""
+Market breadth from one bulk 24h ticker snapshot of every pair in a quote asset
+"""
+
+import numpy as np
+
+# Leveraged tokens and stablecoin pairs say nothing about the direction of the market
+EXCLUDED_SUFFIXES = ("UPUSDT", "DOWNUSDT", "BULLUSDT", "BEARUSDT")
+STABLECOINS = {"USDCUSDT", "FDUSDUSDT", "TUSDUSDT", "BUSDUSDT", "USDPUSDT", "DAIUSDT", "EURUSDT", "AEURUSDT"}
+
+
+def compute_breadth(tickers, quote="USDT", min_quote_volume=0.0):
+    """Volume-weighted change, advance/decline and dispersion across all `quote` pairs.
+
+    `tickers` holds symbol/openPrice/lastPrice/quoteVolume per pair (DataSource.tickers_24h). Returns None if no pair qualifies.
+    """
+    rows = [(t['openPrice'], t['lastPrice'], t['quoteVolume']) for t in tickers
+            if t['symbol'].endswith(quote) and t['symbol'] not in STABLECOINS
+            and not t['symbol'].endswith(EXCLUDED_SUFFIXES)]
+    if not rows:
+        return None
+
+    opens, lasts, volumes = np.array(rows, dtype=float).T
+    keep = (opens > 0) & (volumes > min_quote_volume)
+    if not keep.any():
+        return None
+    opens, lasts, volumes = opens[keep], lasts[keep], volumes[keep]
+
+    change = (lasts / opens - 1) * 100
+    weights = volumes / volumes.sum()
+    vw_change = float(weights @ change)
+    advancers = int((change > 0).sum())
+    decliners = int((change < 0).sum())
+    return {
+        'pairs': int(len(change)),
+        'vw_change': vw_change,
+        'median_change': float(np.median(change)),
+        'advancers': advancers,
+        'decliners': decliners,
+        'advance_ratio': advancers / max(advancers + decliners, 1),
+        'ad_ratio': advancers / decliners if decliners else float('inf'),
+        'dispersion': float(np.sqrt(weights @ (change - vw_change) ** 2)),
+        'quote_volume': float(volumes.sum()),
+    }
+
+
+def classify(breadth, change_threshold=2.0, advance_threshold=0.6):
+    """BULLISH/BEARISH only when the volume-weighted move and the majority of pairs agree"""
+    if not breadth:
+        return "NEUTRAL"
+    if breadth['vw_change'] > change_threshold and breadth['advance_ratio'] >= advance_threshold:
+        return "BULLISH"
+    if breadth['vw_change'] < -change_threshold and breadth['advance_ratio'] <= 1 - advance_threshold:
+        return "BEARISH"
+    return "NEUTRAL"
@@ -1,60 +1,141 @@
+import pickle
+import time
 import numpy as np
-import pandas as pd
-import requests
+from startup import LazyModule
+from instrumentation import timed
+from data_sources import get_source, to_frame, from_frame
+from levels import LevelIndex
+from config import LEVEL_PIVOT_BARS, LEVEL_TOLERANCE_PCT, LEVEL_MAX_PIVOTS, LEVEL_MIN_TOUCHES
+
+# pandas costs a few hundred ms to import; load it on first use so start-up can overlap it with network I/O
+pd = LazyModule("pandas")
+RISK_REWARD = 2.5
+
+
+def _level_column(values, n):
+    if values is None:
+        return np.full(n, np.nan)
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def calculate_sl_tp_batch(prices, signal_types, atrs=None, supports=None, resistances=None):
+    """SL/TP ladders for several signals at once.
+
+    Each position i uses its own price, ATR and support/resistance; missing levels may be
+    None. Returns one dict per signal (None when the signal type is not BUY/SELL).
+    """
+    prices = np.asarray(prices, dtype=float)
+    n = len(prices)
+    atr = _level_column(atrs, n)
+    support = _level_column(supports, n)
+    resistance = _level_column(resistances, n)
+    is_buy = np.array([t == "BUY" for t in signal_types], dtype=bool)
+    
+    with np.errstate(invalid='ignore'):
+        has_atr = np.isfinite(atr) & (atr != 0)
+        support_below = (support != 0) & (support < prices)
+        resistance_above = (resistance != 0) & (resistance > prices)
+        
+        atr_stop = np.where(has_atr, atr * 1.5, prices * 0.02)
+        capped_atr = np.minimum(atr * 1.5, prices * 0.025)
+        
+        buy_sl = np.where(support_below, np.minimum(support * 0.998, prices - atr_stop),
+                          np.where(has_atr, prices - capped_atr, prices * 0.975))
+        buy_sl = np.minimum(buy_sl, prices * 0.975)
+        
+        sell_sl = np.where(resistance_above, np.maximum(resistance * 1.002, prices + atr_stop),
+                           np.where(has_atr, prices + capped_atr, prices * 1.025))
+        sell_sl = np.maximum(sell_sl, prices * 1.025)
+        
+        sl = np.where(is_buy, buy_sl, sell_sl)
+        direction = np.where(is_buy, 1.0, -1.0)
+        risk = (prices - sl) * direction
+        
+        tp1 = prices + direction * risk * 1.0
+        tp2 = prices + direction * risk * 2.0
+        tp3 = prices + direction * risk * 2.5
+        # Clamp TP3 to the level only when it lies beyond TP2, so the ladder stays ordered
+        tp3 = np.where(is_buy & resistance_above & (resistance * 0.998 > tp2),
+                       np.minimum(tp3, resistance * 0.998), tp3)
+        tp3 = np.where(~is_buy & support_below & (support * 1.002 < tp2),
+                       np.maximum(tp3, support * 1.002), tp3)
+    
+    levels = np.column_stack([sl, tp1, tp2, tp3])
+    pcts = (levels - prices[:, None]) / prices[:, None] * 100
+    
+    results = []
+    for i, signal_type in enumerate(signal_types):
+        if signal_type not in ("BUY", "SELL"):
+            results.append(None)
+            continue
+        sl_i, tp1_i, tp2_i, tp3_i = (float(v) for v in levels[i])
+        results.append({
+            'sl': sl_i,
+            'tp1': tp1_i,
+            'tp2': tp2_i,
+            'tp3': tp3_i,
+            'sl_pct': float(pcts[i, 0]),
+            'tp1_pct': float(pcts[i, 1]),
+            'tp2_pct': float(pcts[i, 2]),
+            'tp3_pct': float(pcts[i, 3]),
+            'risk_reward': RISK_REWARD,
+            'partials': [
+                {'target': tp1_i, 'pct': 25, 'action': 'move_sl_to_breakeven'},
+                {'target': tp2_i, 'pct': 50, 'action': 'trail_stop'},
+                {'target': tp3_i, 'pct': 25, 'action': 'close_all'}
+            ]
+        })
+    return results
+
+
+def get_prices(symbols, source=None):
+    """Latest prices for several symbols in one request, {symbol: price}"""
+    return get_source(source).prices(symbols)
 
 
 class MarketReader:
-    def __init__(self, symbol="BTCUSDT", timeframe="5m"):
+    # Set while a cycle recorder is attached: analyze() then keeps a copy of the level index
+    # it started from in last_input, so the cycle can be replayed
+    record_levels = False
+    
+    def __init__(self, symbol="BTCUSDT", timeframe="5m", source=None):
         self.symbol = symbol.upper()
         self.timeframe = timeframe
-        self.base_url = "https://api.binance.com/api/v3"
+        self.source = get_source(source)
+        self.base_url = self.source.base_url
+        self.candles = None
+        self.raw_candles = None
+        self.last_input = None
+        self.levels = LevelIndex(LEVEL_PIVOT_BARS, LEVEL_TOLERANCE_PCT, LEVEL_MAX_PIVOTS)
     
-    def get_klines(self, limit=300):
-        try:
-            url = f"{self.base_url}/klines"
-            params = {"symbol": self.symbol, "interval": self.timeframe, "limit": limit}
-            response = requests.get(url, params=params, timeout=15)
-            data = response.json()
-            
-            if isinstance(data, dict) and 'code' in data:
-                return None
-            
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base', 'taker_buy_quote', 'ignore'
-            ])
-            
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
-            
-            return df
-        except Exception as e:
-            print(f"Error: {e}")
+    def get_klines(self, limit=300, start_time=None):
+        candles = self.source.klines(self.symbol, self.timeframe, limit=limit, start=start_time)
+        if candles is None:
             return None
+        return to_frame(candles)
     
-    def get_current_price(self):
-        try:
-            url = f"{self.base_url}/ticker/price"
-            response = requests.get(url, params={"symbol": self.symbol}, timeout=10)
-            return float(response.json()['price'])
-        except:
+    def refresh_candles(self, limit=300):
+        """Last `limit` candles from the source's shared buffer, which fetches only what is new"""
+        candles = self.source.candles(self.symbol, self.timeframe, limit=limit)
+        if candles is None:
             return None
+        self.raw_candles = candles
+        self.candles = to_frame(candles)
+        return self.candles
+    
+    def restore_candles(self, df):
+        """Warm start from saved candles; the next refresh fetches only the candles since"""
+        self.candles = df
+        self.source.seed(self.symbol, self.timeframe, from_frame(df))
+    
+    def get_current_price(self):
+        return self.source.prices([self.symbol]).get(self.symbol)
+    
+    def get_server_time(self):
+        return self.source.server_time()
     
     def get_24h_stats(self):
-        try:
-            url = f"{self.base_url}/ticker/24hr"
-            response = requests.get(url, params={"symbol": self.symbol}, timeout=10)
-            data = response.json()
-            return {
-                'price_change': float(data['priceChange']),
-                'price_change_percent': float(data['priceChangePercent']),
-                'high': float(data['highPrice']),
-                'low': float(data['lowPrice']),
-                'volume': float(data['volume']),
-                'quote_volume': float(data['quoteVolume'])
-            }
-        except:
-            return None
+        return self.source.ticker_24h(self.symbol)
     
     def calculate_sma(self, closes, period):
         if len(closes) < period:
@@ -168,82 +249,25 @@ class MarketReader:
         
         return support, resistance
     
+    def nearest_levels(self, price, closes, highs, lows):
+        """(support, resistance, support_touches, resistance_touches) from the nearest levels with
+        at least LEVEL_MIN_TOUCHES pivots; a side with no such level falls back to the recent
+        low/high with 0 touches"""
+        support = self.levels.support(price, LEVEL_MIN_TOUCHES)
+        resistance = self.levels.resistance(price, LEVEL_MIN_TOUCHES)
+        low, high = (None, None) if support and resistance else self.find_support_resistance(closes, highs, lows)
+        return (support.price if support else low, resistance.price if resistance else high,
+                support.touches if support else 0, resistance.touches if resistance else 0)
+    
     def calculate_sl_tp(self, price, signal_type, atr=None, support=None, resistance=None):
-        risk_reward = 2.5
-        
-        if signal_type == "BUY":
-            if support and support < price:
-                sl = min(support * 0.998, price - (atr * 1.5 if atr else price * 0.02))
-            elif atr:
-                sl = price - min(atr * 1.5, price * 0.025)
-            else:
-                sl = price * 0.975
-            
-            sl = min(sl, price * 0.975)
-            
-            risk = price - sl
-            
-            tp1 = price + risk * 1.0
-            tp2 = price + risk * 2.0
-            tp3 = price + risk * 2.5
-            
-            if resistance and resistance > price:
-                tp3 = min(tp3, resistance * 0.998)
-            
-            return {
-                'sl': sl,
-                'tp1': tp1,
-                'tp2': tp2,
-                'tp3': tp3,
-                'sl_pct': ((sl - price) / price) * 100,
-                'tp1_pct': ((tp1 - price) / price) * 100,
-                'tp2_pct': ((tp2 - price) / price) * 100,
-                'tp3_pct': ((tp3 - price) / price) * 100,
-                'risk_reward': risk_reward,
-                'partials': [
-                    {'target': tp1, 'pct': 25, 'action': 'move_sl_to_breakeven'},
-                    {'target': tp2, 'pct': 50, 'action': 'trail_stop'},
-                    {'target': tp3, 'pct': 25, 'action': 'close_all'}
-                ]
-            }
-        
-        elif signal_type == "SELL":
-            if resistance and resistance > price:
-                sl = max(resistance * 1.002, price + (atr * 1.5 if atr else price * 0.02))
-            elif atr:
-                sl = price + min(atr * 1.5, price * 0.025)
-            else:
-                sl = price * 1.025
-            
-            sl = max(sl, price * 1.025)
-            
-            risk = sl - price
-            
-            tp1 = price - risk * 1.0
-            tp2 = price - risk * 2.0
-            tp3 = price - risk * 2.5
-            
-            if support and support < price:
-                tp3 = max(tp3, support * 1.002)
-            
-            return {
-                'sl': sl,
-                'tp1': tp1,
-                'tp2': tp2,
-                'tp3': tp3,
-                'sl_pct': ((sl - price) / price) * 100,
-                'tp1_pct': ((tp1 - price) / price) * 100,
-                'tp2_pct': ((tp2 - price) / price) * 100,
-                'tp3_pct': ((tp3 - price) / price) * 100,
-                'risk_reward': risk_reward,
-                'partials': [
-                    {'target': tp1, 'pct': 25, 'action': 'move_sl_to_breakeven'},
-                    {'target': tp2, 'pct': 50, 'action': 'trail_stop'},
-                    {'target': tp3, 'pct': 25, 'action': 'close_all'}
-                ]
-            }
-        
-        return None
+        """SL/TP ladder; support and resistance default to the nearest confirmed levels in the index"""
+        if support is None:
+            level = self.levels.support(price, LEVEL_MIN_TOUCHES)
+            support = level.price if level else None
+        if resistance is None:
+            level = self.levels.resistance(price, LEVEL_MIN_TOUCHES)
+            resistance = level.price if level else None
+        return calculate_sl_tp_batch([price], [signal_type], [atr], [support], [resistance])[0]
     
     def calculate_kdj(self, highs, lows, closes, period=9):
         if len(closes) < period:
@@ -402,11 +426,44 @@ class MarketReader:
             return "low"
         return "normal"
     
-    def analyze(self):
-        df = self.get_klines(limit=300)
+    def analyze(self, change_24h=None, now=None):
+        """Indicators from the last 300 candles; pass change_24h when a bulk ticker already has it.
+        
+        The inputs behind the result are kept in last_input, so the cycle recorder can replay it.
+        """
+        now = time.time() if now is None else now
+        with timed("get_klines"):
+            df = self.refresh_candles(limit=300)
         if df is None:
             return None
         
+        # Only closed candles feed the level index (the last row may still be forming)
+        closed = df['close_time'].values < now * 1000
+        levels = pickle.dumps(self.levels, pickle.HIGHEST_PROTOCOL) if self.record_levels else None
+        with timed("levels"):
+            self.levels.update(df['timestamp'].values[closed], df['high'].values[closed],
+                               df['low'].values[closed], df['volume'].values[closed])
+        
+        with timed("indicators"):
+            analysis = self.compute_indicators(df)
+        
+        # Open time of the newest closed candle in the data
+        open_times = df['timestamp'].values[closed]
+        analysis['candle_time'] = int(open_times[-1]) if len(open_times) else int(df['timestamp'].iloc[0])
+        
+        if change_24h is None:
+            with timed("get_24h_stats"):
+                stats = self.get_24h_stats()
+            if stats:
+                change_24h = stats['price_change_percent']
+        if change_24h is not None:
+            analysis['change_24h'] = change_24h
+        
+        self.last_input = {'candles': self.raw_candles, 'change_24h': change_24h, 'now': now,
+                           'levels': levels, 'analysis': analysis}
+        return analysis
+    
+    def compute_indicators(self, df):
         closes = df['close'].values
         highs = df['high'].values
         lows = df['low'].values
@@ -414,7 +471,7 @@ class MarketReader:
         
         price = closes[-1]
         atr = self.calculate_atr(highs, lows, closes)
-        support, resistance = self.find_support_resistance(closes, highs, lows)
+        support, resistance, support_touches, resistance_touches = self.nearest_levels(price, closes, highs, lows)
         
         rsi_value = self.calculate_rsi(closes)
         
@@ -432,6 +489,8 @@ class MarketReader:
             'atr': atr,
             'support': support,
             'resistance': resistance,
+            'support_touches': support_touches,
+            'resistance_touches': resistance_touches,
             'volume_status': self.get_volume_status(volumes),
             'change_24h': 0,
             'kdj': self.calculate_kdj(highs, lows, closes),
@@ -443,8 +502,4 @@ class MarketReader:
             'divergence': self.detect_divergence(closes, [rsi_value] * len(closes))
         }
         
-        stats = self.get_24h_stats()
-        if stats:
-            analysis['change_24h'] = stats['price_change_percent']
-        
         return analysis
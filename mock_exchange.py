@@ -0,0 +1,654 @@
+"""
+Local stand-in for the Binance and Bybit market-data APIs, Bybit order entry and the Telegram Bot API,
+for offline load and execution tests
+
+    python mock_exchange.py --port 8900 --symbols 500 --latency 0.05 --error-rate 0.01
+    BINANCE_API_URL=http://127.0.0.1:8900/api/v3 TELEGRAM_API_URL=http://127.0.0.1:8900 python bybit_rsi_bot.py
+    DATA_SOURCE=bybit BYBIT_API_URL=http://127.0.0.1:8900 TELEGRAM_API_URL=http://127.0.0.1:8900 python bybit_rsi_bot.py
+
+Serves /api/v3/klines, /ticker/price, /ticker/24hr and /time in Binance's response shapes,
+/v5/market/kline, /tickers, /instruments-info and /time in Bybit's, plus signed
+/v5/order/create, /amend, /cancel and /realtime with a simple matching engine (market
+orders fill at once, conditional orders trigger on the synthetic price; POST /_price
+{"symbol", "price"} pins a price to force fills). It also accepts POST /bot<token>/sendMessage. Candles are synthetic (deterministic per symbol
+and open time, always up to the current candle) or replayed from recorded /klines
+responses saved as <DIR>/<SYMBOL>_<interval>.json. GET /_stats returns request counts.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config import SYMBOLS
+from scheduler import timeframe_seconds
+
+MAX_KLINES = 1000
+FINAL_ORDER_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated"}
+BYBIT_INTERVALS = {"D": "1d"}
+
+# Approximate Binance request weights and the per-minute limit
+WEIGHTS = {"klines": 2, "ticker/price": 2, "ticker/price:multi": 4, "ticker/24hr": 2,
+           "ticker/24hr:multi": 40, "ticker/24hr:all": 80, "time": 1}
+WEIGHT_LIMIT = 6000
+
+
+def make_symbols(count):
+    """The configured symbols followed by made-up ones, `count` in total"""
+    symbols = list(SYMBOLS[:count])
+    i = 0
+    while len(symbols) < count:
+        symbols.append(f"SYM{i:04d}USDT")
+        i += 1
+    return symbols
+
+
+def _noise(x, seed):
+    """Cheap deterministic pseudo-random value in [-1, 1) for each x"""
+    value = math.sin(x * 12.9898 + seed) * 43758.5453
+    return (value - math.floor(value)) * 2 - 1
+
+
+class SyntheticSeries:
+    """Price as a pure function of time, so any window of candles is consistent between requests"""
+
+    def __init__(self, symbol):
+        h = int.from_bytes(hashlib.md5(symbol.encode()).digest()[:8], 'big')
+        rnd = random.Random(h)
+        self.base = 10 ** rnd.uniform(-1, 4.5)
+        self.seed = rnd.uniform(0, 1000)
+        self.phases = (rnd.uniform(0, 2 * math.pi), rnd.uniform(0, 2 * math.pi))
+        self.volume = 10 ** rnd.uniform(2, 6) / self.base
+
+    def price(self, t):
+        minutes = t / 60000
+        swing = 0.03 * math.sin(2 * math.pi * minutes / 720 + self.phases[0])
+        trend = 0.08 * math.sin(2 * math.pi * minutes / 7200 + self.phases[1])
+        return self.base * math.exp(swing + trend + 0.002 * _noise(minutes, self.seed))
+
+    def candle(self, open_time, step_ms):
+        close_time = open_time + step_ms - 1
+        o = self.price(open_time)
+        c = self.price(close_time)
+        wick = 1 + 0.002 * abs(_noise(open_time / 1000, self.seed + 1))
+        volume = self.volume * (1 + 0.8 * _noise(open_time / 1000, self.seed + 2))
+        return [open_time, f"{o:.8f}", f"{max(o, c) * wick:.8f}", f"{min(o, c) / wick:.8f}", f"{c:.8f}",
+                f"{volume:.4f}", close_time, f"{volume * c:.4f}", 100, f"{volume / 2:.4f}",
+                f"{volume * c / 2:.4f}", "0"]
+
+
+class MockExchange:
+    def __init__(self, symbols, data_dir=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, telegram_rate_limit_rate=0.0, weight_limit=WEIGHT_LIMIT, seed=0,
+                 api_secret=None):
+        self.symbols = list(symbols)
+        self.known = set(self.symbols)
+        self.series = {}
+        self.recorded = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.telegram_rate_limit_rate = telegram_rate_limit_rate
+        self.weight_limit = weight_limit
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._weights = deque()
+        self.requests = {}
+        self.statuses = {}
+        self.messages = deque(maxlen=100)
+        self.messages_received = 0
+
+        # Bybit order entry; signatures are checked only when api_secret is given
+        self.api_secret = api_secret
+        self.orders = {}
+        self.positions = {}
+        self.overrides = {}
+        self._orders_lock = threading.RLock()
+
+        if data_dir:
+            self._load_recorded(data_dir)
+
+    def _load_recorded(self, data_dir):
+        """Recorded candles are shifted in time so the last one is the current candle"""
+        for name in sorted(os.listdir(data_dir)):
+            if not name.endswith(".json") or "_" not in name:
+                continue
+            symbol, interval = name[:-5].rsplit("_", 1)
+            with open(os.path.join(data_dir, name), 'r') as f:
+                rows = json.load(f)
+            if not rows:
+                continue
+            step = timeframe_seconds(interval) * 1000
+            shift = (int(time.time() * 1000) // step) * step - int(rows[-1][0])
+            self.recorded[(symbol, interval)] = [[r[0] + shift] + list(r[1:6]) + [r[6] + shift] + list(r[7:])
+                                                 for r in rows]
+            if symbol not in self.known:
+                self.known.add(symbol)
+                self.symbols.append(symbol)
+        if self.recorded:
+            print(f"Loaded {len(self.recorded)} recorded series from {data_dir}")
+
+    def _series(self, symbol):
+        series = self.series.get(symbol)
+        if series is None:
+            series = self.series[symbol] = SyntheticSeries(symbol)
+        return series
+
+    # --- fault injection and accounting ---
+
+    def account(self, endpoint, weight=0):
+        """Returns (status, retry_after) to serve for this request"""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            roll = self._random.random()
+            now = time.monotonic()
+            while self._weights and self._weights[0][0] < now - 60:
+                self._weights.popleft()
+            used = sum(w for _, w in self._weights)
+            if weight and used + weight > self.weight_limit:
+                return 429, 60 - int(now - self._weights[0][0]) if self._weights else 60
+            if weight:
+                self._weights.append((now, weight))
+        if roll < self.rate_limit_rate:
+            return 429, 1
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, None
+        return 200, None
+
+    def used_weight(self):
+        with self._lock:
+            return sum(w for _, w in self._weights)
+
+    def record_status(self, status):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._random.random() * self.jitter)
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.requests), 'statuses': {str(k): v for k, v in self.statuses.items()},
+                    'messages_received': self.messages_received, 'symbols': len(self.symbols),
+                    'orders': len(self.orders), 'positions': {s: p for s, p in self.positions.items() if p}}
+
+    # --- market data ---
+
+    def klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        step = timeframe_seconds(interval) * 1000
+        limit = max(1, min(limit, MAX_KLINES))
+        recorded = self.recorded.get((symbol, interval))
+        if recorded is not None:
+            rows = [r for r in recorded if (start_time is None or r[0] >= start_time)
+                    and (end_time is None or r[0] <= end_time)]
+            return rows[:limit] if start_time is not None else rows[-limit:]
+
+        current = (int(time.time() * 1000) // step) * step
+        last = current if end_time is None else min(current, (end_time // step) * step)
+        if start_time is not None:
+            first = -(-start_time // step) * step
+            last = min(last, first + (limit - 1) * step)
+        else:
+            first = last - (limit - 1) * step
+        series = self._series(symbol)
+        return [series.candle(t, step) for t in range(first, last + 1, step)]
+
+    def _recorded_rows(self, symbol):
+        rows = self.recorded.get((symbol, "15m"))
+        if rows is None:
+            rows = next((r for (s, _), r in self.recorded.items() if s == symbol), None)
+        return rows
+
+    def price(self, symbol):
+        if symbol in self.overrides:
+            return self.overrides[symbol]
+        rows = self._recorded_rows(symbol)
+        if rows:
+            return float(rows[-1][4])
+        return self._series(symbol).price(time.time() * 1000)
+
+    def ticker_24hr(self, symbol):
+        now = time.time() * 1000
+        rows = self._recorded_rows(symbol)
+        if symbol in self.overrides:
+            last = opened = self.overrides[symbol]
+            volume = self._series(symbol).volume * 96
+        elif rows:
+            day = rows[-96:]
+            last, opened = float(day[-1][4]), float(day[0][1])
+            volume = sum(float(r[5]) for r in day)
+        else:
+            series = self._series(symbol)
+            last, opened = series.price(now), series.price(now - 86400000)
+            volume = series.volume * 96
+        change = last - opened
+        return {
+            "symbol": symbol,
+            "priceChange": f"{change:.8f}",
+            "priceChangePercent": f"{change / opened * 100:.3f}",
+            "weightedAvgPrice": f"{(last + opened) / 2:.8f}",
+            "lastPrice": f"{last:.8f}",
+            "openPrice": f"{opened:.8f}",
+            "highPrice": f"{max(last, opened) * 1.01:.8f}",
+            "lowPrice": f"{min(last, opened) * 0.99:.8f}",
+            "volume": f"{volume:.4f}",
+            "quoteVolume": f"{volume * last:.4f}",
+            "openTime": int(now - 86400000),
+            "closeTime": int(now),
+            "count": 100000,
+        }
+
+
+    # --- Bybit order entry ---
+
+    def instrument(self, symbol):
+        magnitude = math.floor(math.log10(self.price(symbol)))
+        return {"symbol": symbol, "status": "Trading", "contractType": "LinearPerpetual",
+                "priceFilter": {"tickSize": f"{10.0 ** (magnitude - 4):.10f}".rstrip("0").rstrip(".")},
+                "lotSizeFilter": {"qtyStep": f"{10.0 ** min(0, 2 - magnitude):.10f}".rstrip("0").rstrip("."),
+                                  "minOrderQty": f"{10.0 ** min(0, 2 - magnitude):.10f}".rstrip("0").rstrip(".")}}
+
+    def set_price(self, symbol, price):
+        with self._orders_lock:
+            self.overrides[symbol] = price
+            self.match(symbol)
+
+    def create_order(self, order):
+        """Returns (retCode, retMsg, result)"""
+        symbol = order.get("symbol", "")
+        link_id = order.get("orderLinkId") or f"mock-{len(self.orders)}"
+        try:
+            qty = float(order["qty"])
+        except (KeyError, ValueError):
+            return 10001, "params error: qty", {}
+        if symbol not in self.known or order.get("side") not in ("Buy", "Sell") or qty <= 0:
+            return 10001, "params error", {}
+        with self._orders_lock:
+            if link_id in self.orders:
+                return 110072, "OrderLinkedID is duplicate", {}
+            now = str(int(time.time() * 1000))
+            self.orders[link_id] = {
+                "orderId": hashlib.md5(link_id.encode()).hexdigest(), "orderLinkId": link_id,
+                "symbol": symbol, "side": order["side"], "orderType": order.get("orderType", "Market"),
+                "qty": order["qty"], "triggerPrice": order.get("triggerPrice", ""),
+                "triggerDirection": int(order.get("triggerDirection") or 0),
+                "reduceOnly": bool(order.get("reduceOnly")),
+                "orderStatus": "Untriggered" if order.get("triggerPrice") else "New",
+                "avgPrice": "", "cumExecQty": "0", "createdTime": now, "updatedTime": now,
+            }
+            self.match(symbol)
+            o = self.orders[link_id]
+            return 0, "OK", {"orderId": o["orderId"], "orderLinkId": link_id}
+
+    def amend_order(self, changes):
+        with self._orders_lock:
+            o = self.orders.get(changes.get("orderLinkId"))
+            if o is None or o["orderStatus"] in FINAL_ORDER_STATUSES:
+                return 110001, "order not exists or too late to replace", {}
+            for key in ("qty", "triggerPrice"):
+                if key in changes:
+                    o[key] = changes[key]
+            o["updatedTime"] = str(int(time.time() * 1000))
+            self.match(o["symbol"])
+            return 0, "OK", {"orderId": o["orderId"], "orderLinkId": o["orderLinkId"]}
+
+    def cancel_order(self, changes):
+        with self._orders_lock:
+            o = self.orders.get(changes.get("orderLinkId"))
+            if o is None or o["orderStatus"] in FINAL_ORDER_STATUSES:
+                return 110001, "order not exists or too late to cancel", {}
+            o["orderStatus"] = "Cancelled"
+            o["updatedTime"] = str(int(time.time() * 1000))
+            return 0, "OK", {"orderId": o["orderId"], "orderLinkId": o["orderLinkId"]}
+
+    def query_orders(self, symbol, link_id=None):
+        with self._orders_lock:
+            if symbol:
+                self.match(symbol)
+            if link_id:
+                o = self.orders.get(link_id)
+                return [dict(o)] if o else []
+            return [dict(o) for o in self.orders.values()
+                    if o["symbol"] == symbol and o["orderStatus"] not in FINAL_ORDER_STATUSES]
+
+    def match(self, symbol):
+        """Trigger conditional orders at the current price and fill market orders against the position"""
+        price = self.price(symbol)
+        with self._orders_lock:
+            for o in self.orders.values():
+                if o["symbol"] != symbol or o["orderStatus"] in FINAL_ORDER_STATUSES:
+                    continue
+                if o["orderStatus"] == "Untriggered":
+                    trigger = float(o["triggerPrice"])
+                    if not ((o["triggerDirection"] == 1 and price >= trigger)
+                            or (o["triggerDirection"] == 2 and price <= trigger)):
+                        continue
+                    o["orderStatus"] = "Triggered"
+                position = self.positions.get(symbol, 0.0)
+                sign = 1 if o["side"] == "Buy" else -1
+                qty = float(o["qty"])
+                if o["reduceOnly"]:
+                    # Only the part that reduces the position can fill
+                    qty = min(qty, abs(position)) if position * sign < 0 else 0.0
+                    if qty <= 0:
+                        o["orderStatus"] = "Deactivated"
+                        continue
+                self.positions[symbol] = position + sign * qty
+                o.update(orderStatus="Filled", avgPrice=f"{price:.8f}", cumExecQty=f"{qty}",
+                         updatedTime=str(int(time.time() * 1000)))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def exchange(self):
+        return self.server.exchange
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+        self.exchange.record_status(status)
+
+    def _binance_fault(self, endpoint, weight):
+        status, retry_after = self.exchange.account(endpoint, weight)
+        self.exchange.delay()
+        if status == 429:
+            self._send(429, {"code": -1003, "msg": "Too many requests."}, {"Retry-After": retry_after})
+            return True
+        if status == 500:
+            self._send(500, {"code": -1000, "msg": "An unknown error occurred while processing the request."})
+            return True
+        return False
+
+    def _symbols_param(self, query):
+        if "symbols" in query:
+            try:
+                return json.loads(query["symbols"][0])
+            except ValueError:
+                return None
+        if "symbol" in query:
+            return query["symbol"][0].upper()
+        return []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+        ex = self.exchange
+
+        if path == "/_stats":
+            self._send(200, ex.stats())
+            return
+        if path.startswith("/v5/market/"):
+            self._bybit_market(path[len("/v5/market/"):], query)
+            return
+        if path == "/v5/order/realtime":
+            if self._bybit_auth(url.query):
+                orders = ex.query_orders(query.get("symbol", [""])[0].upper(), query.get("orderLinkId", [None])[0])
+                self._bybit_send({"category": "linear", "list": orders, "nextPageCursor": ""})
+            return
+        if not path.startswith("/api/v3/"):
+            self._send(404, {"code": -1, "msg": "Not found"})
+            return
+        endpoint = path[len("/api/v3/"):]
+        headers = {}
+
+        if endpoint == "time":
+            if self._binance_fault("time", WEIGHTS["time"]):
+                return
+            self._send(200, {"serverTime": int(time.time() * 1000)})
+            return
+
+        if endpoint == "klines":
+            if self._binance_fault("klines", WEIGHTS["klines"]):
+                return
+            symbol = query.get("symbol", [""])[0].upper()
+            if symbol not in ex.known:
+                self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+                return
+            try:
+                interval = query.get("interval", ["15m"])[0]
+                timeframe_seconds(interval)
+                rows = ex.klines(symbol, interval, int(query.get("limit", [500])[0]),
+                                 int(query["startTime"][0]) if "startTime" in query else None,
+                                 int(query["endTime"][0]) if "endTime" in query else None)
+            except (KeyError, ValueError):
+                self._send(400, {"code": -1120, "msg": "Invalid interval."})
+                return
+            headers["X-MBX-USED-WEIGHT-1M"] = ex.used_weight()
+            self._send(200, rows, headers)
+            return
+
+        if endpoint in ("ticker/price", "ticker/24hr"):
+            symbols = self._symbols_param(query)
+            if symbols is None:
+                self._send(400, {"code": -1100, "msg": "Illegal characters found in parameter 'symbols'."})
+                return
+            multi = isinstance(symbols, list)
+            key = endpoint if not multi else endpoint + (":multi" if symbols else ":all")
+            if self._binance_fault(endpoint, WEIGHTS.get(key, 2)):
+                return
+            wanted = (symbols or ex.symbols) if multi else [symbols]
+            if any(s not in ex.known for s in wanted):
+                self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+                return
+            if endpoint == "ticker/price":
+                body = [{"symbol": s, "price": f"{ex.price(s):.8f}"} for s in wanted]
+            else:
+                body = [ex.ticker_24hr(s) for s in wanted]
+            headers["X-MBX-USED-WEIGHT-1M"] = ex.used_weight()
+            self._send(200, body if multi else body[0], headers)
+            return
+
+        self._send(404, {"code": -1, "msg": "Not found"})
+
+    def _bybit_send(self, result, status=200, code=0, msg="OK"):
+        self._send(status, {"retCode": code, "retMsg": msg, "result": result, "retExtInfo": {},
+                            "time": int(time.time() * 1000)})
+
+    def _bybit_auth(self, payload):
+        """Check the X-BAPI headers; sends the error response and returns False if they are bad"""
+        ex = self.exchange
+        key = self.headers.get("X-BAPI-API-KEY")
+        timestamp = self.headers.get("X-BAPI-TIMESTAMP", "")
+        recv_window = self.headers.get("X-BAPI-RECV-WINDOW", "5000")
+        if not key:
+            self._bybit_send({}, code=10003, msg="API key is invalid.")
+            return False
+        if ex.api_secret is not None:
+            expected = hmac.new(ex.api_secret.encode(), (timestamp + key + recv_window + payload).encode(),
+                                hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, self.headers.get("X-BAPI-SIGN", "")):
+                self._bybit_send({}, code=10004, msg="error sign!")
+                return False
+        if not timestamp.isdigit() or abs(time.time() * 1000 - int(timestamp)) > int(recv_window):
+            self._bybit_send({}, code=10002,
+                             msg="invalid request, please check your server timestamp or recv_window param")
+            return False
+        status, _ = ex.account("bybit/order")
+        ex.delay()
+        if status == 429:
+            self._bybit_send({}, code=10006, msg="Too many visits!")
+            return False
+        if status == 500:
+            self._bybit_send({}, status=500, code=10016, msg="Server error.")
+            return False
+        return True
+
+    def _bybit_order(self, path, raw):
+        if not self._bybit_auth(raw.decode()):
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._bybit_send({}, code=10001, msg="params error: invalid JSON")
+            return
+        action = {"/v5/order/create": self.exchange.create_order, "/v5/order/amend": self.exchange.amend_order,
+                  "/v5/order/cancel": self.exchange.cancel_order}[path]
+        code, msg, result = action(body)
+        self._bybit_send(result, code=code, msg=msg)
+
+    def _bybit_market(self, endpoint, query):
+        ex = self.exchange
+        status, _ = ex.account("bybit/" + endpoint)
+        ex.delay()
+        if status == 429:
+            self._bybit_send({}, code=10006, msg="Too many visits!")
+            return
+        if status == 500:
+            self._bybit_send({}, status=500, code=10016, msg="Server error.")
+            return
+
+        if endpoint == "time":
+            now = time.time_ns()
+            self._bybit_send({"timeSecond": str(now // 10**9), "timeNano": str(now)})
+            return
+
+        symbol = query.get("symbol", [""])[0].upper()
+        if symbol and symbol not in ex.known:
+            self._bybit_send({}, code=10001, msg="params error: symbol invalid")
+            return
+
+        if endpoint == "kline":
+            interval = query.get("interval", [""])[0]
+            interval = BYBIT_INTERVALS.get(interval) or (
+                f"{int(interval) // 60}h" if interval.isdigit() and int(interval) % 60 == 0 else f"{interval}m")
+            try:
+                timeframe_seconds(interval)
+                rows = ex.klines(symbol, interval, int(query.get("limit", [200])[0]),
+                                 int(query["start"][0]) if "start" in query else None,
+                                 int(query["end"][0]) if "end" in query else None)
+            except (KeyError, ValueError):
+                self._bybit_send({}, code=10001, msg="params error: invalid interval")
+                return
+            rows = [[str(r[0]), r[1], r[2], r[3], r[4], r[5], f"{float(r[5]) * float(r[4]):.4f}"]
+                    for r in reversed(rows)]
+            self._bybit_send({"category": "linear", "symbol": symbol, "list": rows})
+            return
+
+        if endpoint == "instruments-info":
+            instruments = [ex.instrument(s) for s in ([symbol] if symbol else ex.symbols)]
+            self._bybit_send({"category": "linear", "list": instruments, "nextPageCursor": ""})
+            return
+
+        if endpoint == "tickers":
+            tickers = []
+            for s in ([symbol] if symbol else ex.symbols):
+                t = ex.ticker_24hr(s)
+                tickers.append({
+                    "symbol": s, "lastPrice": t["lastPrice"], "prevPrice24h": t["openPrice"],
+                    "price24hPcnt": f"{float(t['priceChangePercent']) / 100:.6f}",
+                    "highPrice24h": t["highPrice"], "lowPrice24h": t["lowPrice"],
+                    "volume24h": t["volume"], "turnover24h": t["quoteVolume"],
+                })
+            self._bybit_send({"category": "linear", "list": tickers})
+            return
+
+        self._send(404, {"retCode": 10001, "retMsg": "Not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if path in ("/v5/order/create", "/v5/order/amend", "/v5/order/cancel"):
+            self._bybit_order(path, raw)
+            return
+        if path == "/_price":
+            body = json.loads(raw or b"{}")
+            self.exchange.set_price(body["symbol"].upper(), float(body["price"]))
+            self._send(200, {"symbol": body["symbol"].upper(), "price": float(body["price"])})
+            return
+        if not (path.startswith("/bot") and path.endswith("/sendMessage")):
+            self._send(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+
+        ex = self.exchange
+        ex.account("telegram/sendMessage")
+        ex.delay()
+        with ex._lock:
+            roll = ex._random.random()
+        if roll < ex.telegram_rate_limit_rate:
+            self._send(429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                             "parameters": {"retry_after": 1}})
+            return
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            self._send(400, {"ok": False, "error_code": 400, "description": "Bad Request: can't parse JSON"})
+            return
+        with ex._lock:
+            ex.messages_received += 1
+            ex.messages.append(payload.get("text", ""))
+            message_id = ex.messages_received
+        self._send(200, {"ok": True, "result": {"message_id": message_id, "date": int(time.time()),
+                                                "chat": {"id": payload.get("chat_id")},
+                                                "text": payload.get("text", "")}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_exchange(host="127.0.0.1", port=8900, **options):
+    """Serve a MockExchange from a background thread; returns the server (server.url is the base URL)"""
+    symbols = options.pop("symbols", SYMBOLS)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.exchange = MockExchange(symbols, **options)
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="mock-exchange", daemon=True).start()
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Binance, Bybit and Telegram APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--symbols", type=int, default=100, help="number of symbols to serve")
+    parser.add_argument("--data", metavar="DIR", help="recorded /klines responses as <SYMBOL>_<interval>.json")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--telegram-rate-limit", type=float, default=0.0,
+                        help="fraction of sendMessage calls answered with 429")
+    parser.add_argument("--weight-limit", type=int, default=WEIGHT_LIMIT, help="request weight per minute")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-secret", help="verify Bybit order request signatures with this secret")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    server.exchange = MockExchange(make_symbols(args.symbols), data_dir=args.data, latency=args.latency,
+                                   jitter=args.jitter, error_rate=args.error_rate,
+                                   rate_limit_rate=args.rate_limit,
+                                   telegram_rate_limit_rate=args.telegram_rate_limit,
+                                   weight_limit=args.weight_limit, seed=args.seed, api_secret=args.api_secret)
+    print(f"Mock exchange on http://{args.host}:{args.port} ({len(server.exchange.symbols)} symbols)")
+    print(f"  BINANCE_API_URL=http://{args.host}:{args.port}/api/v3")
+    print(f"  TELEGRAM_API_URL=http://{args.host}:{args.port}")
+    print(f"  BYBIT_API_URL=http://{args.host}:{args.port}  BYBIT_TRADE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,365 @@
+"""
+Incremental news ingestion: RSS/Atom/JSON feeds (URLs or local files), hash de-duplication,
+one-pass symbol and keyword tagging, and a time-decayed per-symbol sentiment index
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from instrumentation import track_request
+
+MARKET = "*"  # index key for every headline, whatever it mentions
+
+# Names used in headlines for the more common base assets
+ALIASES = {
+    "BTC": ("BITCOIN",), "ETH": ("ETHEREUM", "ETHER"), "SOL": ("SOLANA",), "XRP": ("RIPPLE",),
+    "BNB": ("BINANCE COIN",), "DOGE": ("DOGECOIN",), "ADA": ("CARDANO",), "AVAX": ("AVALANCHE",),
+    "DOT": ("POLKADOT",), "LINK": ("CHAINLINK",), "LTC": ("LITECOIN",), "TRX": ("TRON",),
+    "MATIC": ("POLYGON",), "TON": ("TONCOIN",), "SHIB": ("SHIBA INU",), "ATOM": ("COSMOS",),
+}
+
+BULLISH_WORDS = (
+    "SURGE", "SURGES", "RALLY", "RALLIES", "SOAR", "SOARS", "JUMPS", "GAINS", "RECORD HIGH", "ALL-TIME HIGH",
+    "APPROVES", "APPROVED", "APPROVAL", "ADOPTION", "PARTNERSHIP", "UPGRADE", "BREAKOUT", "BULLISH",
+    "INFLOWS", "LISTING", "LISTS", "ETF INFLOWS",
+)
+BEARISH_WORDS = (
+    "HACK", "HACKED", "EXPLOIT", "CRASH", "CRASHES", "PLUNGE", "PLUNGES", "LAWSUIT", "SUES", "BAN", "BANS",
+    "DELIST", "DELISTS", "DELISTING", "LIQUIDATION", "LIQUIDATIONS", "OUTAGE", "BEARISH", "DUMP",
+    "FRAUD", "INVESTIGATION", "DROPS", "FALLS", "SELL-OFF", "SELLOFF", "OUTFLOWS", "INSOLVENT",
+)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every pattern occurrence in one pass over the text.
+
+    Patterns are matched on upper-cased text at word boundaries. A pattern added with
+    exact_case=True (bare tickers like "ONE" or "NEAR") only counts where the original
+    text is upper case too, or prefixed with "$".
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, value, exact_case=False):
+        node = 0
+        for ch in pattern.upper():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value, exact_case))
+        self._built = False
+
+    def build(self):
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def find(self, text):
+        """Values of all patterns found in `text` (with repeats)"""
+        if not self._built:
+            self.build()
+        upper = text.upper()
+        if len(upper) != len(text):
+            # a few characters (e.g. "ß") grow when upper-cased; keep offsets aligned with `text`
+            upper = "".join(c if len(c.upper()) != 1 else c.upper() for c in text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found = []
+        node = 0
+        for i, ch in enumerate(upper):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            if end < len(upper) and _is_word_char(upper[end]):
+                continue
+            for length, value, exact_case in out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(upper[start - 1]):
+                    continue
+                if exact_case and text[start:end] != upper[start:end] and \
+                        not (start > 0 and text[start - 1] == "$"):
+                    continue
+                found.append(value)
+        return found
+
+
+class DecayingIndex:
+    """Per-key exponentially decayed sentiment: O(1) update and O(1) query"""
+
+    def __init__(self, half_life=3600):
+        self.rate = math.log(2) / half_life
+        self._state = {}  # key -> [weighted score sum, weight sum, last update time]
+
+    def add(self, key, score, when):
+        state = self._state.get(key)
+        if state is None:
+            self._state[key] = [score, 1.0, when]
+            return
+        if when >= state[2]:
+            decay = math.exp(-self.rate * (when - state[2]))
+            state[0] = state[0] * decay + score
+            state[1] = state[1] * decay + 1.0
+            state[2] = when
+        else:
+            # arrived out of order: weigh it as if it had been added at its own time
+            weight = math.exp(-self.rate * (state[2] - when))
+            state[0] += score * weight
+            state[1] += weight
+
+    def get(self, key, now=None):
+        """(mean score in [-1, 1], decayed number of mentions)"""
+        state = self._state.get(key)
+        if state is None:
+            return 0.0, 0.0
+        now = time.time() if now is None else now
+        decay = math.exp(-self.rate * max(now - state[2], 0))
+        return state[0] / state[1], state[1] * decay
+
+    def __len__(self):
+        return len(self._state)
+
+
+def _parse_time(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e12 else float(value)
+    value = str(value).strip()
+    if value.isdigit():
+        return _parse_time(int(value))
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    return child.text.strip() if child is not None and child.text else ""
+
+
+def parse_feed(body):
+    """Items from an RSS, Atom or JSON feed body as dicts with id, title, link and published"""
+    body = body.strip()
+    if not body:
+        return []
+    if body[:1] in ("[", "{"):
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data = next((data[k] for k in ("items", "results", "articles", "data") if isinstance(data.get(k), list)), [])
+        return [_json_item(item) for item in data if isinstance(item, dict)]
+
+    root = ET.fromstring(body)
+    items = []
+    for item in root.iter("item"):  # RSS
+        items.append({'id': _text(item, "guid"), 'title': _text(item, "title"), 'link': _text(item, "link"),
+                      'published': _parse_time(_text(item, "pubDate"))})
+    atom = "{http://www.w3.org/2005/Atom}"
+    for entry in root.iter(f"{atom}entry"):
+        link = entry.find(f"{atom}link")
+        items.append({'id': _text(entry, f"{atom}id"), 'title': _text(entry, f"{atom}title"),
+                      'link': link.get("href", "") if link is not None else "",
+                      'published': _parse_time(_text(entry, f"{atom}published") or _text(entry, f"{atom}updated"))})
+    return items
+
+
+def _json_item(item):
+    return {
+        'id': str(item.get("id") or item.get("guid") or ""),
+        'title': item.get("title") or item.get("headline") or "",
+        'link': item.get("url") or item.get("link") or "",
+        'published': _parse_time(item.get("published_at") or item.get("published") or item.get("date")
+                                 or item.get("time")),
+    }
+
+
+class FeedSource:
+    """One feed, read incrementally: HTTP conditional GETs, appended lines of a local .jsonl
+    file, or a local file re-read only when it changes"""
+
+    def __init__(self, location, session=None):
+        self.location = location
+        self.is_url = location.startswith(("http://", "https://"))
+        self.session = session
+        self.etag = None
+        self.last_modified = None
+        self.offset = 0
+        self.mtime = None
+
+    def read(self):
+        if self.is_url:
+            return self._read_url()
+        if self.location.endswith(".jsonl"):
+            return self._read_jsonl()
+        return self._read_file()
+
+    def _read_url(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        with track_request("news") as request:
+            response = self.session.get(self.location, headers=headers, timeout=10)
+            if response.status_code >= 400:
+                request.error()
+        if response.status_code == 304:
+            return []
+        if response.status_code != 200:
+            print(f"News feed {self.location}: HTTP {response.status_code}")
+            return []
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        return parse_feed(response.text)
+
+    def _read_file(self):
+        mtime = os.stat(self.location).st_mtime
+        if mtime == self.mtime:
+            return []
+        self.mtime = mtime
+        with open(self.location, 'r', encoding='utf-8') as f:
+            return parse_feed(f.read())
+
+    def _read_jsonl(self):
+        if os.path.getsize(self.location) < self.offset:
+            self.offset = 0  # file was truncated or rotated
+        items = []
+        with open(self.location, 'r', encoding='utf-8') as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partial line still being written
+                self.offset += len(line.encode('utf-8'))
+                try:
+                    items.append(_json_item(json.loads(line)))
+                except ValueError:
+                    continue
+        return items
+
+
+class NewsFeed:
+    """Polls feeds, tags each new headline with the symbols it mentions and a keyword score,
+    and folds it into a decaying per-symbol sentiment index"""
+
+    def __init__(self, sources, symbols, quote="USDT", half_life=3600, max_age=6 * 3600, seen_limit=50000):
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        self.sources = [FeedSource(s, self.session) for s in sources]
+        self.index = DecayingIndex(half_life)
+        self.max_age = max_age
+        self.seen_limit = seen_limit
+        self._seen = OrderedDict()
+        self.ingested = 0
+        self.duplicates = 0
+        self.recent = deque(maxlen=50)
+
+        self.matcher = KeywordMatcher()
+        for symbol in symbols:
+            base = symbol[:-len(quote)] if symbol.endswith(quote) else symbol
+            self.matcher.add(base, ('symbol', symbol), exact_case=True)
+            for alias in ALIASES.get(base, ()):
+                self.matcher.add(alias, ('symbol', symbol))
+        for word in BULLISH_WORDS:
+            self.matcher.add(word, ('word', 1))
+        for word in BEARISH_WORDS:
+            self.matcher.add(word, ('word', -1))
+        self.matcher.build()
+
+    @staticmethod
+    def _key(item):
+        basis = item['id'] or item['link'] or re.sub(r"\W+", " ", item['title'].lower()).strip()
+        return hashlib.blake2b(basis.encode('utf-8'), digest_size=12).digest()
+
+    def ingest(self, items, now=None):
+        """Index new items; returns how many were new"""
+        now = time.time() if now is None else now
+        new = 0
+        for item in items:
+            if not item['title']:
+                continue
+            key = self._key(item)
+            if key in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen[key] = True
+            if len(self._seen) > self.seen_limit:
+                self._seen.popitem(last=False)
+
+            when = item['published'] if item['published'] and item['published'] <= now else now
+            if now - when > self.max_age:
+                continue
+
+            symbols = set()
+            score = 0
+            for kind, value in self.matcher.find(item['title']):
+                if kind == 'symbol':
+                    symbols.add(value)
+                else:
+                    score += value
+            score = max(-2, min(2, score)) / 2
+
+            self.index.add(MARKET, score, when)
+            for symbol in symbols:
+                self.index.add(symbol, score, when)
+            self.recent.append((when, item['title'], sorted(symbols), score))
+            new += 1
+        self.ingested += new
+        return new
+
+    def poll(self):
+        new = 0
+        for source in self.sources:
+            try:
+                new += self.ingest(source.read())
+            except Exception as e:
+                print(f"News feed {source.location} error: {e}")
+        if new:
+            print(f"News: {new} new headline(s)")
+        return new
+
+    def sentiment(self, symbol, now=None):
+        """(score in [-1, 1], decayed mention count) for a symbol, or the whole feed with MARKET"""
+        return self.index.get(symbol, now)
@@ -1,64 +1,74 @@
-import requests
 import time
-from datetime import datetime, timedelta
+from data_sources import get_source
+from market_breadth import compute_breadth, classify
+from news_feed import NewsFeed, MARKET
+from config import (
+    BREADTH_TTL, BREADTH_MAX_STALE, BREADTH_MIN_QUOTE_VOLUME,
+    BREADTH_CHANGE_THRESHOLD, BREADTH_ADVANCE_THRESHOLD,
+    SYMBOLS, NEWS_FEEDS, NEWS_HALF_LIFE, NEWS_MAX_AGE, NEWS_BLOCK_THRESHOLD, NEWS_MIN_MENTIONS
+)
+
+RETRY_AFTER_FAILURE = 60
 
 
 class NewsScanner:
-    def __init__(self):
+    def __init__(self, symbols=None, feeds=None):
         self.cache_time = 0
-        self.cache_ttl = 3600
+        self.cache_ttl = BREADTH_TTL
+        self.max_stale = BREADTH_MAX_STALE
         self.cached_sentiment = None
-        self.base_url = "https://api.binance.com/api/v3"
+        self.next_attempt = 0
+        self.source = get_source()
+        feeds = NEWS_FEEDS if feeds is None else feeds
+        self.news = NewsFeed(feeds, symbols or SYMBOLS, half_life=NEWS_HALF_LIFE, max_age=NEWS_MAX_AGE) if feeds else None
+    
+    def poll_news(self):
+        if self.news:
+            self.news.poll()
     
-    def get_market_sentiment_from_prices(self, coins=None):
+    def get_market_breadth(self):
+        """Breadth figures for every USDT pair from a single bulk request, or None"""
         try:
-            if not coins:
-                coins = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT"]
-            
-            total_change = 0
-            count = 0
-            
-            for symbol in coins[:5]:
-                try:
-                    url = f"{self.base_url}/ticker/24hr"
-                    r = requests.get(url, params={"symbol": symbol}, timeout=5)
-                    if r.status_code == 200:
-                        data = r.json()
-                        total_change += float(data.get('priceChangePercent', 0))
-                        count += 1
-                except:
-                    pass
-            
-            if count == 0:
-                return "NEUTRAL"
-            
-            avg_change = total_change / count
-            
-            if avg_change > 2:
-                return "BULLISH"
-            elif avg_change < -2:
-                return "BEARISH"
-            return "NEUTRAL"
-        except:
-            return "NEUTRAL"
+            tickers = self.source.tickers_24h()
+            if tickers is None:
+                return None
+            return compute_breadth(tickers, min_quote_volume=BREADTH_MIN_QUOTE_VOLUME)
+        except Exception as e:
+            print(f"Market breadth request failed: {e}")
+            return None
     
-    def get_market_sentiment(self, coins=None, force=False):
+    def _current(self, now):
+        age = now - self.cache_time
+        if age > self.max_stale:
+            return {"sentiment": "NEUTRAL", "timestamp": self.cache_time, "method": "unavailable",
+                    "breadth": None, "age": age, "stale": True}
+        return dict(self.cached_sentiment, age=age, stale=age >= self.cache_ttl)
+    
+    def get_market_sentiment(self, force=False):
         now = time.time()
-        if not force and self.cached_sentiment and (now - self.cache_time) < self.cache_ttl:
-            return self.cached_sentiment
+        fresh = self.cached_sentiment and (now - self.cache_time) < self.cache_ttl
+        if fresh and not force:
+            return self._current(now)
+        if not force and now < self.next_attempt:
+            return self._current(now)
         
-        sentiment = self.get_market_sentiment_from_prices(coins)
+        breadth = self.get_market_breadth()
+        if breadth is None:
+            # Keep serving the last good reading (flagged stale) and don't retry on every call
+            self.next_attempt = now + RETRY_AFTER_FAILURE
+            return self._current(now)
         
         self.cached_sentiment = {
-            "sentiment": sentiment,
+            "sentiment": classify(breadth, BREADTH_CHANGE_THRESHOLD, BREADTH_ADVANCE_THRESHOLD),
             "timestamp": now,
-            "method": "price_based"
+            "method": "breadth",
+            "breadth": breadth
         }
         self.cache_time = now
-        return self.cached_sentiment
+        return self._current(now)
     
     def should_block_signal(self, signal_type, coins=None):
-        sentiment_data = self.get_market_sentiment(coins)
+        sentiment_data = self.get_market_sentiment()
         sentiment = sentiment_data.get("sentiment", "NEUTRAL")
         
         if signal_type in ["STRONG_BUY", "BUY"] and sentiment == "BEARISH":
@@ -66,12 +76,33 @@ class NewsScanner:
         if signal_type in ["STRONG_SELL", "SELL"] and sentiment == "BULLISH":
             return True, f"Signal blocked: Market sentiment is BULLISH"
         
+        if self.news:
+            for coin in coins or []:
+                score, mentions = self.news.sentiment(coin)
+                if mentions < NEWS_MIN_MENTIONS:
+                    continue
+                if signal_type in ["STRONG_BUY", "BUY"] and score <= -NEWS_BLOCK_THRESHOLD:
+                    return True, f"Signal blocked: Negative news for {coin} ({score:+.2f}, {mentions:.1f} mentions)"
+                if signal_type in ["STRONG_SELL", "SELL"] and score >= NEWS_BLOCK_THRESHOLD:
+                    return True, f"Signal blocked: Positive news for {coin} ({score:+.2f}, {mentions:.1f} mentions)"
+        
         return False, None
     
     def get_news_summary(self):
         sentiment = self.get_market_sentiment()
         emoji = "🟢" if sentiment["sentiment"] == "BULLISH" else "🔴" if sentiment["sentiment"] == "BEARISH" else "⚪"
-        return f"📰 Market Sentiment: {emoji} {sentiment['sentiment']}"
+        summary = f"📰 Market Sentiment: {emoji} {sentiment['sentiment']}"
+        b = sentiment.get("breadth")
+        if b:
+            summary += (f"\n📊 Breadth: {b['vw_change']:+.2f}% vol-weighted · "
+                        f"{b['advancers']}↑/{b['decliners']}↓ of {b['pairs']} pairs")
+            if sentiment.get("stale"):
+                summary += f" (stale, {sentiment['age'] / 60:.0f}m old)"
+        if self.news:
+            score, mentions = self.news.sentiment(MARKET)
+            if mentions >= NEWS_MIN_MENTIONS:
+                summary += f"\n🗞️ Headlines: {score:+.2f} ({mentions:.0f} recent)"
+        return summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+"""
+Vectorized performance statistics over a TradeLedger
+"""
+
+import numpy as np
+
+
+def compute_metrics(ledger, span=None, periods_per_year=None, initial_balance=1.0):
+    """Compute the full statistics set for a ledger.
+
+    span is the length of the tested period and periods_per_year its unit per year
+    (bars for backtests, seconds for live trades). Both are needed for Sharpe,
+    Sortino and exposure; without them those fields are None.
+    """
+    n = len(ledger)
+    pnl = ledger.pnl
+    if n == 0:
+        return {'trades': 0, 'total_return': 0.0, 'final_balance': initial_balance}
+
+    durations = ledger.duration
+    wins = pnl > 0
+    losses = pnl < 0
+    n_wins = int(np.count_nonzero(wins))
+    n_losses = int(np.count_nonzero(losses))
+    gross_profit = float(pnl[wins].sum())
+    gross_loss = float(-pnl[losses].sum())
+
+    equity = np.cumprod(1 + pnl)
+    peaks = np.maximum(np.maximum.accumulate(equity), 1.0)
+    drawdowns = 1 - equity / peaks
+
+    mean = float(pnl.mean())
+    std = float(pnl.std(ddof=1)) if n > 1 else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(pnl, 0) ** 2)))
+
+    metrics = {
+        'trades': n,
+        'wins': n_wins,
+        'losses': n_losses,
+        'win_rate': n_wins / n * 100,
+        'avg_win': float(pnl[wins].mean()) if n_wins else 0.0,
+        'avg_loss': float(pnl[losses].mean()) if n_losses else 0.0,
+        'best': float(pnl.max()),
+        'worst': float(pnl.min()),
+        'expectancy': mean,
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf'),
+        'total_return': float(equity[-1] - 1),
+        'final_balance': float(initial_balance * equity[-1]),
+        'max_drawdown': float(drawdowns.max()),
+        'avg_duration': float(durations.mean()),
+        'long_trades': int(np.count_nonzero(ledger['side'] > 0)),
+        'short_trades': int(np.count_nonzero(ledger['side'] < 0)),
+        'sharpe': None,
+        'sortino': None,
+        'exposure': None,
+    }
+
+    if span and periods_per_year:
+        trades_per_year = n / (span / periods_per_year)
+        if std > 0:
+            metrics['sharpe'] = float(mean / std * np.sqrt(trades_per_year))
+        if downside > 0:
+            metrics['sortino'] = float(mean / downside * np.sqrt(trades_per_year))
+        metrics['exposure'] = min(float(durations.sum()) / span, 1.0) * 100
+
+    return metrics
@@ -0,0 +1,232 @@
+"""
+On-demand profiling of live analysis cycles
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+MODES = ("cprofile", "sample")
+
+# Innermost frames of a thread that is waiting for work rather than doing any
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+    ("selectors.py", "select"), ("thread.py", "_worker"), ("socketserver.py", "serve_forever"),
+}
+
+
+class StackSampler:
+    """Low-overhead sampling profiler: snapshots the stack of every thread that is not idle
+    at a fixed interval"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def resume(self):
+        self._active.set()
+
+    def pause(self):
+        self._active.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._active.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            self._active.wait()
+            for thread_id, frame in sys._current_frames().items():
+                code = frame.f_code
+                if thread_id == own or (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def write(self, base):
+        # Collapsed stacks, loadable by flamegraph.pl / speedscope
+        with open(base + ".folded", 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+
+        total = sum(self.stacks.values()) or 1
+        lines = [f"{self.samples} samples every {self.interval*1000:.0f}ms", "", "Top functions by own samples:"]
+        lines += [f"{c/total*100:6.1f}%  {name}" for name, c in own.most_common(25)]
+        lines += ["", "Top functions by inclusive samples:"]
+        lines += [f"{c/total*100:6.1f}%  {name}" for name, c in inclusive.most_common(25)]
+        summary = "\n".join(lines) + "\n"
+        with open(base + ".txt", 'w') as f:
+            f.write(summary)
+        return summary
+
+
+class CycleProfiler:
+    """Profiles the next N cycles when asked, without restarting the bot.
+
+    Triggers: SIGUSR1 (cProfile) / SIGUSR2 (sampling) where the platform has them,
+    a flag file whose content is "<cycles> [cprofile|sample]" (deleted once picked up),
+    or the cycles/mode passed at construction (from BOT_PROFILE_CYCLES at start-up).
+    Each capture writes a timestamped dump and a top-functions summary to output_dir.
+    cProfile only sees the thread that enables it, so work handed to a pool has to go
+    through wrap(), which profiles each call on its own thread and merges it into the dump.
+    """
+
+    def __init__(self, output_dir="profiles", flag_file="profile.flag", default_cycles=3,
+                 start_cycles=0, start_mode="cprofile"):
+        self.output_dir = output_dir
+        self.flag_file = flag_file
+        self.default_cycles = default_cycles
+        self._pending = None
+        self._active = None
+        self._remaining = 0
+        self._profiler = None
+        self._owner = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+
+        if start_cycles:
+            self.request(start_cycles, start_mode)
+
+        if threading.current_thread() is threading.main_thread():
+            if hasattr(signal, "SIGUSR1"):
+                signal.signal(signal.SIGUSR1, lambda *_: self.request(self.default_cycles, "cprofile"))
+            if hasattr(signal, "SIGUSR2"):
+                signal.signal(signal.SIGUSR2, lambda *_: self.request(self.default_cycles, "sample"))
+
+    def request(self, cycles, mode="cprofile"):
+        if mode not in MODES:
+            mode = "cprofile"
+        self._pending = (max(int(cycles), 1), mode)
+
+    def _check_flag(self):
+        if not os.path.exists(self.flag_file):
+            return
+        try:
+            with open(self.flag_file, 'r') as f:
+                parts = f.read().split()
+            os.remove(self.flag_file)
+        except OSError:
+            return
+        cycles = int(parts[0]) if parts and parts[0].isdigit() else self.default_cycles
+        self.request(cycles, parts[1] if len(parts) > 1 else "cprofile")
+
+    def _start(self):
+        self._remaining, self._active = self._pending
+        self._pending = None
+        if self._active == "sample":
+            self._profiler = StackSampler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+        print(f"Profiling next {self._remaining} cycle(s) ({self._active})")
+
+    def wrap(self, func):
+        """`func` with each call made on another thread during a cProfile capture profiled
+        there; enabled and disabled on that thread, so nothing keeps profiling the pool after"""
+        def call(*args, **kwargs):
+            session = self._profiler
+            if self._active != "cprofile" or session is None or threading.get_ident() == self._owner:
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    # A call that outlives its capture is dropped instead of joining the next one
+                    if self._profiler is session:
+                        self._thread_profiles.append(profile)
+        return call
+
+    def _finish(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"cycle_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self._active}")
+
+        if self._active == "sample":
+            self._profiler.stop()
+            summary = self._profiler.write(base)
+        else:
+            out = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=out)
+            with self._lock:
+                profiles, self._thread_profiles = self._thread_profiles, []
+                self._profiler = None
+            for profile in profiles:
+                stats.add(profile)
+            stats.dump_stats(base + ".prof")
+            stats.sort_stats("cumulative").print_stats(30)
+            summary = out.getvalue()
+            with open(base + ".txt", 'w') as f:
+                f.write(summary)
+
+        print(f"Profile written to {base}.*")
+        print("\n".join(summary.splitlines()[:15]))
+        self._profiler = None
+        self._active = None
+
+    @contextmanager
+    def cycle(self):
+        self._check_flag()
+        if self._active is None and self._pending:
+            self._start()
+
+        if self._active is None:
+            yield
+            return
+
+        if self._active == "sample":
+            self._profiler.resume()
+        else:
+            self._owner = threading.get_ident()
+            self._profiler.enable()
+        try:
+            yield
+        finally:
+            if self._active == "sample":
+                self._profiler.pause()
+            else:
+                self._profiler.disable()
+            self._remaining -= 1
+            if self._remaining <= 0:
+                try:
+                    self._finish()
+                except Exception as e:
+                    print(f"Could not write profile: {e}")
+                    with self._lock:
+                        self._profiler = None
+                        self._thread_profiles = []
+                    self._active = None
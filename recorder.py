@@ -0,0 +1,245 @@
+"""
+Cycle recorder: every analysis cycle's raw inputs and results, written to rotating gzip
+segments off the hot path, and a loader that replays a recorded cycle offline
+"""
+
+import argparse
+import glob
+import gzip
+import math
+import os
+import pickle
+import queue
+import struct
+import sys
+import threading
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from market_reader import MarketReader
+from data_sources import to_frame
+from trading_strategy import TradingStrategy
+
+SEGMENT_PATTERN = "cycles-*.rec.gz"
+LENGTH = struct.Struct("<I")
+
+
+class CycleRecorder:
+    """Appends cycle records to gzip segment files from a background thread.
+
+    record() only queues the record; the writer wakes every `flush_interval` seconds,
+    pickles whatever is queued and appends it to the current segment as one gzip member
+    of length-prefixed records. A segment is closed once it reaches `segment_bytes` and
+    only the newest `max_segments` are kept. If the writer falls behind, new records are
+    dropped rather than slowing the cycle down.
+    """
+
+    def __init__(self, directory="recordings", segment_bytes=32 * 1024 * 1024, max_segments=50,
+                 flush_interval=5.0, max_queue=1000, level=6):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.level = level
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._segment = None
+        self._sequence = 0
+
+        self.recorded = 0
+        self.dropped = 0
+        self.bytes_written = 0
+
+        self._thread = threading.Thread(target=self._run, name="cycle-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, record):
+        """Queue one cycle record (a picklable dict); never blocks"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+        try:
+            payload = b"".join(LENGTH.pack(len(p)) + p for p in
+                               (pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL) for r in batch))
+            data = gzip.compress(payload, compresslevel=self.level)
+            path = self._current_segment()
+            with open(path, 'ab') as f:
+                f.write(data)
+            self.recorded += len(batch)
+            self.bytes_written += len(data)
+            if os.path.getsize(path) >= self.segment_bytes:
+                self._segment = None
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"Recorder error: {e}")
+
+    def _current_segment(self):
+        if self._segment is None:
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            self._segment = os.path.join(self.directory, f"cycles-{stamp}-{self._sequence:04d}.rec.gz")
+            self._sequence += 1
+            old = segments(self.directory)
+            for path in old[:max(len(old) - self.max_segments + 1, 0)]:
+                os.remove(path)
+        return self._segment
+
+    def close(self, timeout=10):
+        """Write out everything queued so far and stop the writer"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def segments(directory):
+    """Segment files, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+def read_segment(path):
+    """Records in one segment; a member cut short by a crash ends the segment"""
+    try:
+        with gzip.open(path, 'rb') as f:
+            while True:
+                header = f.read(LENGTH.size)
+                if len(header) < LENGTH.size:
+                    return
+                size, = LENGTH.unpack(header)
+                data = f.read(size)
+                if len(data) < size:
+                    return
+                yield pickle.loads(data)
+    except (EOFError, OSError, zlib.error) as e:
+        print(f"{os.path.basename(path)}: truncated ({e})")
+
+
+def iter_records(directory):
+    for path in segments(directory):
+        yield from read_segment(path)
+
+
+class ReplayReader(MarketReader):
+    """MarketReader fed from recorded candles instead of the exchange, starting from the
+    recorded level index when there is one"""
+
+    def __init__(self, symbol, timeframe, candles, source=None, levels=None):
+        super().__init__(symbol, timeframe, source)
+        self.recorded_candles = candles
+        if levels is not None:
+            self.levels = pickle.loads(levels)
+
+    def refresh_candles(self, limit=300):
+        self.raw_candles = self.recorded_candles
+        self.candles = to_frame(self.recorded_candles)
+        return self.candles
+
+    def get_24h_stats(self):
+        return None
+
+
+def replay_symbol(record, symbol):
+    """(analysis, (signal, score, indicators)) recomputed from a record's inputs, or None if it has none"""
+    entry = record['symbols'][symbol]
+    if entry.get('candles') is None:
+        return None
+    reader = ReplayReader(symbol, record['timeframe'], entry['candles'], record.get('source'), entry.get('levels'))
+    a = reader.analyze(entry['change_24h'], entry['now'])
+    return a, TradingStrategy().analyze_signal(a, a['price'])
+
+
+def differences(recorded, replayed, path=""):
+    """Paths where two results differ; floats must be identical (NaN equals NaN)"""
+    if isinstance(recorded, dict) and isinstance(replayed, dict):
+        diffs = []
+        for key in sorted(set(recorded) | set(replayed), key=str):
+            if key not in recorded or key not in replayed:
+                diffs.append(f"{path}.{key}")
+            else:
+                diffs.extend(differences(recorded[key], replayed[key], f"{path}.{key}"))
+        return diffs
+    if isinstance(recorded, (list, tuple)) and isinstance(replayed, (list, tuple)):
+        if len(recorded) != len(replayed):
+            return [path]
+        diffs = []
+        for i, (x, y) in enumerate(zip(recorded, replayed)):
+            diffs.extend(differences(x, y, f"{path}[{i}]"))
+        return diffs
+    if type(recorded) is not type(replayed):
+        return [path]
+    if isinstance(recorded, (float, np.floating)) and math.isnan(recorded) and math.isnan(replayed):
+        return []
+    return [] if recorded == replayed else [path]
+
+
+def replay(record, symbols=None):
+    """{symbol: differing paths} for every symbol with recorded inputs (empty list = identical)"""
+    results = {}
+    for symbol in symbols or record['symbols']:
+        entry = record['symbols'].get(symbol)
+        replayed = replay_symbol(record, symbol) if entry else None
+        if replayed is None:
+            continue
+        a, (signal, score, indicators) = replayed
+        results[symbol] = (differences(entry['analysis'], a, "analysis")
+                           + differences((entry['signal'], entry['score'], entry['indicators']),
+                                         (signal, score, indicators), "signal"))
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inspect and replay recorded analysis cycles")
+    parser.add_argument("command", choices=["list", "replay"])
+    parser.add_argument("directory", nargs="?", default=None, help="recording directory (default: config.RECORDER_DIR)")
+    parser.add_argument("--cycle", type=int, default=-1, help="cycle number from `list` (default: the last)")
+    parser.add_argument("--symbol", action="append", help="replay only this symbol (repeatable)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from config import RECORDER_DIR
+
+    args = parse_args()
+    records = list(iter_records(args.directory or RECORDER_DIR))
+    if not records:
+        print("No recorded cycles")
+        sys.exit(1)
+
+    if args.command == "list":
+        for i, record in enumerate(records):
+            fired = [f"{s} {e['signal']}" for s, e in record['symbols'].items() if e.get('fired')]
+            with_inputs = sum(1 for e in record['symbols'].values() if e.get('candles') is not None)
+            print(f"{i:5d}  {datetime.fromtimestamp(record['time']):%Y-%m-%d %H:%M:%S}  {record['source']} "
+                  f"{record['timeframe']}  {len(record['symbols'])} symbols ({with_inputs} with inputs)"
+                  + (f"  fired: {', '.join(fired)}" if fired else ""))
+        sys.exit(0)
+
+    record = records[args.cycle]
+    print(f"Cycle at {datetime.fromtimestamp(record['time']):%Y-%m-%d %H:%M:%S} "
+          f"({record['source']} {record['timeframe']})")
+    results = replay(record, args.symbol)
+    for symbol, diffs in results.items():
+        entry = record['symbols'][symbol]
+        status = "identical" if not diffs else "DIFFERS at " + ", ".join(diffs)
+        print(f"  {symbol}: {entry['signal']} (score {entry['score']}) - {status}")
+    skipped = [s for s in (args.symbol or record['symbols']) if s not in results]
+    if skipped:
+        print(f"  No inputs recorded for {', '.join(skipped)}")
+    sys.exit(1 if any(results.values()) else 0)
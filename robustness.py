@@ -0,0 +1,268 @@
+"""
+Walk-forward and Monte Carlo robustness analysis for the RSI backtest
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest import compute_rsi, simulate_trades
+from indicators import rsi_matrix
+from config import RSI_PERIOD
+
+PERIOD_GRID = (7, 9, 11, 14, 17, 21, 28)
+OVERSOLD_GRID = (20, 25, 30, 35)
+OVERBOUGHT_GRID = (65, 70, 75, 80)
+
+# Upper bound on resampled trade paths held in memory per Monte Carlo chunk
+MC_CHUNK_CELLS = 2_000_000
+
+
+def _compound(pnls):
+    return float(np.prod(1 + np.asarray(pnls, dtype=float)) - 1) if len(pnls) else 0.0
+
+
+def _map(func, tasks, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(func, tasks))
+
+
+def _walk_forward_window(task):
+    index, closes, rsi, split, oversold_grid, overbought_grid = task
+
+    best = None
+    for oversold in oversold_grid:
+        for overbought in overbought_grid:
+            if oversold >= overbought:
+                continue
+            trades, _ = simulate_trades(closes[:split], rsi[:split], oversold, overbought, start=0)
+            ret = _compound(trades.pnl)
+            if best is None or ret > best[0]:
+                best = (ret, oversold, overbought, len(trades))
+
+    train_return, oversold, overbought, train_trades = best
+    trades, _ = simulate_trades(closes[split:], rsi[split:], oversold, overbought, start=0)
+    pnls = trades.pnl
+
+    return {
+        'window': index,
+        'oversold': oversold,
+        'overbought': overbought,
+        'train_return': train_return,
+        'train_trades': train_trades,
+        'test_return': _compound(pnls),
+        'test_trades': len(pnls),
+        'test_pnls': pnls,
+    }
+
+
+def walk_forward(closes, train_bars, test_bars, period=RSI_PERIOD,
+                 oversold_grid=OVERSOLD_GRID, overbought_grid=OVERBOUGHT_GRID, workers=None):
+    """Optimise thresholds on rolling train windows and score them on the following test window.
+
+    RSI only looks backwards, so it is computed once over the whole series and sliced
+    per window. Windows are independent and are spread across worker processes.
+    """
+    closes = np.asarray(closes, dtype=float)
+    rsi = compute_rsi(closes, period)
+
+    tasks = []
+    start = period + 1
+    while start + train_bars + test_bars <= len(closes):
+        end = start + train_bars + test_bars
+        tasks.append((len(tasks), closes[start:end], rsi[start:end], train_bars,
+                      tuple(oversold_grid), tuple(overbought_grid)))
+        start += test_bars
+
+    windows = _map(_walk_forward_window, tasks, workers)
+
+    oos_pnls = np.concatenate([w['test_pnls'] for w in windows]) if windows else np.empty(0)
+    train_rate = np.mean([w['train_return'] for w in windows]) / train_bars if windows else 0.0
+    test_rate = np.mean([w['test_return'] for w in windows]) / test_bars if windows else 0.0
+
+    return {
+        'windows': windows,
+        'train_bars': train_bars,
+        'test_bars': test_bars,
+        'oos_return': _compound(oos_pnls),
+        'oos_trades': len(oos_pnls),
+        'oos_win_rate': (np.mean(oos_pnls > 0) * 100) if len(oos_pnls) else 0.0,
+        'profitable_windows': sum(1 for w in windows if w['test_return'] > 0),
+        # Out-of-sample return per bar relative to in-sample return per bar
+        'efficiency': (test_rate / train_rate) if train_rate > 0 else 0.0,
+    }
+
+
+def _monte_carlo_chunk(task):
+    pnls, iterations, method, seed = task
+    rng = np.random.default_rng(seed)
+    n = len(pnls)
+
+    if method == "shuffle":
+        idx = rng.permuted(np.broadcast_to(np.arange(n), (iterations, n)), axis=1)
+    else:
+        idx = rng.integers(0, n, size=(iterations, n))
+
+    equity = np.cumprod(1 + pnls[idx], axis=1)
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    max_drawdown = np.max(1 - equity / peaks, axis=1)
+
+    return equity[:, -1] - 1, max_drawdown
+
+
+def monte_carlo(pnls, iterations=10000, method="bootstrap", seed=42, workers=None):
+    """Resample (bootstrap) or reshuffle the trade sequence to get return and drawdown distributions"""
+    pnls = np.asarray(pnls, dtype=float)
+    if len(pnls) < 2:
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, min(-(-iterations // workers), MC_CHUNK_CELLS // len(pnls)))
+    sizes = [chunk] * (iterations // chunk)
+    if iterations % chunk:
+        sizes.append(iterations % chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    results = _map(_monte_carlo_chunk, [(pnls, s, method, sq) for s, sq in zip(sizes, seeds)], workers)
+    returns = np.concatenate([r[0] for r in results])
+    drawdowns = np.concatenate([r[1] for r in results])
+
+    equity = np.cumprod(1 + pnls)
+    actual_dd = float(np.max(1 - equity / np.maximum(np.maximum.accumulate(equity), 1.0)))
+    percentiles = (5, 25, 50, 75, 95)
+
+    return {
+        'method': method,
+        'iterations': len(returns),
+        'trades': len(pnls),
+        'actual_return': float(equity[-1] - 1),
+        'actual_drawdown': actual_dd,
+        'return_percentiles': dict(zip(percentiles, np.percentile(returns, percentiles))),
+        'drawdown_percentiles': dict(zip(percentiles, np.percentile(drawdowns, percentiles))),
+        'prob_loss': float(np.mean(returns < 0)),
+    }
+
+
+def _sensitivity_row(task):
+    closes, rsi, start, oversold_grid, overbought_grid = task
+    shape = (len(oversold_grid), len(overbought_grid))
+    returns = np.full(shape, np.nan)
+    trades = np.zeros(shape, dtype=np.int64)
+    win_rate = np.full(shape, np.nan)
+    for i, oversold in enumerate(oversold_grid):
+        for j, overbought in enumerate(overbought_grid):
+            if oversold >= overbought:
+                continue
+            ledger, _ = simulate_trades(closes, rsi, oversold, overbought, start=start)
+            pnls = ledger.pnl
+            returns[i, j] = _compound(pnls)
+            trades[i, j] = len(pnls)
+            if len(pnls):
+                win_rate[i, j] = np.mean(pnls > 0) * 100
+    return returns, trades, win_rate
+
+
+def sensitivity_surface(closes, periods=PERIOD_GRID, oversold_grid=OVERSOLD_GRID, overbought_grid=OVERBOUGHT_GRID,
+                        workers=None):
+    """Return, trade count and win rate for every period/oversold/overbought combination.
+
+    RSI for all periods comes from one rsi_matrix call. Every combination trades the same
+    bars, from the end of the longest period's warm-up, so the cells are comparable.
+    Periods are spread across worker processes. Arrays are indexed [period, oversold, overbought].
+    """
+    closes = np.asarray(closes, dtype=float)
+    periods = tuple(sorted(set(periods)))
+    rsi = rsi_matrix(closes, periods)
+    start = max(periods) + 1
+
+    rows = _map(_sensitivity_row, [(closes, rsi[k], start, tuple(oversold_grid), tuple(overbought_grid))
+                                   for k in range(len(periods))], workers)
+    returns = np.stack([r[0] for r in rows])
+    best = None
+    if np.isfinite(returns).any():
+        k, i, j = np.unravel_index(np.nanargmax(returns), returns.shape)
+        best = (periods[k], oversold_grid[i], overbought_grid[j])
+
+    return {
+        'periods': periods,
+        'oversold': tuple(oversold_grid),
+        'overbought': tuple(overbought_grid),
+        'bars': max(len(closes) - start, 0),
+        'returns': returns,
+        'trades': np.stack([r[1] for r in rows]),
+        'win_rate': np.stack([r[2] for r in rows]),
+        'best': best,
+    }
+
+
+def print_sensitivity(surface):
+    print("\n" + "=" * 50)
+    print("SENSITIVITY SURFACE")
+    print("=" * 50)
+
+    print(f"\nReturn (trades) over {surface['bars']} bars; rows oversold, columns overbought")
+    header = f"{'OS/OB':>6}" + "".join(f"{ob:>15}" for ob in surface['overbought'])
+    for k, period in enumerate(surface['periods']):
+        print(f"\nRSI {period}")
+        print(header)
+        for i, oversold in enumerate(surface['oversold']):
+            cells = []
+            for j in range(len(surface['overbought'])):
+                ret = surface['returns'][k, i, j]
+                cells.append(f"{'-':>15}" if np.isnan(ret) else
+                             f"{ret*100:>+8.2f}% ({surface['trades'][k, i, j]:>3})")
+            print(f"{oversold:>6}" + "".join(cells))
+
+    if surface['best'] is None:
+        print("\nNo valid combinations.")
+        return
+    period, oversold, overbought = surface['best']
+    k, i, j = (surface['periods'].index(period), surface['oversold'].index(oversold),
+               surface['overbought'].index(overbought))
+    print(f"\n🏆 Best: RSI {period}, {oversold}/{overbought}: {surface['returns'][k, i, j]*100:+.2f}% "
+          f"({surface['trades'][k, i, j]} trades, {surface['win_rate'][k, i, j]:.1f}% win rate)")
+
+
+def print_walk_forward(wf):
+    print("\n" + "=" * 50)
+    print("WALK-FORWARD ANALYSIS")
+    print("=" * 50)
+
+    if not wf['windows']:
+        print("\nNot enough data for a single train/test window.")
+        return
+
+    print(f"\nTrain: {wf['train_bars']} bars | Test: {wf['test_bars']} bars | Windows: {len(wf['windows'])}")
+    print(f"\n{'#':>3} {'OS/OB':>7} {'Train':>9} {'Test':>9} {'Trades':>7}")
+    for w in wf['windows']:
+        print(f"{w['window']:>3} {w['oversold']:>3}/{w['overbought']:<3} "
+              f"{w['train_return']*100:>+8.2f}% {w['test_return']*100:>+8.2f}% {w['test_trades']:>7}")
+
+    print(f"\n📊 Out-of-sample:")
+    print(f"Return: {wf['oos_return']*100:+.2f}%")
+    print(f"Trades: {wf['oos_trades']} | Win Rate: {wf['oos_win_rate']:.1f}%")
+    print(f"Profitable Windows: {wf['profitable_windows']}/{len(wf['windows'])}")
+    print(f"Walk-Forward Efficiency: {wf['efficiency']:.2f}")
+
+
+def print_monte_carlo(mc):
+    print("\n" + "=" * 50)
+    print("MONTE CARLO ANALYSIS")
+    print("=" * 50)
+
+    if mc is None:
+        print("\nNeed at least 2 trades for Monte Carlo analysis.")
+        return
+
+    print(f"\nMethod: {mc['method']} | Iterations: {mc['iterations']:,} | Trades: {mc['trades']}")
+    print(f"Actual Return: {mc['actual_return']*100:+.2f}% | Actual Max Drawdown: {mc['actual_drawdown']*100:.2f}%")
+
+    print(f"\n{'Pct':>4} {'Return':>10} {'Max DD':>9}")
+    for p in mc['return_percentiles']:
+        print(f"{p:>3}% {mc['return_percentiles'][p]*100:>+9.2f}% {mc['drawdown_percentiles'][p]*100:>8.2f}%")
+
+    print(f"\nProbability of Loss: {mc['prob_loss']*100:.1f}%")
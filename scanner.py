@@ -0,0 +1,120 @@
+"""
+Two-stage universe scanner: rank every pair from one bulk 24h ticker snapshot, then run the
+full analysis and strategy scoring only on the best-ranked candidates, within a time budget
+"""
+
+import heapq
+import time
+
+import numpy as np
+
+from market_breadth import STABLECOINS, EXCLUDED_SUFFIXES
+from instrumentation import timed
+
+
+def _zscore(values):
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+
+def rank_universe(tickers, quote="USDT", min_quote_volume=0.0, min_range=0.0, weights=(1.0, 1.0, 1.0)):
+    """Pairs that pass the volume and volatility floors, best first.
+
+    Each pair scores the weighted sum of its z-scores for log 24h quote volume, 24h range
+    (high-low as % of price) and absolute 24h change, relative to the rest of the universe.
+    """
+    rows = []
+    symbols = []
+    for t in tickers:
+        symbol = t['symbol']
+        if not symbol.endswith(quote) or symbol in STABLECOINS or symbol.endswith(EXCLUDED_SUFFIXES):
+            continue
+        symbols.append(symbol)
+        rows.append((t['openPrice'], t['lastPrice'], t.get('highPrice') or 0, t.get('lowPrice') or 0,
+                     t['quoteVolume']))
+    if not rows:
+        return []
+
+    opens, lasts, highs, lows, volumes = np.array(rows, dtype=float).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (lasts / opens - 1) * 100
+        # Bulk tickers without high/low (or a flat day) fall back to the size of the move
+        day_range = np.where(highs > lows, (highs - lows) / lasts * 100, np.abs(change))
+    keep = (opens > 0) & (lasts > 0) & (volumes >= min_quote_volume) & (day_range >= min_range)
+    if not keep.any():
+        return []
+    index = np.flatnonzero(keep)
+    change, day_range, volumes = change[keep], day_range[keep], volumes[keep]
+
+    w_volume, w_range, w_change = weights
+    score = (w_volume * _zscore(np.log10(volumes)) + w_range * _zscore(day_range)
+             + w_change * _zscore(np.abs(change)))
+    order = np.argsort(-score, kind='stable')
+    return [{'symbol': symbols[index[i]], 'score': float(score[i]), 'change': float(change[i]),
+             'range': float(day_range[i]), 'quote_volume': float(volumes[i])} for i in order]
+
+
+class UniverseScanner:
+    """Picks what to analyse each cycle and keeps the strongest signals"""
+
+    def __init__(self, source, top_k=40, top_n=10, budget=30.0, min_quote_volume=0.0, min_range=0.0,
+                 weights=(1.0, 1.0, 1.0), quote="USDT"):
+        self.source = source
+        self.top_k = top_k
+        self.top_n = top_n
+        self.budget = budget
+        self.min_quote_volume = min_quote_volume
+        self.min_range = min_range
+        self.weights = weights
+        self.quote = quote
+        self.ranked = []
+        self.last_scan = {}
+
+    def rank(self):
+        """Refresh the ranking; keeps the previous one if the bulk request fails"""
+        with timed("scanner_rank"):
+            try:
+                tickers = self.source.tickers_24h()
+            except Exception as e:
+                print(f"Universe ranking failed, keeping the previous one: {e}")
+                tickers = None
+            if tickers is not None:
+                self.ranked = rank_universe(tickers, self.quote, self.min_quote_volume, self.min_range, self.weights)
+        return self.ranked
+
+    def scan(self, analyse, score, budget=None):
+        """Analyse the top-K candidates, best ranked first, until the budget runs out.
+
+        `analyse(symbol, change_24h)` returns an analysis or None and `score(analysis)`
+        returns (signal, score, indicators). `budget` overrides the scanner's own for this
+        scan. Returns the top-N [(symbol, analysis)] by
+        strategy score, strongest first.
+        """
+        budget = self.budget if budget is None else budget
+        start = time.perf_counter()
+        candidates = self.rank()[:self.top_k]
+        heap = []
+        analysed = 0
+        for rank, candidate in enumerate(candidates):
+            if time.perf_counter() - start > budget:
+                break
+            a = analyse(candidate['symbol'], candidate['change'])
+            analysed += 1
+            if not a:
+                continue
+            _, strength, _ = score(a)
+            # The prefilter rank breaks ties between equal strategy scores
+            item = (strength, -rank, candidate['symbol'], a)
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+        self.last_scan = {
+            'universe': len(self.ranked),
+            'candidates': len(candidates),
+            'analysed': analysed,
+            'over_budget': analysed < len(candidates),
+            'seconds': time.perf_counter() - start,
+        }
+        return [(symbol, a) for _, _, symbol, a in sorted(heap, key=lambda item: item[:2], reverse=True)]
@@ -0,0 +1,127 @@
+"""
+Candle-close-aligned job scheduler
+"""
+
+import time
+
+TIMEFRAME_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800, "12h": 43200,
+    "1d": 86400,
+}
+
+
+def timeframe_seconds(timeframe):
+    if timeframe in TIMEFRAME_SECONDS:
+        return TIMEFRAME_SECONDS[timeframe]
+    # Bybit style intervals are plain minutes ("15", "60")
+    return int(timeframe) * 60
+
+
+def last_closed_candle(now, timeframe):
+    """Open time in ms of the most recent candle that has fully closed at `now`"""
+    step = timeframe_seconds(timeframe)
+    return int((now // step - 1) * step * 1000)
+
+
+def next_boundary(now, interval, delay=0):
+    """First time strictly after `now` that is `delay` seconds past a multiple of `interval`"""
+    return ((now - delay) // interval + 1) * interval + delay
+
+
+class ServerClock:
+    """Local clock corrected by the exchange server time offset"""
+
+    def __init__(self, fetch_server_time=None):
+        self.fetch_server_time = fetch_server_time
+        self.offset = 0.0
+        self.synced_at = None
+
+    def sync(self):
+        if not self.fetch_server_time:
+            return
+        sent = time.time()
+        server_time = self.fetch_server_time()
+        received = time.time()
+        if server_time is None:
+            return
+        # Assume the server stamped the response halfway through the round trip
+        self.offset = server_time - (sent + received) / 2
+        self.synced_at = received
+        print(f"Clock synced (offset {self.offset*1000:+.0f}ms)")
+
+    def now(self):
+        return time.time() + self.offset
+
+
+class Job:
+    def __init__(self, name, func, interval, delay=0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.delay = delay
+        self.next_run = 0
+        self.last_run = None
+        self.runs = 0
+        self.missed = 0
+        self.overruns = 0
+        self.deadline = None  # server time of the job's next slot, while it runs
+
+
+class Scheduler:
+    """Runs jobs on their own cadence, aligned to interval boundaries on the server clock.
+
+    A job that was due while the process was busy or asleep runs as soon as possible
+    (once, even if several of its slots were missed) instead of waiting for its next slot.
+    Jobs due at the same moment run in the order they were added.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or ServerClock()
+        self.jobs = []
+
+    def add_job(self, name, func, interval, delay=0, run_immediately=False):
+        job = Job(name, func, interval, delay)
+        now = self.clock.now()
+        job.next_run = now if run_immediately else next_boundary(now, interval, delay)
+        self.jobs.append(job)
+        return job
+
+    def run_pending(self):
+        for job in self.jobs:
+            now = self.clock.now()
+            if now < job.next_run:
+                continue
+
+            late = now - job.next_run
+            if late >= job.interval:
+                skipped = int(late // job.interval)
+                job.missed += skipped
+                print(f"Job '{job.name}' missed {skipped} run(s), catching up")
+
+            job.deadline = next_boundary(now, job.interval, job.delay)
+            try:
+                job.func()
+            except Exception as e:
+                print(f"Job '{job.name}' error: {e}")
+            if self.clock.now() > job.deadline:
+                job.overruns += 1
+                print(f"Job '{job.name}' overran its {job.interval}s slot")
+            job.deadline = None
+
+            job.runs += 1
+            job.last_run = now
+            job.next_run = next_boundary(self.clock.now(), job.interval, job.delay)
+
+    def seconds_until_next(self):
+        if not self.jobs:
+            return None
+        return max(0.0, min(job.next_run for job in self.jobs) - self.clock.now())
+
+    def run_forever(self):
+        while True:
+            self.run_pending()
+            wait = self.seconds_until_next()
+            if wait is None:
+                return
+            time.sleep(wait)
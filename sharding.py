@@ -0,0 +1,218 @@
+"""
+Coordinator/worker mode: symbols are sharded across worker processes by consistent hashing
+"""
+
+import bisect
+import hashlib
+import multiprocessing as mp
+import queue
+import time
+
+from bybit_rsi_bot import SignalBot
+from market_reader import MarketReader
+from deadline import Deadline
+from config import TIMEFRAME, SHARD_CYCLE_TIMEOUT
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring; adding or removing a node only moves that node's keys"""
+
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            bisect.insort(self._points, point)
+            self._owners[point] = node
+
+    def remove(self, node):
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            self._points.remove(point)
+            del self._owners[point]
+
+    def get(self, key):
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+    def assign(self, keys):
+        shards = {}
+        for key in keys:
+            shards.setdefault(self.get(key), []).append(key)
+        return shards
+
+
+def _worker_main(worker_id, timeframe, commands, results):
+    """Worker loop. Owns a MarketReader (and so a candle buffer) per symbol in its shard."""
+    markets = {}
+    while True:
+        command = commands.get()
+        if command is None:
+            return
+
+        kind = command[0]
+        if kind == 'assign':
+            owned = set(command[1])
+            for symbol in list(markets):
+                if symbol not in owned:
+                    del markets[symbol]
+            for symbol in owned:
+                if symbol not in markets:
+                    markets[symbol] = MarketReader(symbol, timeframe)
+
+        elif kind == 'cycle':
+            cycle_id, deadline, clock_offset = command[1], Deadline(command[2]), command[3]
+            for symbol, market in markets.items():
+                # Symbols not reached by the deadline send no result; the coordinator marks them late
+                if deadline.expired():
+                    break
+                try:
+                    with deadline.active():
+                        # Same server-corrected clock as the coordinator, so candles close at the same moment
+                        analysis = market.analyze(now=time.time() + clock_offset)
+                except Exception as e:
+                    print(f"[worker {worker_id}] {symbol} error: {e}")
+                    analysis = None
+                if analysis is None and deadline.expired():
+                    break
+                results.put((worker_id, cycle_id, symbol, analysis))
+            results.put((worker_id, cycle_id, None, None))
+
+
+class ShardedSignalBot(SignalBot):
+    """SignalBot whose analysis runs in N worker processes.
+
+    The coordinator keeps everything stateful that must be single: scheduling, signal
+    de-duplication, the trade journal and the Telegram dispatcher. Each cycle it checks
+    worker liveness, replaces dead workers (their symbols move to the survivors until the
+    replacement joins the ring), then asks every worker for its shard.
+    """
+
+    def __init__(self, workers, symbols=None):
+        super().__init__(symbols)
+        self.worker_count = workers
+        # By now the Telegram dispatcher, metrics server and preload threads are running, and a
+        # fork copies only the calling thread, along with any lock the others held at the time.
+        # Workers are forked from a clean single-threaded forkserver instead (spawned on Windows)
+        if "forkserver" in mp.get_all_start_methods():
+            self.ctx = mp.get_context("forkserver")
+            self.ctx.set_forkserver_preload(["sharding"])
+        else:
+            self.ctx = mp.get_context("spawn")
+        self.results = self.ctx.Queue()
+        self.ring = HashRing()
+        self.workers = {}
+        self.assignments = {}
+        self.cycle_id = 0
+        self._next_worker = 0
+
+        for _ in range(workers):
+            self._spawn_worker()
+        self.rebalance()
+
+    def _spawn_worker(self):
+        worker_id = f"worker-{self._next_worker}"
+        self._next_worker += 1
+        commands = self.ctx.Queue()
+        process = self.ctx.Process(target=_worker_main, name=worker_id,
+                                   args=(worker_id, TIMEFRAME, commands, self.results), daemon=True)
+        process.start()
+        self.workers[worker_id] = (process, commands)
+        self.ring.add(worker_id)
+        return worker_id
+
+    def _retire_worker(self, worker_id):
+        process, commands = self.workers.pop(worker_id)
+        self.ring.remove(worker_id)
+        self.assignments.pop(worker_id, None)
+        if process.is_alive():
+            commands.put(None)
+            process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    def scale(self, workers):
+        """Grow or shrink the pool at runtime"""
+        while len(self.workers) < workers:
+            self._spawn_worker()
+        while len(self.workers) > workers:
+            self._retire_worker(sorted(self.workers)[-1])
+        self.worker_count = workers
+        self.rebalance()
+
+    def rebalance(self):
+        """Send each worker its shard if it changed"""
+        shards = self.ring.assign(self.symbols)
+        for worker_id, (_, commands) in self.workers.items():
+            shard = sorted(shards.get(worker_id, []))
+            if self.assignments.get(worker_id) != shard:
+                commands.put(('assign', shard))
+                self.assignments[worker_id] = shard
+        print(f"Shards: " + ", ".join(f"{w}={len(s)}" for w, s in sorted(self.assignments.items())))
+
+    def check_workers(self):
+        dead = [w for w, (process, _) in self.workers.items() if not process.is_alive()]
+        if not dead:
+            return
+        for worker_id in dead:
+            print(f"{worker_id} died (exit code {self.workers[worker_id][0].exitcode}), replacing it")
+            self._retire_worker(worker_id)
+        while len(self.workers) < self.worker_count:
+            self._spawn_worker()
+        self.rebalance()
+
+    def collect_analyses(self, deadline=None):
+        deadline = deadline or self.cycle_deadline()
+        self.check_workers()
+        self.cycle_id += 1
+        budget = min(deadline.remaining(), SHARD_CYCLE_TIMEOUT)
+        for _, commands in self.workers.values():
+            commands.put(('cycle', self.cycle_id, budget, self.clock.offset))
+
+        results = {symbol: None for symbol in self.symbols}
+        answered = set()
+        waiting = set(self.workers)
+        wait_until = time.monotonic() + budget
+        while waiting:
+            remaining = wait_until - time.monotonic()
+            if remaining <= 0:
+                print(f"Cycle {self.cycle_id}: no answer from {', '.join(sorted(waiting))}")
+                break
+            try:
+                worker_id, cycle_id, symbol, analysis = self.results.get(timeout=min(remaining, 1))
+            except queue.Empty:
+                if any(not self.workers[w][0].is_alive() for w in waiting if w in self.workers):
+                    break
+                continue
+            if cycle_id != self.cycle_id:
+                continue  # late answer from an earlier cycle
+            if symbol is None:
+                waiting.discard(worker_id)
+            else:
+                results[symbol] = analysis
+                answered.add(symbol)
+                if analysis:
+                    self.remember_analysis(symbol, analysis)
+        self.late_symbols = [s for s in self.symbols if s not in answered]
+        return results
+
+    def shutdown(self):
+        for worker_id in list(self.workers):
+            self._retire_worker(worker_id)
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.shutdown()
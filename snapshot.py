@@ -0,0 +1,75 @@
+"""
+Compact on-disk snapshots of the bot's warm state, for fast restarts
+"""
+
+import os
+import pickle
+import time
+import zlib
+
+import numpy as np
+
+from startup import LazyModule
+
+pd = LazyModule("pandas")
+
+SNAPSHOT_VERSION = 1
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+
+
+def pack_candles(df):
+    """Candle frame -> dict of plain numpy arrays (only the columns analysis uses)"""
+    return {c: df[c].to_numpy(dtype=np.int64 if c in ('timestamp', 'close_time') else np.float64)
+            for c in CANDLE_COLUMNS if c in df}
+
+
+def unpack_candles(arrays):
+    return pd.DataFrame({c: arrays[c] for c in CANDLE_COLUMNS if c in arrays})
+
+
+def save_snapshot(path, state):
+    """Write `state` atomically: a crash mid-write leaves the previous snapshot intact"""
+    state = dict(state, version=SNAPSHOT_VERSION, created=time.time())
+    data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_snapshot(path, max_age=None, timeframe=None):
+    """The saved state, or None if it is missing, unreadable, from another version/timeframe or too old"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.loads(zlib.decompress(f.read()))
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if state.get('version') != SNAPSHOT_VERSION:
+        print("Ignoring snapshot from another version")
+        return None
+    if timeframe is not None and state.get('timeframe') != timeframe:
+        print(f"Ignoring snapshot for timeframe {state.get('timeframe')}")
+        return None
+    age = time.time() - state.get('created', 0)
+    if max_age is not None and age > max_age:
+        print(f"Ignoring snapshot from {age / 3600:.1f}h ago")
+        return None
+    return state
+
+
+def validate_candles(candles, prices, tolerance):
+    """Symbols whose buffered last close is within `tolerance` of the live price"""
+    valid = set()
+    for symbol, arrays in candles.items():
+        price = prices.get(symbol)
+        if not price or not len(arrays.get('close', ())):
+            continue
+        if abs(arrays['close'][-1] / price - 1) <= tolerance:
+            valid.add(symbol)
+    return valid
@@ -0,0 +1,125 @@
+"""
+Start-up helpers: lazily imported modules, parallel init tasks and a start-up time report
+
+    python startup.py                     # import-time report for bybit_rsi_bot
+    python startup.py backtest --top 15
+"""
+
+import argparse
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+IMPORTED_AT = time.perf_counter()
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self.__dict__['_name'])
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def preload(*names):
+    """Import modules in a background thread, e.g. while start-up waits on the network"""
+    def load():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Preload of {name} failed: {e}")
+    thread = threading.Thread(target=load, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+class StartupReport:
+    """Wall-clock time of each start-up phase, printed once the bot is ready"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def run_parallel(self, tasks):
+        """Run {name: callable} concurrently; returns {name: result or None if it raised}"""
+        results = {}
+        if not tasks:
+            return results
+
+        def timed_task(name, func):
+            with self.phase(name):
+                return func()
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(timed_task, name, func) for name, func in tasks.items()}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Start-up task {name} failed: {e}")
+                    results[name] = None
+        return results
+
+    def print(self):
+        if not self.enabled:
+            return
+        print(f"\n⏱️ Start-up: ready {time.perf_counter() - IMPORTED_AT:.2f}s after the bot modules loaded")
+        for name, seconds in self.phases:
+            print(f"   {name:20s} {seconds*1000:8.0f} ms")
+        heavy = [m for m in ("pandas", "matplotlib", "pybit") if m in sys.modules]
+        print(f"   heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+
+def import_report(module, top=20):
+    """Cumulative import time per module (from python -X importtime) in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            rows.append((int(match.group(2)), int(match.group(1)), len(match.group(3)) // 2, match.group(4)))
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time report for a module")
+    parser.add_argument("module", nargs="?", default="bybit_rsi_bot")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = import_report(args.module, args.top)
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative, own, depth, name in rows:
+        print(f"{cumulative/1000:10.1f}ms {own/1000:8.1f}ms  {'  ' * depth}{name}")
@@ -0,0 +1,338 @@
+"""
+Telegram client and a non-blocking outbound dispatcher
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+from instrumentation import track_request
+from config import TELEGRAM_API_URL
+
+TELEGRAM_MAX_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n"
+
+
+class MessageRejected(Exception):
+    """Telegram refused the message itself (a 4xx other than 429); sending it again cannot help"""
+
+
+def split_message(text, limit=TELEGRAM_MAX_LENGTH):
+    """Parts of at most `limit` characters, cut between lines where possible"""
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + 1 + len(line) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = current + "\n" + line if current else line
+    if current or not parts:
+        parts.append(current)
+    return parts
+
+
+class TelegramBot:
+    def __init__(self, bot_token, chat_id):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.api_url = f"{TELEGRAM_API_URL}/bot{bot_token}"
+        self._session = requests.Session()
+        self._session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    def post(self, text, parse_mode="HTML", timeout=30):
+        """Single delivery attempt. Returns (delivered, retry_after seconds or None); raises
+        MessageRejected when Telegram refuses the message itself"""
+        url = f"{self.api_url}/sendMessage"
+        payload = {"chat_id": self.chat_id, "text": text, "parse_mode": parse_mode}
+        with track_request("telegram/sendMessage") as request:
+            response = self._session.post(url, json=payload, timeout=timeout)
+            if response.status_code != 200:
+                request.error()
+        if response.status_code == 200:
+            return True, None
+        if response.status_code == 429:
+            return False, int(response.json().get("parameters", {}).get("retry_after", 60))
+        if 400 <= response.status_code < 500:
+            raise MessageRejected(f"Telegram error {response.status_code}: {response.text[:200]}")
+        print(f"Telegram error {response.status_code}: {response.text[:200]}")
+        return False, None
+
+    def send_message(self, text, parse_mode="HTML", retries=3):
+        for attempt in range(retries):
+            try:
+                delivered, retry_after = self.post(text, parse_mode)
+                if delivered:
+                    return True
+                elif retry_after:
+                    print(f"Rate limited. Waiting {retry_after}s...")
+                    time.sleep(retry_after)
+            except MessageRejected as e:
+                print(e)
+                return False
+            except requests.exceptions.Timeout:
+                print(f"Telegram timeout (attempt {attempt+1}/{retries}), retrying...")
+                time.sleep(5)
+            except Exception as e:
+                print(f"Telegram error: {e}")
+                time.sleep(2)
+        print("Failed to send Telegram message after retries")
+        return False
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        self._refill()
+        pause = max(0.0, self.paused_until - time.monotonic())
+        if self.tokens >= 1:
+            return pause
+        return max(pause, (1 - self.tokens) / self.rate)
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        self.paused_until = time.monotonic() + seconds
+        self.tokens = 0
+
+
+class TelegramDispatcher:
+    """Queues outbound messages and delivers them from a background thread.
+
+    Sending never blocks the caller. Delivery follows a token bucket (Telegram allows
+    roughly one message per second per chat), honours 429 retry_after without
+    dropping anything, and merges queued messages into as few sends as fit in
+    Telegram's 4096 character limit; longer messages are split when queued. Every
+    message is written to an append-only outbox file before it is queued and
+    acknowledged there once delivered, so undelivered messages survive a restart.
+    A message Telegram rejects outright is moved to the dead-letter file instead of
+    holding up the ones behind it.
+    """
+
+    def __init__(self, bot, outbox_file="telegram_outbox.jsonl", rate=1.0, burst=1, coalesce_window=1.0,
+                 dead_letter_file=None):
+        self.bot = bot
+        self.outbox_file = outbox_file
+        self.dead_letter_file = dead_letter_file or outbox_file + ".dead"
+        self.bucket = TokenBucket(rate, burst)
+        self.coalesce_window = coalesce_window
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._next_id = 0
+        self._outbox_lock = threading.Lock()
+        self._closed = False
+        self._in_flight = 0
+        self._isolate = 0  # messages to send one at a time after a merged send was rejected
+
+        self.sent = 0
+        self.delivered_messages = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.dead_letters = 0
+
+        self._restore_outbox()
+        self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _restore_outbox(self):
+        if not os.path.exists(self.outbox_file):
+            return
+        pending = {}
+        try:
+            with open(self.outbox_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if 'ack' in entry:
+                        for msg_id in entry['ack']:
+                            pending.pop(msg_id, None)
+                    else:
+                        pending[entry['id']] = entry
+        except OSError as e:
+            print(f"Could not read Telegram outbox: {e}")
+            return
+
+        for entry in pending.values():
+            self._queue.append((entry['id'], entry['text'], entry.get('parse_mode', 'HTML')))
+        self._next_id = max([e['id'] for e in pending.values()], default=-1) + 1
+        self._rewrite_outbox()
+        if pending:
+            print(f"Restored {len(pending)} undelivered Telegram message(s)")
+
+    def _append_outbox(self, entry):
+        with self._outbox_lock:
+            with open(self.outbox_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _rewrite_outbox(self):
+        """Compact the outbox down to the messages still queued"""
+        with self._outbox_lock:
+            tmp = self.outbox_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for msg_id, text, parse_mode in list(self._queue):
+                    f.write(json.dumps({'id': msg_id, 'text': text, 'parse_mode': parse_mode},
+                                       ensure_ascii=False) + "\n")
+            os.replace(tmp, self.outbox_file)
+
+    def send(self, text, parse_mode="HTML"):
+        with self._cond:
+            for part in split_message(text):
+                msg_id = self._next_id
+                self._next_id += 1
+                self._append_outbox({'id': msg_id, 'text': part, 'parse_mode': parse_mode})
+                self._queue.append((msg_id, part, parse_mode))
+            self._cond.notify()
+        return True
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth(),
+            'sent': self.sent,
+            'delivered_messages': self.delivered_messages,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'rate_limited': self.rate_limited,
+            'dead_letters': self.dead_letters,
+        }
+
+    def _take_batch(self):
+        """Pop the longest run of queued messages that fits in one Telegram message"""
+        batch = []
+        length = 0
+        parse_mode = self._queue[0][2]
+        if self._isolate:
+            self._isolate -= 1
+            return [self._queue.popleft()]
+        while self._queue:
+            _, text, mode = self._queue[0]
+            extra = len(text) + (len(COALESCE_SEPARATOR) if batch else 0)
+            if batch and (mode != parse_mode or length + extra > TELEGRAM_MAX_LENGTH):
+                break
+            batch.append(self._queue.popleft())
+            length += extra
+        return batch
+
+    def _run(self):
+        backoff = 1
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+
+            # Let a burst (summary followed by several signals) build up before sending
+            time.sleep(self.coalesce_window)
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._cond:
+                if not self._queue:
+                    continue
+                batch = self._take_batch()
+                self._in_flight = len(batch)
+
+            ids = [msg_id for msg_id, _, _ in batch]
+            text = COALESCE_SEPARATOR.join(t for _, t, _ in batch)
+            parse_mode = batch[0][2]
+
+            self.bucket.consume()
+            rejected = None
+            try:
+                delivered, retry_after = self.bot.post(text, parse_mode)
+            except MessageRejected as e:
+                delivered, retry_after, rejected = False, None, e
+            except Exception as e:
+                print(f"Telegram error: {e}")
+                delivered, retry_after = False, None
+
+            with self._cond:
+                self._in_flight = 0
+                if rejected and len(batch) == 1:
+                    self._dead_letter(batch[0], rejected)
+                    continue
+                if rejected:
+                    # Any of the merged messages may be the bad one; retry them one by one
+                    self._isolate = len(batch)
+                    self._queue.extendleft(reversed(batch))
+                    continue
+                if delivered:
+                    self.sent += 1
+                    self.delivered_messages += len(ids)
+                    self.coalesced += len(ids) - 1
+                    backoff = 1
+                    self._append_outbox({'ack': ids})
+                    if not self._queue:
+                        self._rewrite_outbox()
+                    continue
+
+                # Put the original messages back at the front, in order
+                self._queue.extendleft(reversed(batch))
+
+            if retry_after:
+                self.rate_limited += 1
+                print(f"Telegram rate limited, pausing {retry_after}s")
+                self.bucket.pause(retry_after)
+            else:
+                self.failures += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _dead_letter(self, message, error):
+        msg_id, text, parse_mode = message
+        print(f"Dropping Telegram message {msg_id}: {error}")
+        self.dead_letters += 1
+        try:
+            with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'id': msg_id, 'text': text, 'parse_mode': parse_mode, 'error': str(error),
+                                    'time': time.time()}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Could not write Telegram dead letter: {e}")
+        self._append_outbox({'ack': [msg_id]})
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been delivered (for shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue_depth():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def close(self, timeout=10):
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
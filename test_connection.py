@@ -4,8 +4,10 @@ Test script to verify Bybit API connection and bot setup
 Run this before starting the live bot!
 """
 
+import time
 from pybit.unified_trading import HTTP
-from config import API_KEY, API_SECRET, SYMBOLS, TESTNET
+from config import API_KEY, API_SECRET, SYMBOLS, TESTNET, TIMEFRAME
+from data_sources import get_source
 
 SYMBOL = SYMBOLS[0] if SYMBOLS else "BTCUSDT"
 
@@ -15,6 +17,8 @@ def test_connection():
     print("=" * 50)
     print(f"Environment: {'TESTNET' if TESTNET else 'LIVE'}")
     print(f"Symbol: {SYMBOL}")
+    source = get_source()
+    print(f"Market data: {source.name} ({source.base_url})")
     print()
 
     try:
@@ -29,11 +33,11 @@ def test_connection():
 
         # Test 1: Get server time
         print("⏱️  Testing server time...")
-        response = session.get_server_time()
-        if response['retCode'] == 0:
-            print(f"✅ Server time: {response['result']['timeSecond']}")
+        server_time = source.server_time()
+        if server_time is not None:
+            print(f"✅ Server time: {int(server_time)} (clock offset {server_time - time.time():+.2f}s)")
         else:
-            print(f"❌ Failed: {response['retMsg']}")
+            print(f"❌ Failed to read {source.name} server time")
 
         # Test 2: Get account info
         print("\n💰 Testing account info...")
@@ -51,34 +55,25 @@ def test_connection():
 
         # Test 3: Get ticker info
         print(f"\n📊 Testing market data for {SYMBOL}...")
-        response = session.get_tickers(
-            category="linear",
-            symbol=SYMBOL
-        )
-        if response['retCode'] == 0:
-            ticker = response['result']['list'][0]
+        price = source.prices([SYMBOL]).get(SYMBOL)
+        stats = source.ticker_24h(SYMBOL)
+        if price is not None and stats:
             print(f"✅ Market data retrieved!")
-            print(f"   Current Price: {ticker['lastPrice']} USDT")
-            print(f"   24h Change: {ticker['price24hPcnt']}")
-            print(f"   24h Volume: {ticker['turnover24h']}")
+            print(f"   Current Price: {price} USDT")
+            print(f"   24h Change: {stats['price_change_percent']:.2f}%")
+            print(f"   24h Volume: {stats['quote_volume']:,.0f} USDT")
         else:
-            print(f"❌ Failed: {response['retMsg']}")
+            print(f"❌ Failed to read {SYMBOL} ticker from {source.name}")
 
         # Test 4: Get klines
         print(f"\n📈 Testing kline data...")
-        response = session.get_kline(
-            category="linear",
-            symbol=SYMBOL,
-            interval="15",
-            limit=20
-        )
-        if response['retCode'] == 0:
-            klines = response['result']['list']
+        candles = source.klines(SYMBOL, TIMEFRAME, limit=20)
+        if candles is not None and len(candles):
             print(f"✅ Kline data retrieved!")
-            print(f"   Candles fetched: {len(klines)}")
-            print(f"   Latest close: {klines[0][4]} USDT")
+            print(f"   Candles fetched: {len(candles)}")
+            print(f"   Latest close: {candles['close'][-1]} USDT")
         else:
-            print(f"❌ Failed: {response['retMsg']}")
+            print(f"❌ Failed to read {SYMBOL} {TIMEFRAME} candles from {source.name}")
 
         # Test 5: Get positions
         print(f"\n📍 Testing position data...")
@@ -0,0 +1,235 @@
+"""
+Bracket lifecycle against mock_exchange.py: prices are pinned with POST /_price and the
+executor is polled by hand instead of from its tracker thread
+"""
+
+import copy
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution import BracketExecutor, BybitClient, OrderError, order_ladder
+from mock_exchange import start_mock_exchange
+
+SYMBOL = "BTCUSDT"
+SECRET = "test-secret"
+PRICE = 100.0
+
+
+class FaultyClient(BybitClient):
+    """Fails create_order for the leg whose link id ends with `leg`, before or after sending it"""
+
+    def __init__(self, *args, leg=None, fault=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.leg = leg
+        self.fault = fault
+        self.lookup_fails = False
+
+    def create_order(self, order):
+        if self.leg and order['orderLinkId'].endswith("-" + self.leg):
+            if self.fault == 'rejected':
+                raise OrderError(110017, "mock rejection")
+            super().create_order(order)
+            raise requests.ConnectionError("connection reset after send")
+        return super().create_order(order)
+
+    def order(self, symbol, link_id):
+        if self.lookup_fails:
+            raise requests.ConnectionError("lookup failed")
+        return super().order(symbol, link_id)
+
+
+@pytest.fixture
+def server():
+    srv = start_mock_exchange("127.0.0.1", 0, symbols=[SYMBOL], api_secret=SECRET)
+    srv.exchange.set_price(SYMBOL, PRICE)
+    yield srv
+    srv.shutdown()
+
+
+def make_executor(server, **faults):
+    client = FaultyClient(server.url, "key", SECRET, **faults)
+    executor = BracketExecutor(client, risk_usdt=10, max_position_usdt=1000, workers=5)
+    client.load_instruments()
+    return executor
+
+
+def set_price(server, price):
+    requests.post(server.url + "/_price", json={"symbol": SYMBOL, "price": price}, timeout=5).raise_for_status()
+
+
+def ladder(sl, tp1, tp2, tp3):
+    return {'sl': sl, 'partials': [
+        {'target': tp1, 'pct': 25, 'action': 'move_sl_to_breakeven'},
+        {'target': tp2, 'pct': 50, 'action': 'trail_stop'},
+        {'target': tp3, 'pct': 25, 'action': 'close_all'},
+    ]}
+
+
+def open_bracket(executor, sl_tp, signal_type="BUY"):
+    bracket_id = executor.open_bracket(SYMBOL, signal_type, PRICE, sl_tp)
+    assert bracket_id
+    bracket = executor.brackets[bracket_id]
+    deadline = time.monotonic() + 5
+    while bracket['state'] == 'submitting' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return bracket
+
+
+def wait_for(condition, timeout=5):
+    """The bracket is marked failed before its unwind requests have gone out"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def mock_order(server, bracket, leg):
+    return server.exchange.orders[bracket['legs'][leg]['link_id']]
+
+
+def position(server):
+    return server.exchange.positions.get(SYMBOL, 0.0)
+
+
+def saved_while_submitting(executor, bracket):
+    """Snapshot of a bracket as if the bot stopped before any of its acks came back"""
+    saved = copy.deepcopy(executor.state())
+    saved[bracket['id']]['state'] = 'submitting'
+    for info in saved[bracket['id']]['legs'].values():
+        info['status'] = 'Submitting'
+    return saved
+
+
+def test_tp1_moves_stop_to_breakeven_and_tp2_trails(server):
+    executor = make_executor(server)
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+    assert bracket['state'] == 'open'
+    assert position(server) == 4
+
+    set_price(server, 102.6)
+    executor.poll()
+    assert bracket['legs']['tp1']['status'] == 'Filled'
+    assert bracket['remaining'] == 3
+    assert float(mock_order(server, bracket, 'sl')['triggerPrice']) == pytest.approx(PRICE)
+    assert float(mock_order(server, bracket, 'sl')['qty']) == 3
+
+    set_price(server, 105.1)
+    executor.poll()
+    assert bracket['remaining'] == 1
+    assert float(mock_order(server, bracket, 'sl')['triggerPrice']) == pytest.approx(102.5)
+    assert float(mock_order(server, bracket, 'sl')['qty']) == 1
+
+    set_price(server, 106.3)
+    executor.poll()
+    assert bracket['state'] == 'closed'
+    assert position(server) == 0
+    assert mock_order(server, bracket, 'sl')['orderStatus'] == 'Cancelled'
+
+
+def test_stop_fill_cancels_targets(server):
+    executor = make_executor(server)
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+
+    set_price(server, 97.4)
+    executor.poll()
+    assert bracket['state'] == 'stopped'
+    assert position(server) == 0
+    assert all(mock_order(server, bracket, leg)['orderStatus'] == 'Cancelled' for leg in ('tp1', 'tp2', 'tp3'))
+
+
+def test_target_clamped_below_tp1_is_taken_first():
+    # Resistance 0.6% above price clamps TP3 under TP1
+    partials = order_ladder("BUY", PRICE, ladder(97.5, 102.5, 105.0, 100.4))
+    assert [p['target'] for p in partials] == [100.4, 102.5, 105.0]
+    assert [p['action'] for p in partials] == ['move_sl_to_breakeven', 'trail_stop', 'close_all']
+    assert order_ladder("BUY", PRICE, ladder(97.5, 102.5, 102.5, 105.0)) is None
+    assert order_ladder("BUY", PRICE, ladder(97.5, 99.8, 102.5, 105.0)) is None
+    assert order_ladder("SELL", PRICE, ladder(97.5, 97.0, 95.0, 93.0)) is None
+
+
+def test_clamped_ladder_keeps_position_protected(server):
+    executor = make_executor(server)
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 100.4))
+
+    set_price(server, 100.5)
+    executor.poll()
+    assert bracket['state'] == 'open'
+    assert bracket['remaining'] == 3
+    assert mock_order(server, bracket, 'sl')['orderStatus'] == 'Untriggered'
+    assert float(mock_order(server, bracket, 'sl')['qty']) == 3
+
+
+def test_close_all_before_earlier_targets_resizes_stop(server):
+    executor = make_executor(server)
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+    # TP1 and TP2 cancelled by hand, so TP3 is the first to fill
+    for leg in ('tp1', 'tp2'):
+        server.exchange.cancel_order({"orderLinkId": bracket['legs'][leg]['link_id']})
+
+    set_price(server, 106.3)
+    executor.poll()
+    assert bracket['legs']['tp3']['status'] == 'Filled'
+    assert bracket['state'] == 'open'
+    assert bracket['remaining'] == 3
+    assert position(server) == 3
+    assert mock_order(server, bracket, 'sl')['orderStatus'] == 'Untriggered'
+    assert float(mock_order(server, bracket, 'sl')['qty']) == 3
+
+
+def test_rejected_stop_unwinds_entry(server):
+    executor = make_executor(server, leg='sl', fault='rejected')
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+    assert bracket['state'] == 'failed'
+    assert wait_for(lambda: all(mock_order(server, bracket, leg)['orderStatus'] == 'Cancelled'
+                                for leg in ('tp1', 'tp2', 'tp3')))
+    assert position(server) == 0
+
+
+def test_entry_accepted_before_connection_reset_stays_open(server):
+    executor = make_executor(server, leg='entry', fault='reset')
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+    assert bracket['state'] == 'open'
+    assert position(server) == 4
+
+
+def test_entry_in_unknown_state_is_closed(server):
+    executor = make_executor(server, leg='entry', fault='reset')
+    executor.client.lookup_fails = True
+    bracket = open_bracket(executor, ladder(97.5, 102.5, 105.0, 106.25))
+    assert bracket['state'] == 'failed'
+    assert wait_for(lambda: mock_order(server, bracket, 'sl')['orderStatus'] == 'Cancelled')
+    assert position(server) == 0
+
+
+def test_restored_submitting_bracket_is_reconciled(server):
+    first = make_executor(server)
+    bracket = open_bracket(first, ladder(97.5, 102.5, 105.0, 106.25))
+    executor = make_executor(server)
+    executor.restore(saved_while_submitting(first, bracket))
+    restored = executor.brackets[bracket['id']]
+    assert restored['state'] == 'open'
+    assert all(info['status'] == 'New' for info in restored['legs'].values())
+
+    set_price(server, 102.6)
+    executor.poll()
+    assert restored['legs']['tp1']['status'] == 'Filled'
+    assert restored['remaining'] == 3
+
+
+def test_restored_bracket_without_stop_is_unwound(server):
+    first = make_executor(server)
+    bracket = open_bracket(first, ladder(97.5, 102.5, 105.0, 106.25))
+    # The stop never reached the exchange
+    del server.exchange.orders[bracket['legs']['sl']['link_id']]
+    executor = make_executor(server)
+    executor.restore(saved_while_submitting(first, bracket))
+    restored = executor.brackets[bracket['id']]
+    assert restored['state'] == 'failed'
+    assert position(server) == 0
+    assert all(mock_order(server, restored, leg)['orderStatus'] == 'Cancelled' for leg in ('tp1', 'tp2', 'tp3'))
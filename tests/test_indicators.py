@@ -0,0 +1,80 @@
+"""
+The many-period indicators against bar-by-bar Wilder recursions
+"""
+
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import atr_matrix, rsi_matrix, wilder_matrix
+
+PERIODS = [1, 2, 3, 14, 50, 200]
+
+
+def wilder(values, period):
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    out[period - 1] = np.mean(values[:period])
+    for t in range(period, len(values)):
+        out[t] = out[t - 1] + (values[t] - out[t - 1]) / period
+    return out
+
+
+def rsi_reference(closes, period):
+    deltas = np.diff(closes)
+    gains = wilder(np.where(deltas > 0, deltas, 0.0), period)
+    losses = wilder(np.where(deltas < 0, -deltas, 0.0), period)
+    out = np.full(len(closes), np.nan)
+    for t in range(len(deltas)):
+        if np.isnan(gains[t]):
+            continue
+        out[t + 1] = 100.0 if losses[t] == 0 else 100.0 - 100.0 / (1.0 + gains[t] / losses[t])
+    return out
+
+
+def atr_reference(highs, lows, closes, period):
+    true_range = [max(highs[t] - lows[t], abs(highs[t] - closes[t - 1]), abs(lows[t] - closes[t - 1]))
+                  for t in range(1, len(closes))]
+    return np.concatenate([[np.nan], wilder(np.array(true_range), period)])
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(7)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 1000)))
+    spread = np.abs(rng.normal(0, 0.005, 1000)) * closes
+    return closes + spread, closes - spread, closes
+
+
+def assert_matches(actual, expected):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=0, atol=1e-9)
+
+
+def test_rsi_matches_wilder_recursion(candles):
+    _, _, closes = candles
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        rsi = rsi_matrix(closes, PERIODS)
+    for row, period in zip(rsi, PERIODS):
+        assert_matches(row, rsi_reference(closes, period))
+
+
+def test_atr_matches_wilder_recursion(candles):
+    highs, lows, closes = candles
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        atr = atr_matrix(highs, lows, closes, PERIODS)
+    for row, period in zip(atr, PERIODS):
+        assert_matches(row, atr_reference(highs, lows, closes, period))
+
+
+def test_period_one_is_the_input():
+    values = np.array([3.0, 1.0, 4.0, 1.0, 5.0])
+    np.testing.assert_array_equal(wilder_matrix(values, [1])[0], values)
@@ -0,0 +1,58 @@
+"""
+SL/TP ladders and level lookups of market_reader.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from levels import LevelIndex
+from market_reader import MarketReader, calculate_sl_tp_batch
+
+PRICE = 100.0
+ATR = 1.0
+
+
+def targets(result):
+    return [result['tp1'], result['tp2'], result['tp3']]
+
+
+@pytest.mark.parametrize("resistance", [None, 101.0, 104.0, 105.5, 105.8, 110.0])
+def test_buy_targets_stay_ordered(resistance):
+    result = calculate_sl_tp_batch([PRICE], ["BUY"], [ATR], [None], [resistance])[0]
+    tp1, tp2, tp3 = targets(result)
+    assert result['sl'] < PRICE < tp1 < tp2 <= tp3
+
+
+@pytest.mark.parametrize("support", [None, 99.0, 96.0, 94.7, 94.5, 90.0])
+def test_sell_targets_stay_ordered(support):
+    result = calculate_sl_tp_batch([PRICE], ["SELL"], [ATR], [support], [None])[0]
+    tp1, tp2, tp3 = targets(result)
+    assert result['sl'] > PRICE > tp1 > tp2 >= tp3
+
+
+def test_tp3_clamped_only_to_level_beyond_tp2():
+    # SL 97.5 / 102.5 with a 1.0 ATR: TP2 at 105 / 95, unclamped TP3 at 106.25 / 93.75
+    buy = calculate_sl_tp_batch([PRICE, PRICE], ["BUY", "BUY"], [ATR, ATR], None, [104.0, 105.8])
+    assert buy[0]['tp3'] == pytest.approx(106.25)
+    assert buy[1]['tp3'] == pytest.approx(105.8 * 0.998)
+    sell = calculate_sl_tp_batch([PRICE, PRICE], ["SELL", "SELL"], [ATR, ATR], [96.0, 94.5], None)
+    assert sell[0]['tp3'] == pytest.approx(93.75)
+    assert sell[1]['tp3'] == pytest.approx(94.5 * 1.002)
+
+
+def test_single_touch_level_is_skipped():
+    reader = MarketReader()
+    reader.levels = LevelIndex(pivot_bars=1, tolerance_pct=0.3)
+    # Swing highs at 106, 103 and 106 again: 103 has one touch, 106 has two
+    highs = [100, 106, 100, 103, 100, 106, 100]
+    reader.levels.update(range(len(highs)), highs, [99] * len(highs), [1] * len(highs))
+    assert reader.levels.resistance(PRICE).price == pytest.approx(103)
+
+    _, resistance, _, touches = reader.nearest_levels(PRICE, [PRICE], [PRICE], [PRICE])
+    assert resistance == pytest.approx(106)
+    assert touches == 2
+    assert reader.calculate_sl_tp(PRICE, "BUY", ATR)['tp3'] == pytest.approx(106 * 0.998)
@@ -0,0 +1,226 @@
+"""
+Append-only trade journal backed by SQLite (WAL) with rolling performance aggregates
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from trade_ledger import RESOLVED_STATUSES
+
+COLUMNS = (
+    'symbol', 'signal_type', 'entry_price', 'entry_time', 'review_time',
+    'sl', 'tp1', 'tp2', 'tp3', 'indicators', 'status', 'exit_price', 'exit_time', 'pnl_pct',
+)
+
+TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    signal_type TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    entry_time TEXT NOT NULL,
+    review_time REAL,
+    sl REAL, tp1 REAL, tp2 REAL, tp3 REAL,
+    indicators TEXT,
+    status TEXT NOT NULL,
+    exit_price REAL,
+    exit_time TEXT,
+    pnl_pct REAL,
+    resolved_at REAL
+)
+"""
+
+# Expired trades are closed without an outcome: archived like resolved ones, but kept out of the stats
+CLOSED_STATUSES = RESOLVED_STATUSES + ('EXPIRED',)
+
+STAT_KEYS = ('closed', 'wins', 'losses', 'gross_profit', 'gross_loss', 'equity', 'peak', 'max_drawdown')
+
+
+class TradeJournal:
+    """Trades are inserted once and updated in place when reviewed, never rewritten wholesale.
+
+    Only unresolved and recently resolved trades stay in the `trades` table; older resolved
+    trades are moved to `archive` by compact(). Win rate and friends are kept as running
+    aggregates in `stats`, so reports never have to scan the history.
+    """
+
+    def __init__(self, path="trade_journal.db", legacy_json=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(TABLE_SQL.format(name="trades"))
+        self.conn.execute(TABLE_SQL.format(name="archive"))
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_status_review ON trades(status, review_time)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_review ON trades(review_time)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        self.conn.executemany("INSERT OR IGNORE INTO stats (key, value) VALUES (?, ?)",
+                              [(k, 1.0 if k in ('equity', 'peak') else 0.0) for k in STAT_KEYS])
+        # Earlier versions stamped in-progress trades as resolved, which let compact() archive them
+        self.conn.execute("UPDATE trades SET resolved_at = NULL WHERE resolved_at IS NOT NULL "
+                          f"AND status NOT IN ({', '.join('?' * len(CLOSED_STATUSES))})", CLOSED_STATUSES)
+
+        if legacy_json and os.path.exists(legacy_json):
+            self._migrate(legacy_json)
+
+    def _migrate(self, legacy_json):
+        """One-off import of the old trade_history.json, all or nothing"""
+        try:
+            with open(legacy_json, 'r') as f:
+                history = json.load(f)
+        except:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for trade in history:
+                    trade_id = self._insert(trade)
+                    if trade.get('status') in RESOLVED_STATUSES or trade.get('status') == 'IN_PROGRESS':
+                        self._resolve(trade_id, trade['status'], trade.get('exit_price'), trade.get('exit_time'),
+                                      trade.get('pnl_pct', 0), self._timestamp(trade.get('exit_time')))
+                self.conn.execute("COMMIT")
+            except:
+                self.conn.execute("ROLLBACK")
+                raise
+        # Only renamed once the import is committed, so a failed one is retried from scratch
+        os.replace(legacy_json, legacy_json + ".migrated")
+        print(f"Migrated {len(history)} trades from {legacy_json}")
+
+    @staticmethod
+    def _timestamp(iso_time):
+        try:
+            return datetime.fromisoformat(iso_time).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
+    @staticmethod
+    def _row_to_trade(row):
+        trade = dict(row)
+        trade['indicators'] = json.loads(trade['indicators']) if trade['indicators'] else []
+        return trade
+
+    def _insert(self, trade):
+        values = [trade.get(c) for c in COLUMNS]
+        values[COLUMNS.index('indicators')] = json.dumps(trade.get('indicators') or [])
+        values[COLUMNS.index('status')] = 'pending_review'
+        cur = self.conn.execute(
+            f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", values)
+        return cur.lastrowid
+
+    def record(self, trade):
+        with self._lock:
+            return self._insert(trade)
+
+    def due_for_review(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM trades WHERE status IN ('pending_review', 'IN_PROGRESS') AND review_time <= ? "
+                "ORDER BY id",
+                (now,)).fetchall()
+        return [self._row_to_trade(r) for r in rows]
+
+    def open_trades(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM trades WHERE status IN ('pending_review', 'IN_PROGRESS') ORDER BY id").fetchall()
+        return [self._row_to_trade(r) for r in rows]
+
+    def resolve(self, trade_id, status, exit_price, exit_time, pnl_pct, next_review=None):
+        """Record a review outcome; `next_review` reschedules a trade that is still in progress"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._resolve(trade_id, status, exit_price, exit_time, pnl_pct, time.time(), next_review)
+                self.conn.execute("COMMIT")
+            except:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _resolve(self, trade_id, status, exit_price, exit_time, pnl_pct, resolved_at, next_review=None):
+        # Trades still in progress stay unresolved, so compact() keeps them in `trades`
+        closed = status in CLOSED_STATUSES
+        self.conn.execute(
+            "UPDATE trades SET status = ?, exit_price = ?, exit_time = ?, pnl_pct = ?, resolved_at = ?, "
+            "review_time = COALESCE(?, review_time) WHERE id = ?",
+            (status, exit_price, exit_time, pnl_pct, resolved_at if closed else None, next_review, trade_id))
+        if status in RESOLVED_STATUSES:
+            self._update_stats(status, pnl_pct or 0)
+
+    def _update_stats(self, status, pnl_pct):
+        s = dict(self.conn.execute("SELECT key, value FROM stats").fetchall())
+        pnl = pnl_pct / 100
+        s['closed'] += 1
+        if status.startswith("TAKE_PROFIT"):
+            s['wins'] += 1
+        else:
+            s['losses'] += 1
+        if pnl > 0:
+            s['gross_profit'] += pnl
+        else:
+            s['gross_loss'] -= pnl
+        s['equity'] *= (1 + pnl)
+        s['peak'] = max(s['peak'], s['equity'])
+        s['max_drawdown'] = max(s['max_drawdown'], 1 - s['equity'] / s['peak'])
+        self.conn.executemany("UPDATE stats SET value = ? WHERE key = ?", [(v, k) for k, v in s.items()])
+
+    def stats(self):
+        with self._lock:
+            s = dict(self.conn.execute("SELECT key, value FROM stats").fetchall())
+        closed = int(s['closed'])
+        return {
+            'trades': closed,
+            'wins': int(s['wins']),
+            'losses': int(s['losses']),
+            'win_rate': s['wins'] / closed * 100 if closed else 0.0,
+            'profit_factor': s['gross_profit'] / s['gross_loss'] if s['gross_loss'] > 0 else float('inf'),
+            'expectancy': (s['gross_profit'] - s['gross_loss']) / closed if closed else 0.0,
+            'total_return': s['equity'] - 1,
+            'max_drawdown': s['max_drawdown'],
+        }
+
+    def compact(self, older_than=7 * 86400):
+        """Move trades resolved more than `older_than` seconds ago into the archive table"""
+        cutoff = time.time() - older_than
+        cols = ', '.join(('id',) + COLUMNS + ('resolved_at',))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(f"INSERT INTO archive ({cols}) SELECT {cols} FROM trades "
+                                  "WHERE resolved_at IS NOT NULL AND resolved_at < ?", (cutoff,))
+                moved = self.conn.execute("DELETE FROM trades WHERE resolved_at IS NOT NULL AND resolved_at < ?",
+                                          (cutoff,)).rowcount
+                self.conn.execute("COMMIT")
+            except:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if moved:
+            print(f"Archived {moved} resolved trades")
+        return moved
+
+    def resolved_trades(self, page_size=500):
+        """Iterate every resolved trade (archived first), one page in memory at a time"""
+        statuses = ', '.join('?' * len(RESOLVED_STATUSES))
+        for table in ('archive', 'trades'):
+            last_id = 0
+            while True:
+                with self._lock:
+                    rows = self.conn.execute(
+                        f"SELECT * FROM {table} WHERE id > ? AND status IN ({statuses}) ORDER BY id LIMIT ?",
+                        (last_id,) + RESOLVED_STATUSES + (page_size,)).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_trade(row)
+                last_id = rows[-1]['id']
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,83 @@
+"""
+Columnar trade ledger shared by the backtester and the live trade history
+"""
+
+import numpy as np
+
+LEDGER_DTYPE = np.dtype([
+    ('symbol', 'S16'),
+    ('side', 'i1'),          # 1 long / BUY, -1 short / SELL
+    ('entry', 'f8'),
+    ('exit', 'f8'),
+    ('pnl', 'f8'),           # fractional return, 0.01 == +1%
+    ('entry_time', 'i8'),    # bar index (backtest) or epoch seconds (live)
+    ('exit_time', 'i8'),
+])
+
+SIDES = {'long': 1, 'BUY': 1, 'short': -1, 'SELL': -1}
+SIDE_NAMES = {1: 'long', -1: 'short'}
+RESOLVED_STATUSES = ('STOP_LOSS', 'TAKE_PROFIT_1', 'TAKE_PROFIT_2', 'TAKE_PROFIT_3')
+
+
+class TradeLedger:
+    def __init__(self, capacity=64):
+        self._data = np.zeros(capacity, dtype=LEDGER_DTYPE)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    @property
+    def data(self):
+        return self._data[:self._size]
+
+    @property
+    def pnl(self):
+        return self.data['pnl']
+
+    @property
+    def duration(self):
+        return self.data['exit_time'] - self.data['entry_time']
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, len(self._data) * 2), dtype=LEDGER_DTYPE)
+            grown[:self._size] = self.data
+            self._data = grown
+
+    def append(self, side, entry, exit, pnl, entry_time, exit_time, symbol=""):
+        self._reserve(1)
+        self._data[self._size] = (symbol, SIDES.get(side, side), entry, exit, pnl, entry_time, exit_time)
+        self._size += 1
+
+    def extend(self, other):
+        rows = other.data if isinstance(other, TradeLedger) else np.asarray(other, dtype=LEDGER_DTYPE)
+        self._reserve(len(rows))
+        self._data[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+
+    def tail(self, n=5):
+        """Last n trades as dicts, for printing"""
+        return [{
+            'symbol': row['symbol'].decode(),
+            'side': SIDE_NAMES[int(row['side'])],
+            'entry': float(row['entry']),
+            'exit': float(row['exit']),
+            'pnl': float(row['pnl']),
+            'duration': int(row['exit_time'] - row['entry_time']),
+        } for row in self.data[-n:]] if n > 0 else []
+
+    def save(self, path):
+        """Write the ledger as a compact binary .npy file"""
+        np.save(path, self.data, allow_pickle=False)
+
+    @classmethod
+    def load(cls, path):
+        rows = np.load(path, allow_pickle=False)
+        ledger = cls(capacity=max(len(rows), 1))
+        ledger.extend(rows)
+        return ledger
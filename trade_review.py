@@ -0,0 +1,96 @@
+"""
+Path-aware resolution of pending trades over the candles since entry
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+TP_LEVELS = ('tp1', 'tp2', 'tp3')
+
+
+def _level(trades, key):
+    return np.array([np.nan if t.get(key) is None else t[key] for t in trades], dtype=float)
+
+
+def _first_hit(mask):
+    """Index of the first True per row, inf when never hit"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), np.inf)
+
+
+def resolve_trades(trades, paths, prices, candle_seconds):
+    """Resolve trades against their high/low path in one vectorized pass.
+
+    paths maps symbol -> (open_times_ms, highs, lows, closes) numpy arrays, ascending.
+    prices maps symbol -> latest price. Returns one (result, exit_price, pnl_pct) per trade:
+    TAKE_PROFIT_k is the highest target touched before the stop, STOP_LOSS when the stop
+    was touched first, IN_PROGRESS otherwise and PENDING when there is no price data.
+    A candle touching both the stop and a target counts as a stop (conservative).
+    """
+    n = len(trades)
+    if n == 0:
+        return []
+
+    candle_ms = candle_seconds * 1000
+    segments = []
+    last_close = np.full(n, np.nan)
+    for i, t in enumerate(trades):
+        path = paths.get(t['symbol'])
+        if path is None:
+            segments.append((np.empty(0), np.empty(0)))
+            continue
+        open_times, highs, lows, closes = path
+        entry_ms = datetime.fromisoformat(t['entry_time']).timestamp() * 1000
+        # The candle containing the entry is included; earlier candles are not
+        start = np.searchsorted(open_times + candle_ms, entry_ms, side='right')
+        segments.append((highs[start:], lows[start:]))
+        if len(closes):
+            last_close[i] = closes[-1]
+
+    width = max((len(h) for h, _ in segments), default=0)
+    highs = np.full((n, max(width, 1)), np.nan)
+    lows = np.full((n, max(width, 1)), np.nan)
+    for i, (h, l) in enumerate(segments):
+        highs[i, :len(h)] = h
+        lows[i, :len(l)] = l
+
+    # Mirror shorts so that "favourable" is always up and "adverse" always down
+    direction = np.array([1.0 if t['signal_type'] == "BUY" else -1.0 for t in trades])
+    is_buy = direction[:, None] > 0
+    favourable = np.where(is_buy, highs, -lows)
+    adverse = np.where(is_buy, lows, -highs)
+
+    entry = _level(trades, 'entry_price')
+    sl = _level(trades, 'sl')
+    targets = np.column_stack([_level(trades, k) for k in TP_LEVELS])
+
+    with np.errstate(invalid='ignore'):
+        sl_hit = _first_hit(adverse <= (sl * direction)[:, None])
+        tp_hits = np.column_stack([
+            _first_hit(favourable >= (targets[:, k] * direction)[:, None]) for k in range(len(TP_LEVELS))
+        ])
+
+    reached = tp_hits < sl_hit[:, None]
+    # Highest target reached before the stop, 0 when none
+    best_tp = np.where(reached.any(axis=1), len(TP_LEVELS) - reached[:, ::-1].argmax(axis=1), 0)
+
+    current = np.array([prices.get(t['symbol'], np.nan) for t in trades], dtype=float)
+    current = np.where(np.isnan(current), last_close, current)
+
+    exit_price = np.where(best_tp > 0, targets[np.arange(n), np.maximum(best_tp - 1, 0)],
+                          np.where(np.isfinite(sl_hit), sl, current))
+    pnl_pct = (exit_price - entry) / entry * 100 * direction
+
+    results = []
+    for i in range(n):
+        if best_tp[i] > 0:
+            result = f"TAKE_PROFIT_{best_tp[i]}"
+        elif np.isfinite(sl_hit[i]):
+            result = "STOP_LOSS"
+        elif np.isnan(current[i]):
+            results.append(("PENDING", None, 0.0))
+            continue
+        else:
+            result = "IN_PROGRESS"
+        results.append((result, float(exit_price[i]), float(pnl_pct[i])))
+    return results
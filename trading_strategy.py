@@ -1,4 +1,4 @@
-from config import RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD
+from config import RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, LEVEL_MIN_TOUCHES, LEVEL_PROXIMITY_PCT
 
 
 class TradingStrategy:
@@ -25,6 +25,8 @@ class TradingStrategy:
         obv_trend = a.get('obv_trend', 'NEUTRAL')
         volume_profile = a.get('volume_profile', 1.0)
         divergence = a.get('divergence', 'NONE')
+        support = a.get('support')
+        resistance = a.get('resistance')
         
         buy_score = 0
         sell_score = 0
@@ -49,6 +51,16 @@ class TradingStrategy:
             sell_score += 4
             indicators.append("Bearish Divergence")
         
+        # Only levels the index has seen price turn at more than once count
+        if (support and a.get('support_touches', 0) >= LEVEL_MIN_TOUCHES
+                and 0 <= price - support <= price * LEVEL_PROXIMITY_PCT / 100):
+            buy_score += 2
+            indicators.append("Near Support")
+        elif (resistance and a.get('resistance_touches', 0) >= LEVEL_MIN_TOUCHES
+                and 0 <= resistance - price <= price * LEVEL_PROXIMITY_PCT / 100):
+            sell_score += 2
+            indicators.append("Near Resistance")
+        
         if macd_hist > 0:
             buy_score += 2
             if macd_hist > 0.5: